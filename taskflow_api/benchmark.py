@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Benchmark de leituras e escritas concorrentes da API TaskFlow
+
+Executa threads leitoras (GET /api/tasks, GET /api/stats) e escritoras
+(POST /api/tasks, PATCH /api/tasks/toggle/<id>) em paralelo contra um banco
+SQLite temporário e compara duas configurações:
+- antes: journaling padrão do SQLite (rollback journal) e pool padrão;
+- depois: ProductionConfig (WAL, synchronous=NORMAL, busy_timeout, mmap, cache).
+
+Com --writes, mede a vazão de escritas sequenciais (criar, editar, alternar)
+e o número de commits por requisição em cada configuração.
+
+Com --import N, compara a criação de tarefas uma a uma (POST /api/tasks, numa
+amostra) com a importação de N tarefas em NDJSON (POST /api/import) e mede
+a exportação NDJSON das tarefas importadas e o pico de memória do processo.
+
+Com --json, compara a serialização da listagem completa de tarefas (a mesma
+de GET /api/tasks/changes) com 1k, 10k e 100k tarefas: objetos do ORM +
+to_dict() + json da biblioteca padrão (caminho anterior) contra linhas do
+select() + provedor JSON da aplicação (json padrão e orjson) e o streaming.
+
+Com --reads, compara o caminho de leitura das rotas GET com 1k, 10k e 100k
+tarefas: objetos do ORM (identity map, selectinload das categorias) contra
+select() com colunas explícitas e a categoria no mesmo SELECT. Reporta a
+latência e o pico de memória alocada por requisição em cada listagem.
+
+Com --startup N, mede a partida a frio de um worker em N processos novos:
+importação da aplicação, create_app() e a primeira requisição, contra um
+banco já migrado (com AUTO_MIGRATE, só a consulta à versão do esquema) e
+contra um banco novo (migração completa na inicialização).
+
+Uso:
+    python benchmark.py [--seconds 10] [--readers 8] [--writers 2] [--tasks 500]
+    python benchmark.py --writes [--seconds 10]
+    python benchmark.py --import 1000000 [--scenario depois]
+    python benchmark.py --json
+    python benchmark.py --reads
+    python benchmark.py --startup 20
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import tracemalloc
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+from src.config import ProductionConfig
+from src.main import create_app
+from sqlalchemy.orm import selectinload
+
+from src.models.user import db, User
+from src.models.task import Category, Task
+from src.models.queries import read_dicts, read_rows, select_fields, select_tasks, serialize_tasks
+from src.routes.task import TASKS_MAX_LIMIT
+from src.services.serialization import FastJSONProvider, json_stream, serialize_rows
+
+SCENARIOS = {
+    'antes': {'SQLITE_PRAGMAS': {}, 'SQLALCHEMY_ENGINE_OPTIONS': {}},
+    'depois': {},
+}
+
+# Tamanhos da listagem no benchmark de serialização (--json)
+JSON_SIZES = (1000, 10000, 100000)
+
+# Processo medido por --startup: imprime os tempos (ms) de cada etapa da partida a frio em JSON
+STARTUP_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+from src.main import create_app
+imported = time.perf_counter()
+app = create_app('production')
+created = time.perf_counter()
+status = app.test_client().get('/api/tasks?user_id=1&limit=1').status_code
+answered = time.perf_counter()
+print(json.dumps({'import': (imported - started) * 1000, 'create_app': (created - imported) * 1000,
+                  'primeira requisição': (answered - created) * 1000, 'status': status}))
+"""
+
+# Tarefas por categoria e por usuário nas listagens do benchmark de leitura (--reads)
+READS_TASKS_PER_CATEGORY = 50
+READS_TASKS_PER_USER = 100
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def populate(app, tasks_count):
+    """Cria tarefas para o usuário padrão em lotes"""
+    with app.app_context():
+        db.session.execute(db.insert(Task), [
+            {'text': f'Tarefa {index}', 'priority': ('baixa', 'media', 'alta')[index % 3], 'user_id': 1}
+            for index in range(tasks_count)
+        ])
+        db.session.commit()
+        return [task_id for (task_id,) in db.session.query(Task.id).filter_by(user_id=1).limit(100)]
+
+def worker(app, kind, task_ids, deadline, results, lock):
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    iteration = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if kind == 'read':
+            path = '/api/tasks?user_id=1&limit=50' if iteration % 2 == 0 else '/api/stats?user_id=1'
+            response = client.get(path)
+        elif iteration % 2 == 0:
+            response = client.post('/api/tasks', json={'text': f'Benchmark {iteration}', 'user_id': 1})
+        else:
+            response = client.patch(f'/api/tasks/toggle/{task_ids[iteration % len(task_ids)]}')
+        elapsed = time.perf_counter() - started
+        if response.status_code < 400:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+        iteration += 1
+    with lock:
+        results[kind]['latencies'].extend(latencies)
+        results[kind]['errors'] += errors
+
+def create_benchmark_app(directory, overrides):
+    return create_app(
+        ProductionConfig,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+        **{'HTTP_CACHE_ENABLED': False, **overrides}  # Medir o banco, não o cache de respostas (salvo se pedido)
+    )
+
+def run_write_scenario(name, overrides, args):
+    """Escritas sequenciais de uma única thread: latência dominada pelos commits"""
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_benchmark_app(directory, overrides)
+        client = app.test_client()
+        commits = []
+        with app.app_context():
+            event.listen(db.engine, 'commit', lambda connection: commits.append(1))
+
+        requests_count = 0
+        task_id = None
+        deadline = time.perf_counter() + args.seconds
+        while time.perf_counter() < deadline:
+            step = requests_count % 3
+            if step == 0:
+                response = client.post('/api/tasks', json={'text': f'Benchmark {requests_count}', 'user_id': 1})
+                task_id = response.get_json()['task']['id']
+            elif step == 1:
+                response = client.put(f'/api/tasks/{task_id}', json={'text': f'Editada {requests_count}', 'priority': 'alta'})
+            else:
+                response = client.patch(f'/api/tasks/toggle/{task_id}')
+            if response.status_code >= 400:
+                raise RuntimeError(f'{response.status_code}: {response.get_json()}')
+            requests_count += 1
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"{name:<8} {requests_count / args.seconds:>12.1f} {len(commits) / requests_count:>18.2f}")
+
+def write_import_file(path, tasks_count):
+    """Gera o arquivo NDJSON da importação sem mantê-lo em memória"""
+    with open(path, 'w', encoding='utf-8') as output:
+        for index in range(tasks_count):
+            record = {
+                'text': f'Tarefa importada {index}',
+                'priority': ('baixa', 'media', 'alta')[index % 3],
+                'category': f'Categoria {index % 20}',
+                'completed': index % 4 == 0
+            }
+            if index % 10 == 0:
+                record['reminder_datetime'] = f'2030-01-{index % 28 + 1:02d}T09:00:00'
+            output.write(json.dumps(record) + '\n')
+
+def peak_rss_mb():
+    # ru_maxrss em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_import_scenario(name, overrides, args):
+    """Criação uma a uma x importação em lote x exportação em streaming"""
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_benchmark_app(directory, overrides)
+        client = app.test_client()
+
+        sample = min(args.import_tasks, 2000)
+        started = time.perf_counter()
+        for index in range(sample):
+            response = client.post('/api/tasks', json={'text': f'Tarefa {index}', 'category_id': 1 + index % 5, 'user_id': 1})
+            if response.status_code >= 400:
+                raise RuntimeError(f'{response.status_code}: {response.get_json()}')
+        single_rate = sample / (time.perf_counter() - started)
+
+        path = os.path.join(directory, 'import.ndjson')
+        write_import_file(path, args.import_tasks)
+        rss_before = peak_rss_mb()
+        with open(path, 'rb') as body:
+            started = time.perf_counter()
+            response = client.post(
+                '/api/import?user_id=1', input_stream=body, content_type='application/x-ndjson',
+                headers={'Content-Length': str(os.path.getsize(path))}
+            )
+            import_seconds = time.perf_counter() - started
+        result = response.get_json()
+        if response.status_code >= 400 or result['imported'] != args.import_tasks:
+            raise RuntimeError(f'{response.status_code}: {result}')
+
+        started = time.perf_counter()
+        exported = 0
+        response = client.get('/api/export/tasks.ndjson?user_id=1', buffered=False)
+        for chunk in response.response:
+            exported += len(chunk)
+        export_seconds = time.perf_counter() - started
+
+        with app.app_context():
+            db.engine.dispose()
+
+    print(
+        f"{name:<8} {single_rate:>14.1f} {args.import_tasks / import_seconds:>14.1f} {import_seconds:>10.1f} "
+        f"{(sample + args.import_tasks) / export_seconds:>16.1f} {peak_rss_mb():>10.1f} {peak_rss_mb() - rss_before:>10.1f}"
+    )
+
+def json_paths(app):
+    """Caminhos de serialização comparados: nome -> função que retorna o tamanho do corpo gerado"""
+    task_fields = [field for field in Task.SERIALIZABLE_FIELDS if field != 'category']
+    rows_query = db.select(*(getattr(Task, field) for field in task_fields)).where(Task.user_id == 1).order_by(Task.version, Task.id)
+    default_provider = DefaultJSONProvider(app)
+    default_provider.sort_keys = False
+
+    def orm_to_dict():
+        tasks = Task.query.filter_by(user_id=1).order_by(Task.version, Task.id).all()
+        body = default_provider.dumps({'success': True, 'tasks': [task.to_dict(fields=task_fields) for task in tasks]})
+        db.session.expunge_all()
+        return len(body.encode('utf-8'))
+
+    def rows_with(provider):
+        def encode():
+            rows = db.session.execute(rows_query).all()
+            return len(provider.dumps_bytes({'success': True, 'tasks': list(serialize_rows(rows, task_fields))}))
+        return encode
+
+    def stream():
+        rows = serialize_rows(db.session.execute(rows_query, execution_options={'yield_per': 500}), task_fields)
+        # As partes seriam enviadas ao cliente à medida que são geradas
+        return sum(len(chunk) for chunk in json_stream({'success': True, 'tasks': rows}))
+
+    app.config['JSON_USE_ORJSON'] = False
+    paths = {'ORM + to_dict + json': orm_to_dict, 'linhas + json': rows_with(FastJSONProvider(app))}
+    app.config['JSON_USE_ORJSON'] = True
+    if app.json.use_orjson:
+        paths['linhas + orjson'] = rows_with(app.json)
+    paths[f"linhas + stream ({'orjson' if app.json.use_orjson else 'json'})"] = stream
+    return paths
+
+def run_json_benchmark(args):
+    """Tempo e pico de memória de cada caminho de serialização por tamanho da listagem"""
+    print(f"{'tarefas':>8}  {'caminho':<24} {'ms':>9} {'pico MB':>9} {'KB':>9}")
+    for size in JSON_SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_benchmark_app(directory, {})
+            populate(app, size)
+            with app.test_request_context():
+                for name, encode in json_paths(app).items():
+                    encode()  # aquecimento (cache de instruções do SQLAlchemy)
+                    timings = []
+                    for _ in range(max(1, 5 if size <= 10000 else 2)):
+                        started = time.perf_counter()
+                        size_bytes = encode()
+                        timings.append(time.perf_counter() - started)
+                    tracemalloc.start()
+                    encode()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    print(f"{size:>8}  {name:<24} {min(timings) * 1000:>9.1f} {peak / 1e6:>9.1f} {size_bytes / 1024:>9.0f}")
+                db.session.remove()
+                db.engine.dispose()
+
+def populate_listings(app, tasks_count):
+    """Cria usuários, categorias e tarefas distribuídas entre as categorias do usuário padrão"""
+    now = datetime.utcnow()
+    categories_count = max(1, tasks_count // READS_TASKS_PER_CATEGORY)
+    with app.app_context():
+        db.session.execute(db.insert(User.__table__), [
+            {'username': f'benchmark_{index}', 'email': f'benchmark_{index}@example.com', 'password_hash': 'x', 'created_at': now, 'updated_at': now}
+            for index in range(tasks_count // READS_TASKS_PER_USER)
+        ])
+        category_ids = [category_id for (category_id,) in db.session.execute(db.insert(Category.__table__).returning(Category.id), [
+            {'name': f'Benchmark {index}', 'color': '#667eea', 'user_id': 1, 'version': 0, 'created_at': now, 'updated_at': now}
+            for index in range(categories_count)
+        ])]
+        db.session.execute(db.insert(Task.__table__), [
+            {
+                'text': f'Tarefa {index}', 'priority': ('baixa', 'media', 'alta')[index % 3],
+                'category_id': category_ids[index % categories_count], 'completed': False, 'notified': False,
+                'user_id': 1, 'version': 0, 'created_at': now - timedelta(seconds=index), 'updated_at': now
+            }
+            for index in range(tasks_count)
+        ])
+        db.session.commit()
+
+def read_paths():
+    """Listagens comparadas: nome -> (caminho ORM, caminho select()), cada um retorna o corpo JSON"""
+    def orm_tasks():
+        tasks = Task.query.options(selectinload(Task.category)).filter_by(user_id=1).order_by(
+            Task.created_at.desc(), Task.id.desc()
+        ).limit(TASKS_MAX_LIMIT).all()
+        return {'success': True, 'tasks': [task.to_dict() for task in tasks]}
+
+    def select_tasks_page():
+        statement = select_tasks().where(Task.user_id == 1).order_by(Task.created_at.desc(), Task.id.desc())
+        tasks, _ = serialize_tasks(read_rows(statement.limit(TASKS_MAX_LIMIT)).all())
+        return {'success': True, 'tasks': tasks}
+
+    def orm_categories():
+        categories = Category.query.filter_by(user_id=1).order_by(Category.name).all()
+        return {'success': True, 'categories': [category.to_dict() for category in categories]}
+
+    def select_categories():
+        statement = select_fields(Category).where(Category.user_id == 1).order_by(Category.name)
+        return {'success': True, 'categories': read_dicts(statement, Category.SERIALIZABLE_FIELDS)}
+
+    def orm_users():
+        return {'success': True, 'users': [user.to_dict() for user in User.query.all()]}
+
+    def select_users():
+        return {'success': True, 'users': read_dicts(select_fields(User), User.SERIALIZABLE_FIELDS)}
+
+    return {
+        f'tarefas ({TASKS_MAX_LIMIT})': (orm_tasks, select_tasks_page),
+        'categorias': (orm_categories, select_categories),
+        'usuários': (orm_users, select_users),
+    }
+
+def run_reads_benchmark(args):
+    """Latência e pico de memória por requisição das listagens, caminho ORM x select()"""
+    print(f"{'tarefas':>8}  {'listagem':<15} {'itens':>6} {'ORM ms':>8} {'select ms':>10} {'ORM KB':>8} {'select KB':>10}")
+    for size in JSON_SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_benchmark_app(directory, {})
+            populate_listings(app, size)
+            for name, paths in read_paths().items():
+                timings = []
+                peaks = []
+                for read in paths:
+                    # Cada leitura numa requisição própria: sessão (e identity map) nova, como nas rotas
+                    with app.test_request_context():
+                        items = len(next(value for value in read().values() if isinstance(value, list)))
+                    best = None
+                    for _ in range(20):
+                        with app.test_request_context():
+                            started = time.perf_counter()
+                            app.json.dumps_bytes(read())
+                            elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings.append(best)
+                    with app.test_request_context():
+                        tracemalloc.start()
+                        app.json.dumps_bytes(read())
+                        peaks.append(tracemalloc.get_traced_memory()[1])
+                        tracemalloc.stop()
+                print(
+                    f"{size:>8}  {name:<15} {items:>6} {timings[0] * 1000:>8.2f} {timings[1] * 1000:>10.2f} "
+                    f"{peaks[0] / 1024:>8.0f} {peaks[1] / 1024:>10.0f}"
+                )
+            with app.app_context():
+                db.engine.dispose()
+
+def measure_startup(database):
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, 'TASKFLOW_DATABASE_URL': f'sqlite:///{database}', 'TASKFLOW_AUTO_MIGRATE': '1'}
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    if timings.pop('status') != 200:
+        raise RuntimeError('Primeira requisição falhou')
+    return timings
+
+def run_startup_benchmark(args):
+    """Partida a frio de workers: banco migrado (caso comum) e banco novo (migração na inicialização)"""
+    with tempfile.TemporaryDirectory() as directory:
+        fresh = [measure_startup(os.path.join(directory, f'novo{index}.db')) for index in range(max(1, args.startup // 4))]
+        migrated = [measure_startup(os.path.join(directory, 'novo0.db')) for _ in range(args.startup)]
+
+    print(f"{'banco':<9} {'etapa':<20} {'mediana ms':>11} {'máx ms':>9}")
+    for name, runs in (('migrado', migrated), ('novo', fresh)):
+        for step in runs[0]:
+            values = [run[step] for run in runs]
+            print(f"{name:<9} {step:<20} {statistics.median(values):>11.1f} {max(values):>9.1f}")
+
+def run_scenario(name, overrides, args):
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_benchmark_app(directory, overrides)
+        task_ids = populate(app, args.tasks)
+
+        results = {kind: {'latencies': [], 'errors': 0} for kind in ('read', 'write')}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+        threads = [
+            threading.Thread(target=worker, args=(app, kind, task_ids, deadline, results, lock))
+            for kind, count in (('read', args.readers), ('write', args.writers))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with app.app_context():
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+            db.engine.dispose()
+
+    print(f"\n{name} (journal_mode={journal_mode})")
+    print(f"{'operação':<10} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>7}")
+    for kind, data in results.items():
+        latencies = data['latencies']
+        print(
+            f"{kind:<10} {len(latencies) / args.seconds:>9.1f} "
+            f"{percentile(latencies, 0.50) * 1000:>9.2f} {percentile(latencies, 0.95) * 1000:>9.2f} "
+            f"{percentile(latencies, 0.99) * 1000:>9.2f} {data['errors']:>7}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de leituras e escritas concorrentes')
+    parser.add_argument('--seconds', type=float, default=10, help='duração de cada cenário')
+    parser.add_argument('--readers', type=int, default=8, help='threads leitoras')
+    parser.add_argument('--writers', type=int, default=2, help='threads escritoras')
+    parser.add_argument('--tasks', type=int, default=500, help='tarefas criadas antes da medição')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), help='executar apenas um cenário')
+    parser.add_argument('--writes', action='store_true', help='medir escritas sequenciais e commits por requisição')
+    parser.add_argument('--import', dest='import_tasks', type=int, metavar='N', help='medir a importação de N tarefas em NDJSON')
+    parser.add_argument('--json', action='store_true', help='comparar os caminhos de serialização JSON')
+    parser.add_argument('--reads', action='store_true', help='comparar o caminho de leitura ORM x select() das listagens')
+    parser.add_argument('--startup', type=int, metavar='N', help='medir a partida a frio de N processos novos')
+    args = parser.parse_args()
+
+    if args.startup:
+        run_startup_benchmark(args)
+        return
+
+    if args.reads:
+        run_reads_benchmark(args)
+        return
+
+    if args.json:
+        run_json_benchmark(args)
+        return
+
+    runner = run_scenario
+    if args.writes:
+        runner = run_write_scenario
+        print(f"{'cenário':<8} {'escritas/s':>12} {'commits/requisição':>18}")
+    elif args.import_tasks:
+        runner = run_import_scenario
+        print(
+            f"{'cenário':<8} {'POST tarefas/s':>14} {'import tarefas/s':>14} {'import s':>10} "
+            f"{'export tarefas/s':>16} {'pico MB':>10} {'+MB import':>10}"
+        )
+    for name, overrides in SCENARIOS.items():
+        if args.scenario in (None, name):
+            runner(name, overrides, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Script para verificar as consultas SQL emitidas pelas rotas da API TaskFlow
+
+Executa as rotas com o cliente de testes do Flask sobre um banco SQLite
+temporário e falha (código de saída 1) se alguma rota:
+- emitir um número de SELECTs que cresce com a quantidade de dados (N+1);
+- executar uma consulta cujo EXPLAIN QUERY PLAN contenha varredura completa (SCAN);
+- repetir a mesma instrução mais de QUERY_REPEAT_LIMIT vezes (o detector de
+  N+1 da configuração de testes faz a rota falhar com RepeatedQueryError).
+
+Também confere os contadores de estatísticas contra a agregação direta e a
+lista de campos que as edições (PUT e lote, com e sem contadores) gravam no
+log de atividades.
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import create_app
+from src.models.user import db, User
+from src.models.task import ActivityLog, Category, Task, TaskStatCounter
+from src.services.query_guard import RepeatedQueryError
+from src.services.reminders import reminder_scheduler
+from src.services.retention import retention_job
+
+# Número máximo de SELECTs permitido por requisição
+MAX_SELECTS = {
+    'GET /api/tasks': 1,
+    'GET /api/tasks?category_format=map': 2,
+    'GET /api/tasks/<id>': 1,
+    'PATCH /api/tasks/toggle/<id>': 1,
+    'GET /api/stats': 2,
+    'GET /api/activity': 1,
+    'GET /api/tasks/search': 1,
+    'GET /api/export/calendar.ics': 1,
+    'GET /api/export/tasks.ndjson': 1,
+}
+
+# Rotas em que a varredura completa é intencional
+ALLOWED_SCANS = {
+    'GET /api/users',  # listagem administrativa de todos os usuários
+}
+
+def create_test_app(database_path):
+    """Cria uma aplicação isolada apontando para um banco temporário"""
+    # A configuração de testes desativa o cache de respostas: mede-se o acesso ao banco
+    return create_app('testing', SQLALCHEMY_DATABASE_URI=f'sqlite:///{database_path}')
+
+def populate(app, categories_count, tasks_per_category, username=None):
+    """Cria um usuário com categorias e tarefas distribuídas entre elas"""
+    username = username or f'user_{categories_count}'
+    with app.app_context():
+        user = User(username=username, email=f'{username}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        for index in range(categories_count):
+            category = Category(name=f'Categoria {index}', user_id=user.id)
+            db.session.add(category)
+            db.session.flush()
+            for position in range(tasks_per_category):
+                db.session.add(Task(
+                    text=f'Tarefa {index}.{position}',
+                    category_id=category.id,
+                    reminder_datetime=datetime.utcnow() + timedelta(minutes=position),
+                    user_id=user.id
+                ))
+        db.session.commit()
+        return user.id, Task.query.filter_by(user_id=user.id).first().id
+
+@contextmanager
+def count_selects(app):
+    """Conta os SELECTs e guarda as instruções emitidas dentro do bloco"""
+    counter = {'selects': 0, 'statements': []}
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            counter['selects'] += 1
+        if not executemany:
+            counter['statements'].append((statement, parameters))
+    
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def route_requests(client, user_id, task_id):
+    """Requisições exercitadas pela verificação, na ordem de execução"""
+    return {
+        'GET /api/tasks': lambda: client.get(f'/api/tasks?user_id={user_id}'),
+        'GET /api/tasks?category_format=map': lambda: client.get(f'/api/tasks?user_id={user_id}&category_format=map'),
+        'GET /api/tasks?completed=false': lambda: client.get(f'/api/tasks?user_id={user_id}&completed=false&include_total=true'),
+        'GET /api/tasks?priority=alta': lambda: client.get(f'/api/tasks?user_id={user_id}&priority=alta'),
+        'GET /api/tasks/<id>': lambda: client.get(f'/api/tasks/{task_id}?user_id={user_id}'),
+        'GET /api/tasks/search': lambda: client.get(f'/api/tasks/search?user_id={user_id}&q=tar&limit=2'),
+        'GET /api/tasks/search?completed=false': lambda: client.get(f'/api/tasks/search?user_id={user_id}&q=tarefa&completed=false&category_format=map'),
+        'GET /api/tasks/changes': lambda: client.get(f'/api/tasks/changes?user_id={user_id}&since=1'),
+        'PATCH /api/tasks/toggle/<id>': lambda: client.patch(f'/api/tasks/toggle/{task_id}?user_id={user_id}'),
+        'PUT /api/tasks/<id>': lambda: client.put(f'/api/tasks/{task_id}?user_id={user_id}', json={'priority': 'alta'}),
+        'POST /api/tasks': lambda: client.post('/api/tasks', json={'text': 'Nova', 'user_id': user_id}),
+        'POST /api/tasks/bulk (operations)': lambda: client.post('/api/tasks/bulk', json={'user_id': user_id, 'operations': [
+            {'action': 'create', 'text': 'Lote'}, {'action': 'toggle', 'id': task_id}
+        ]}),
+        'POST /api/tasks/bulk (filter)': lambda: client.post('/api/tasks/bulk', json={
+            'user_id': user_id, 'action': 'complete', 'filter': {'completed': False, 'priority': 'alta'}
+        }),
+        'GET /api/stats': lambda: client.get(f'/api/stats?user_id={user_id}'),
+        'GET /api/reminders/due': lambda: client.get(f'/api/reminders/due?user_id={user_id}&since={datetime.utcnow().isoformat()}'),
+        'GET /api/activity': lambda: client.get(f'/api/activity?user_id={user_id}&limit=2'),
+        'GET /api/activity/daily': lambda: client.get(f'/api/activity/daily?user_id={user_id}'),
+        'GET /api/export/calendar.ics': lambda: client.get(f'/api/export/calendar.ics?user_id={user_id}&start={datetime.utcnow().date().isoformat()}'),
+        'GET /api/export/tasks.ndjson': lambda: client.get(f'/api/export/tasks.ndjson?user_id={user_id}'),
+        'GET /api/export/tasks.csv': lambda: client.get(f'/api/export/tasks.csv?user_id={user_id}'),
+        'POST /api/import': lambda: client.post(f'/api/import?user_id={user_id}', content_type='application/x-ndjson', data=(
+            '{"text": "Importada", "category": "Categoria 0", "reminder_datetime": "%s"}\n{"text": "Nova categoria", "category": "Importadas"}\n'
+            % (datetime.utcnow() + timedelta(minutes=1)).isoformat()
+        )),
+        'GET /api/categories': lambda: client.get(f'/api/categories?user_id={user_id}'),
+        'GET /api/settings/<user_id>': lambda: client.get(f'/api/settings/{user_id}'),
+        'GET /api/users': lambda: client.get('/api/users'),
+        'GET /api/users/<id>': lambda: client.get(f'/api/users/{user_id}'),
+    }
+
+def measure(app, user_id, task_id):
+    """Mede os SELECTs e captura as instruções de cada rota verificada"""
+    client = app.test_client()
+    
+    counts = {}
+    statements = {}
+    for name, send in route_requests(client, user_id, task_id).items():
+        with count_selects(app) as counter:
+            response = send()
+            # Respostas em streaming só consultam o banco ao serem consumidas
+            response.get_data()
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f'{name} retornou {response.status_code}: {response.get_data(as_text=True)}')
+        counts[name] = counter['selects']
+        statements[name] = counter['statements']
+    return counts, statements
+
+def full_scans(app, statements):
+    """Executa EXPLAIN QUERY PLAN e retorna os passos de varredura completa"""
+    scans = []
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            for statement, parameters in statements:
+                for row in cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                    detail = row[-1]
+                    # Consultas MATCH no FTS5 aparecem como SCAN da tabela virtual usando o índice (":M")
+                    if detail.startswith('SCAN ') and not detail.startswith('SCAN CONSTANT ROW') and ':M' not in detail:
+                        scans.append(f'{detail}: {" ".join(statement.split())}')
+        finally:
+            connection.close()
+    return scans
+
+def reminder_load_statements(app):
+    """Captura as instruções da recarga da agenda de lembretes"""
+    with count_selects(app) as counter:
+        with app.app_context():
+            reminder_scheduler.load()
+    return counter['statements']
+
+def compaction_statements(app):
+    """Captura as instruções da compactação do log de atividades"""
+    with count_selects(app) as counter:
+        with app.app_context():
+            retention_job.run_once(now=datetime.utcnow() + timedelta(days=retention_job.retention_days + 1))
+    return counter['statements']
+
+def check_repeat_detector(app, user_id):
+    """Verifica se o detector de N+1 interrompe o carregamento preguiçoso da categoria tarefa a tarefa"""
+    with app.test_request_context(f'/api/tasks?user_id={user_id}'):
+        try:
+            for task in Task.query.filter_by(user_id=user_id).all():
+                task.to_dict()  # Task.category sem selectinload: um SELECT por categoria
+        except RepeatedQueryError:
+            return True
+        finally:
+            db.session.remove()
+    return False
+
+def check_stat_counters(app, user_id):
+    """Verifica se os contadores materializados batem com a agregação direta"""
+    client = app.test_client()
+    task_ids = [task['id'] for task in client.get(f'/api/tasks?user_id={user_id}&fields=id').get_json()['tasks']]
+    
+    app.config['STATS_USE_COUNTERS'] = True
+    with app.app_context():
+        TaskStatCounter.rebuild()
+        db.session.commit()
+    
+    # Escritas com os contadores ativos
+    client.patch(f'/api/tasks/toggle/{task_ids[0]}')
+    client.put(f'/api/tasks/{task_ids[1]}', json={'priority': 'alta', 'category_id': None})
+    client.delete(f'/api/tasks/{task_ids[2]}')
+    client.post('/api/tasks', json={'text': 'Nova', 'priority': 'baixa', 'user_id': user_id})
+    client.post('/api/tasks/bulk', json={'user_id': user_id, 'operations': [
+        {'action': 'create', 'text': 'Lote', 'priority': 'alta'},
+        {'action': 'toggle', 'id': task_ids[3]},
+        {'action': 'delete', 'id': task_ids[4]}
+    ]})
+    client.post('/api/tasks/bulk', json={'user_id': user_id, 'action': 'delete', 'filter': {'completed': True}})
+    
+    from_counters = client.get(f'/api/stats?user_id={user_id}').get_json()['stats']
+    app.config['STATS_USE_COUNTERS'] = False
+    from_tasks = client.get(f'/api/stats?user_id={user_id}').get_json()['stats']
+    return from_counters == from_tasks
+
+def logged_changes(app, task_id):
+    """Detalhes do último registro 'updated' da tarefa no log de atividades"""
+    with app.app_context():
+        log = ActivityLog.query.filter_by(task_id=task_id, action='updated').order_by(ActivityLog.id.desc()).first()
+        return log.details if log else None
+
+def check_update_activity(app, user_id, counters):
+    """Verifica se as edições (PUT e lote) registram no log a lista de campos alterados
+
+    Retorna as divergências encontradas (lista vazia se tudo confere).
+    """
+    client = app.test_client()
+    task_ids = [task['id'] for task in client.get(f'/api/tasks?user_id={user_id}&fields=id').get_json()['tasks']]
+    
+    app.config['STATS_USE_COUNTERS'] = counters
+    if counters:
+        with app.app_context():
+            TaskStatCounter.rebuild()
+            db.session.commit()
+    
+    # Categoria nova: mover a tarefa para ela sempre altera category_id
+    category_id = client.post('/api/categories', json={'name': 'Destino', 'user_id': user_id}).get_json()['category']['id']
+    
+    # Cada caso: (alterações enviadas, detalhes esperados no log)
+    cases = [
+        ({'text': 'Editada', 'priority': 'alta'}, 'Alterações: text, priority'),
+        ({'text': 'Movida', 'priority': 'baixa', 'category_id': category_id}, 'Alterações: text, priority, category_id'),
+        ({'category_id': category_id}, 'Alterações: category_id'),
+    ]
+    
+    mismatches = []
+    try:
+        for (changes, expected), put_id, bulk_id in zip(cases, task_ids[0::2], task_ids[1::2]):
+            client.put(f'/api/tasks/{put_id}?user_id={user_id}', json=changes)
+            client.post('/api/tasks/bulk', json={'user_id': user_id, 'operations': [{'action': 'update', 'id': bulk_id, **changes}]})
+            for route, task_id in (('PUT', put_id), ('lote', bulk_id)):
+                details = logged_changes(app, task_id)
+                if details != expected:
+                    mismatches.append(f'{route} {changes}: {details!r} (esperado {expected!r})')
+    finally:
+        app.config['STATS_USE_COUNTERS'] = False
+    return mismatches
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_test_app(os.path.join(directory, 'check.db'))
+        
+        # Medir com poucas e com muitas categorias: o número de SELECTs deve ser o mesmo
+        small, _ = measure(app, *populate(app, categories_count=2, tasks_per_category=3))
+        large_user = populate(app, categories_count=20, tasks_per_category=3)
+        large, statements = measure(app, *large_user)
+        
+        print('Consultas por requisição (poucos dados / muitos dados)\n')
+        for name, limit in MAX_SELECTS.items():
+            status = 'OK'
+            if large[name] != small[name]:
+                status = 'FALHOU (cresce com os dados)'
+                failures.append(name)
+            elif large[name] > limit:
+                status = f'FALHOU (máximo {limit})'
+                failures.append(name)
+            print(f'{name:40} {small[name]:3} / {large[name]:3} SELECTs  {status}')
+        
+        print('\nPlanos de execução (EXPLAIN QUERY PLAN)\n')
+        statements['ReminderScheduler.load'] = reminder_load_statements(app)
+        statements['RetentionJob.run_once'] = compaction_statements(app)
+        for name, route_statements in statements.items():
+            scans = full_scans(app, route_statements)
+            if not scans:
+                print(f'{name:40} OK')
+            elif name in ALLOWED_SCANS:
+                print(f'{name:40} varredura permitida')
+            else:
+                print(f'{name:40} FALHOU')
+                for scan in scans:
+                    print(f'    {scan}')
+                failures.append(name)
+        
+        print()
+        limit = app.config['QUERY_REPEAT_LIMIT']
+        if check_repeat_detector(app, large_user[0]):
+            print(f'{"detector de N+1":40} carga preguiçosa por tarefa interrompida (limite {limit})  OK')
+        else:
+            print(f'{"detector de N+1":40} carga preguiçosa por tarefa não detectada  FALHOU')
+            failures.append('detector de N+1')
+        
+        user_id, _ = populate(app, categories_count=3, tasks_per_category=2)
+        if check_stat_counters(app, user_id):
+            print(f'{"task_stat_counters":40} consistente com a agregação  OK')
+        else:
+            print(f'{"task_stat_counters":40} divergente da agregação  FALHOU')
+            failures.append('task_stat_counters')
+        
+        # Edições com e sem os contadores: o upsert deles e a validação da categoria fazem autoflush
+        for counters, name in ((False, 'log de alterações'), (True, 'log de alterações (contadores ativos)')):
+            user_id, _ = populate(app, categories_count=3, tasks_per_category=2, username=f'log_{int(counters)}')
+            mismatches = check_update_activity(app, user_id, counters=counters)
+            if not mismatches:
+                print(f'{name:40} campos alterados registrados  OK')
+            else:
+                print(f'{name:40} FALHOU')
+                for mismatch in mismatches:
+                    print(f'    {mismatch}')
+                failures.append(name)
+    
+    if failures:
+        print(f'\n{len(failures)} verificação(ões) falharam')
+        return 1
+    print('\nTodas as rotas dentro dos limites de consultas')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
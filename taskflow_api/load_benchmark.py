@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga da API TaskFlow, executado no próprio processo
+
+Cria um banco SQLite temporário com --users usuários e --tasks tarefas por
+usuário (dados determinísticos a partir de --seed) e dispara --threads
+clientes simultâneos contra a aplicação. Cada cliente escolhe um usuário e
+uma operação conforme os pesos do cenário:
+- list: GET /api/tasks?limit=50
+- stats: GET /api/stats
+- toggle: PATCH /api/tasks/toggle/<id>
+- create: POST /api/tasks
+- clear_completed: POST /api/tasks/bulk (excluir as concluídas)
+
+As requisições passam pelo cliente de testes do Flask ou, com --server, por
+um servidor WSGI local (werkzeug) via HTTP, e se identificam com o token de
+sessão do usuário. Reporta por operação a vazão e a latência p50/p95/p99,
+além do pico de memória (RSS) do processo. Com --output os resultados são
+gravados em JSON; --compare mostra a variação em relação a um resultado
+anterior (ex.: o do commit anterior).
+
+Uso:
+    python load_benchmark.py [--scenario misto] [--users 10] [--tasks 1000] [--threads 8] [--seconds 10]
+    python load_benchmark.py --requests 500 --output resultado.json
+    python load_benchmark.py --server --compare resultado.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from benchmark import create_benchmark_app, peak_rss_mb, percentile
+from src.models.user import db, User
+from src.models.task import Category, Task, TaskStatCounter, UserSettings
+from src.services.auth import token_auth
+
+# Peso de cada operação por cenário
+SCENARIOS = {
+    'leitura': {'list': 60, 'stats': 30, 'toggle': 5, 'create': 5},
+    'misto': {'list': 40, 'stats': 20, 'toggle': 20, 'create': 15, 'clear_completed': 5},
+    'escrita': {'list': 10, 'toggle': 40, 'create': 40, 'clear_completed': 10},
+}
+
+# Categorias criadas por usuário
+CATEGORIES_PER_USER = 5
+
+# Tarefas de cada usuário conhecidas pelos clientes (alvo de toggle)
+KNOWN_TASKS_PER_USER = 200
+
+def populate(app, users_count, tasks_per_user, seed):
+    """Cria usuários, categorias e tarefas com SQL em lote; retorna {usuário: [ids de tarefas]}"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with app.app_context():
+        # O hash da senha é caro de propósito: um único para todos os usuários
+        password_hash = token_auth.hash_password('benchmark')
+        user_ids = [user_id for (user_id,) in db.session.execute(db.insert(User.__table__).returning(User.id), [
+            {'username': f'carga_{index}', 'email': f'carga_{index}@example.com', 'password_hash': password_hash, 'created_at': now, 'updated_at': now}
+            for index in range(users_count)
+        ])]
+        db.session.execute(db.insert(UserSettings.__table__), [
+            {'user_id': user_id, 'theme': 'light', 'notifications_enabled': True, 'default_priority': 'media', 'created_at': now, 'updated_at': now}
+            for user_id in user_ids
+        ])
+        categories = {user_id: [] for user_id in user_ids}
+        for user_id, category_id in db.session.execute(db.insert(Category.__table__).returning(Category.user_id, Category.id), [
+            {'name': f'Categoria {index}', 'color': '#667eea', 'user_id': user_id, 'version': 0, 'created_at': now, 'updated_at': now}
+            for user_id in user_ids
+            for index in range(CATEGORIES_PER_USER)
+        ]):
+            categories[user_id].append(category_id)
+
+        for user_id in user_ids:
+            rows = []
+            for index in range(tasks_per_user):
+                completed = rng.random() < 0.25
+                rows.append({
+                    'text': f'Tarefa {index} do usuário {user_id}',
+                    'priority': rng.choice(('baixa', 'media', 'alta')),
+                    'category_id': rng.choice(categories[user_id] + [None]),
+                    'reminder_datetime': None,
+                    'completed': completed,
+                    'notified': False,
+                    'user_id': user_id,
+                    'version': 0,
+                    'created_at': now - timedelta(seconds=tasks_per_user - index),
+                    'updated_at': now,
+                    'completed_at': now if completed else None,
+                })
+            db.session.execute(db.insert(Task.__table__), rows)
+        if app.config['STATS_USE_COUNTERS']:
+            TaskStatCounter.rebuild()
+        db.session.commit()
+
+        known = {user_id: [] for user_id in user_ids}
+        for user_id, task_id in db.session.query(Task.user_id, Task.id).filter(Task.user_id.in_(user_ids)).order_by(Task.id):
+            if len(known[user_id]) < KNOWN_TASKS_PER_USER:
+                known[user_id].append(task_id)
+        tokens = {user_id: token_auth.issue(user_id) for user_id in user_ids}
+    return known, tokens
+
+class TestClientDriver:
+    """Requisições pelo cliente de testes do Flask (sem rede)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, token, body=None):
+        response = self.client.open(path, method=method, json=body, headers={'Authorization': f'Bearer {token}'})
+        return response.status_code, response.get_json(silent=True)
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Sem uma linha de log por requisição durante a medição"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+class HTTPDriver:
+    """Requisições HTTP a um servidor WSGI local (uma conexão por cliente)"""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def send(self, method, path, token, body=None):
+        headers = {'Authorization': f'Bearer {token}'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        try:
+            return response.status, json.loads(data)
+        except ValueError:
+            return response.status, None
+
+class Workload:
+    """Estado compartilhado entre os clientes: tarefas conhecidas por usuário e resultados por operação"""
+
+    def __init__(self, known, tokens, weights):
+        self.known = known
+        self.tokens = tokens
+        self.user_ids = sorted(known)
+        self.operations = list(weights)
+        self.weights = [weights[operation] for operation in self.operations]
+        self.results = {operation: {'latencies': [], 'errors': 0, 'statuses': {}} for operation in self.operations}
+        self.lock = threading.Lock()
+
+    def run_operation(self, driver, operation, user_id, rng):
+        """Executa uma operação; retorna (status, corpo)"""
+        token = self.tokens[user_id]
+        if operation == 'list':
+            return driver.send('GET', '/api/tasks?limit=50', token)
+        if operation == 'stats':
+            return driver.send('GET', '/api/stats', token)
+        if operation == 'create':
+            status, body = driver.send('POST', '/api/tasks', token, {
+                'text': f'Carga {rng.random():.6f}', 'priority': rng.choice(('baixa', 'media', 'alta'))
+            })
+            if status == 201:
+                with self.lock:
+                    self.known[user_id].append(body['task']['id'])
+            return status, body
+        if operation == 'toggle':
+            with self.lock:
+                task_ids = self.known[user_id]
+                task_id = rng.choice(task_ids) if task_ids else None
+            if task_id is None:
+                return driver.send('POST', '/api/tasks', token, {'text': 'Carga'})
+            status, body = driver.send('PATCH', f'/api/tasks/toggle/{task_id}', token)
+            if status == 404:
+                # Excluída por um clear_completed de outro cliente
+                with self.lock:
+                    if task_id in self.known[user_id]:
+                        self.known[user_id].remove(task_id)
+            return status, body
+        return driver.send('POST', '/api/tasks/bulk', token, {'action': 'delete', 'filter': {'completed': True}})
+
+    def worker(self, driver, seed, deadline, requests_count):
+        rng = random.Random(seed)
+        results = {operation: {'latencies': [], 'errors': 0, 'statuses': {}} for operation in self.operations}
+        done = 0
+        while (requests_count is None and time.perf_counter() < deadline) or (requests_count is not None and done < requests_count):
+            operation = rng.choices(self.operations, self.weights)[0]
+            user_id = rng.choice(self.user_ids)
+            started = time.perf_counter()
+            status, _ = self.run_operation(driver, operation, user_id, rng)
+            elapsed = time.perf_counter() - started
+            result = results[operation]
+            result['statuses'][status] = result['statuses'].get(status, 0) + 1
+            # 404 no toggle é esperado (tarefa concluída e excluída por outro cliente)
+            if status >= 500 or (status >= 400 and not (operation == 'toggle' and status == 404)):
+                result['errors'] += 1
+            else:
+                result['latencies'].append(elapsed)
+            done += 1
+        with self.lock:
+            for operation, result in results.items():
+                total = self.results[operation]
+                total['latencies'].extend(result['latencies'])
+                total['errors'] += result['errors']
+                for status, count in result['statuses'].items():
+                    total['statuses'][status] = total['statuses'].get(status, 0) + count
+
+def summarize(results, elapsed):
+    """Vazão e percentis de latência por operação e no total"""
+    summary = {}
+    all_latencies = []
+    for operation, result in results.items():
+        latencies = result['latencies']
+        all_latencies.extend(latencies)
+        summary[operation] = {
+            'requests': len(latencies) + result['errors'],
+            'throughput': round(len(latencies) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'errors': result['errors'],
+            'statuses': {str(status): count for status, count in sorted(result['statuses'].items())},
+        }
+    summary['total'] = {
+        'requests': sum(entry['requests'] for entry in summary.values()),
+        'throughput': round(len(all_latencies) / elapsed, 1),
+        'p50_ms': round(percentile(all_latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(all_latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(all_latencies, 0.99) * 1000, 2),
+        'errors': sum(result['errors'] for result in results.values()),
+    }
+    return summary
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    overrides = {'HTTP_CACHE_ENABLED': args.cache}
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_benchmark_app(directory, overrides)
+        started = time.perf_counter()
+        known, tokens = populate(app, args.users, args.tasks, args.seed)
+        populate_seconds = time.perf_counter() - started
+        rss_after_populate = peak_rss_mb()
+
+        server = None
+        if args.server:
+            server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+            threading.Thread(target=server.serve_forever, name='load-benchmark-server', daemon=True).start()
+            drivers = [HTTPDriver(server.server_port) for _ in range(args.threads)]
+        else:
+            drivers = [TestClientDriver(app) for _ in range(args.threads)]
+
+        workload = Workload(known, tokens, SCENARIOS[args.scenario])
+        deadline = time.perf_counter() + args.seconds
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=workload.worker, args=(driver, args.seed + index, deadline, args.requests))
+            for index, driver in enumerate(drivers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if server is not None:
+            server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+
+    return {
+        'revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'parameters': {
+            'scenario': args.scenario, 'users': args.users, 'tasks': args.tasks, 'threads': args.threads,
+            'seconds': args.seconds, 'requests': args.requests, 'seed': args.seed,
+            'driver': 'http' if args.server else 'test_client', 'cache': args.cache,
+        },
+        'populate_seconds': round(populate_seconds, 2),
+        'elapsed_seconds': round(elapsed, 2),
+        'rss_after_populate_mb': round(rss_after_populate, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'operations': summarize(workload.results, elapsed),
+    }
+
+def print_report(report, previous=None):
+    parameters = report['parameters']
+    print(
+        f"cenário {parameters['scenario']}: {parameters['users']} usuários x {parameters['tasks']} tarefas, "
+        f"{parameters['threads']} clientes ({parameters['driver']}), {report['elapsed_seconds']} s"
+    )
+    print(f"{'operação':<16} {'req':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+    for operation, entry in report['operations'].items():
+        line = (
+            f"{operation:<16} {entry['requests']:>7} {entry['throughput']:>9.1f} {entry['p50_ms']:>8.2f} "
+            f"{entry['p95_ms']:>8.2f} {entry['p99_ms']:>8.2f} {entry['errors']:>6}"
+        )
+        before = previous and previous['operations'].get(operation)
+        if before and before['throughput']:
+            change = (entry['throughput'] - before['throughput']) / before['throughput'] * 100
+            line += f"   req/s {change:+.1f}%  p95 {before['p95_ms']:.2f} → {entry['p95_ms']:.2f}"
+        print(line)
+    print(f"\npico de RSS {report['peak_rss_mb']:.1f} MB (após popular o banco: {report['rss_after_populate_mb']:.1f} MB)")
+    if previous:
+        print(f"comparado com {previous.get('revision') or 'resultado anterior'} ({previous.get('timestamp')})")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga da API TaskFlow no próprio processo')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='misto', help='pesos das operações')
+    parser.add_argument('--users', type=int, default=10, help='usuários criados')
+    parser.add_argument('--tasks', type=int, default=1000, help='tarefas por usuário')
+    parser.add_argument('--threads', type=int, default=8, help='clientes simultâneos')
+    parser.add_argument('--seconds', type=float, default=10, help='duração da medição')
+    parser.add_argument('--requests', type=int, help='requisições por cliente (substitui --seconds; sequência reproduzível)')
+    parser.add_argument('--seed', type=int, default=42, help='semente dos dados e da escolha das operações')
+    parser.add_argument('--server', action='store_true', help='usar um servidor WSGI local via HTTP em vez do cliente de testes')
+    parser.add_argument('--cache', action='store_true', help='manter o cache HTTP de respostas ativo')
+    parser.add_argument('--output', help='gravar os resultados em JSON neste arquivo')
+    parser.add_argument('--compare', help='resultado JSON anterior para comparação')
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as source:
+            previous = json.load(source)
+
+    report = run(args)
+    print_report(report, previous)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f'resultados gravados em {args.output}')
+
+    return 1 if report['operations']['total']['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
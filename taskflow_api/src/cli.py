@@ -0,0 +1,78 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from src.models.user import db
+from src.models.task import TaskStatCounter
+from src.migrations import current_version, migrate
+from src.services.auth import token_auth
+from src.services.retention import retention_job
+from src.services.seed import DatasetSeeder
+
+taskflow_cli = AppGroup('taskflow', help='Comandos de manutenção do TaskFlow')
+
+@taskflow_cli.command('compact-activity')
+@click.option('--days', type=int, default=None, help='Retenção em dias (padrão: ACTIVITY_LOG_RETENTION_DAYS)')
+@click.option('--tombstone-days', type=int, default=None, help='Retenção dos tombstones em dias (padrão: TOMBSTONE_RETENTION_DAYS)')
+def compact_activity(days, tombstone_days):
+    """Remove do log de atividades os registros e os tombstones além da retenção"""
+    removed = retention_job.run_once(retention_days=days)
+    click.echo(f'{removed} registro(s) removido(s) do log de atividades')
+    removed = retention_job.prune_tombstones(retention_days=tombstone_days)
+    click.echo(f'{removed} tombstone(s) removido(s)')
+
+@taskflow_cli.command('migrate')
+def migrate_schema():
+    """Aplica as migrações pendentes do esquema (inclui os dados iniciais)
+
+    Com STATS_USE_COUNTERS, recalcula também os contadores de estatísticas
+    (necessário ao ativar a opção num banco existente).
+    """
+    applied = migrate(db.engine)
+    with db.engine.connect() as connection:
+        version = current_version(connection)
+    if applied:
+        click.echo(f"Migrações aplicadas: {', '.join(map(str, applied))}; esquema na versão {version}")
+    else:
+        click.echo(f'Esquema já na versão {version}')
+    if current_app.config['STATS_USE_COUNTERS']:
+        TaskStatCounter.rebuild()
+        db.session.commit()
+        click.echo('Contadores de estatísticas recalculados')
+
+@taskflow_cli.command('seed')
+@click.option('--users', type=int, default=1, help='Usuários criados')
+@click.option('--tasks', type=int, default=100000, help='Tarefas por usuário')
+@click.option('--categories', type=int, default=8, help='Categorias por usuário')
+@click.option('--completed-ratio', type=click.FloatRange(0, 1), default=0.6, help='Proporção de tarefas concluídas')
+@click.option('--reminder-ratio', type=click.FloatRange(0, 1), default=0.3, help='Proporção de tarefas com lembrete')
+@click.option('--days', type=click.IntRange(1), default=365, help='Período (em dias até a data de referência) das datas de criação')
+@click.option('--activity/--no-activity', default=True, help='Gerar o log de atividades das tarefas')
+@click.option('--seed', type=int, default=42, help='Semente do gerador (mesma semente, mesmos dados)')
+@click.option('--reference-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Data de referência (padrão: hoje, 00:00 UTC)')
+@click.option('--prefix', default='seed', help='Prefixo dos nomes de usuário (<prefixo>_<n>)')
+@click.option('--password', default='taskflow', help='Senha de todos os usuários gerados')
+@click.option('--batch-size', type=click.IntRange(1), default=10000, help='Linhas por executemany')
+@click.option('--keep-indexes', is_flag=True, help='Não remover os índices durante a carga (cargas pequenas em bancos grandes)')
+def seed(users, tasks, categories, completed_ratio, reminder_ratio, days, activity, seed, reference_date,
+         prefix, password, batch_size, keep_indexes):
+    """Gera usuários, categorias, tarefas e log de atividades sintéticos para testes de escala"""
+    started = time.perf_counter()
+    seeder = DatasetSeeder(seed=seed, reference=reference_date, batch_size=batch_size)
+    try:
+        counts = seeder.run(
+            users, tasks, categories_per_user=categories, completed_ratio=completed_ratio,
+            reminder_ratio=reminder_ratio, days=days, activity=activity, prefix=prefix,
+            password_hash=token_auth.hash_password(password), rebuild_indexes=not keep_indexes
+        )
+    except ValueError as e:
+        raise click.ClickException(f'{e}; use outro --prefix')
+    if current_app.config['STATS_USE_COUNTERS']:
+        TaskStatCounter.rebuild()
+        db.session.commit()
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    click.echo(
+        f"{counts['users']} usuário(s), {counts['categories']} categoria(s), {counts['tasks']} tarefa(s) e "
+        f"{counts['activity_logs']} registro(s) de atividade em {elapsed:.1f} s ({rows / elapsed:,.0f} linhas/s)"
+    )
@@ -0,0 +1,87 @@
+import os
+
+DATABASE_PATH = os.path.join(os.path.dirname(__file__), 'database', 'taskflow.db')
+
+class Config:
+    """Configuração base da aplicação TaskFlow"""
+    DEBUG = False
+    TESTING = False
+    SECRET_KEY = os.environ.get('TASKFLOW_SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TASKFLOW_DATABASE_URL', f"sqlite:///{DATABASE_PATH}")
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JSON_SORT_KEYS = False  # Manter ordem das chaves em JSON
+    JSON_USE_ORJSON = True  # Codificar JSON com orjson quando instalado
+    STATS_USE_COUNTERS = False  # Ler /api/stats da tabela task_stat_counters
+    REMINDER_LEAD_MINUTES = 5  # Antecedência dos lembretes
+    REMINDER_RELOAD_SECONDS = 60  # Intervalo de recarga da agenda de lembretes
+    REMINDER_GRACE_MINUTES = 10  # Atraso máximo de um lembrete ainda notificado (os vencidos há mais tempo não disparam)
+    EVENTS_BUFFER_SIZE = 500  # Eventos retidos por usuário para retomada via Last-Event-ID
+    EVENTS_HEARTBEAT_SECONDS = 15  # Intervalo dos comentários keepalive do SSE
+    EVENTS_STREAM_SECONDS = 300  # Duração máxima de cada conexão SSE
+    HTTP_CACHE_ENABLED = True  # ETag/304 nas rotas de leitura
+    HTTP_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Limite do cache LRU de respostas, por processo (0 desativa)
+    WORKER_PROCESSES = int(os.environ.get('WEB_CONCURRENCY', 1))  # Processos servindo a aplicação (a mesma variável define os workers do gunicorn); com mais de um, o cache de corpos é desativado
+    ACTIVITY_LOG_MODE = os.environ.get('TASKFLOW_ACTIVITY_LOG_MODE', 'sync')  # 'sync' (na transação) ou 'batched' (thread de fundo)
+    ACTIVITY_LOG_QUEUE_SIZE = 10000  # Máximo de linhas aguardando gravação no modo 'batched'
+    ACTIVITY_LOG_BATCH_SIZE = 500  # Linhas por executemany no modo 'batched'
+    ACTIVITY_LOG_FLUSH_SECONDS = 1.0  # Espera máxima de um registro na fila antes de ser gravado
+    ACTIVITY_LOG_ENQUEUE_TIMEOUT = 1.0  # Espera por espaço na fila cheia antes de gravar na própria requisição
+    ACTIVITY_LOG_RETENTION_DAYS = 90  # Idade máxima dos registros do log (0 desativa a compactação)
+    ACTIVITY_LOG_COMPACTION_SECONDS = 3600  # Intervalo da compactação em segundo plano (0 desativa a thread)
+    ACTIVITY_LOG_COMPACTION_CHUNK = 5000  # Registros removidos por transação
+    ACTIVITY_LOG_ROLLUP = True  # Somar os registros removidos em activity_daily_counts
+    TOMBSTONE_RETENTION_DAYS = 30  # Idade máxima dos tombstones; cursores de sincronização mais antigos recebem o estado completo (0 desativa)
+    EXPORT_BATCH_SIZE = 500  # Linhas lidas do banco por lote nas exportações em streaming
+    IMPORT_BATCH_SIZE = 1000  # Tarefas gravadas por transação na importação
+    IMPORT_MAX_ERRORS = 100  # Erros por linha detalhados na resposta da importação
+    AUTH_TOKEN_MAX_AGE = 7 * 24 * 3600  # Validade dos tokens de sessão, em segundos
+    AUTH_TOKEN_CACHE_SIZE = 10000  # Tokens já verificados mantidos em memória (0 desativa o cache)
+    AUTH_REQUIRED = os.environ.get('TASKFLOW_AUTH_REQUIRED', '').lower() in ('1', 'true')  # Exigir token nas rotas /api (sem ele vale o parâmetro user_id)
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:600000'  # Método do werkzeug na forma completa, como gravada no início do hash
+    PASSWORD_REHASH_ON_LOGIN = True  # Regravar no login os hashes gerados com outro método ou custo
+    SLOW_QUERY_MS = 200  # Instruções SQL mais lentas que isso (ms) vão para o log com parâmetros e rota (0 desativa)
+    QUERY_REPEAT_LIMIT = 0  # Execuções da mesma instrução por requisição antes do alerta de N+1 (0 desativa)
+    QUERY_REPEAT_RAISE = False  # Falhar a requisição com RepeatedQueryError em vez de registrar o N+1 no log
+    AUTO_MIGRATE = os.environ.get('TASKFLOW_AUTO_MIGRATE', '1').lower() in ('1', 'true')  # Aplicar migrações pendentes em create_app (desativado: flask taskflow migrate no deploy)
+    METRICS_ENABLED = os.environ.get('TASKFLOW_METRICS', '').lower() in ('1', 'true')  # Latência e consultas SQL por endpoint, Server-Timing e GET /api/metrics
+
+    # PRAGMAs aplicados a cada nova conexão SQLite (dicionário vazio mantém os padrões do SQLite)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',  # Leitores não bloqueiam durante o commit de um escritor
+        'synchronous': 'NORMAL',  # Seguro com WAL; fsync apenas nos checkpoints
+        'busy_timeout': 5000,  # Milissegundos aguardando o lock de escrita antes de "database is locked"
+        'mmap_size': 256 * 1024 * 1024,  # Leitura do arquivo via memória mapeada
+        'cache_size': -64000,  # Cache de páginas por conexão (negativo = KiB)
+        'foreign_keys': 'ON',  # Necessário para o ON DELETE CASCADE
+        'temp_store': 'MEMORY',
+    }
+
+    # Pool de conexões do SQLAlchemy
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('TASKFLOW_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('TASKFLOW_POOL_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_pre_ping': False,  # Conexões SQLite locais não caem
+    }
+
+class DevelopmentConfig(Config):
+    """Servidor de desenvolvimento do Werkzeug com recarga automática"""
+    DEBUG = True
+    QUERY_REPEAT_LIMIT = 10
+
+class ProductionConfig(Config):
+    """Servidor WSGI (gunicorn/waitress)"""
+
+class TestingConfig(Config):
+    """Banco temporário e respostas sempre vindas do banco"""
+    TESTING = True
+    HTTP_CACHE_ENABLED = False
+    ACTIVITY_LOG_MODE = 'sync'
+    QUERY_REPEAT_LIMIT = 10
+    QUERY_REPEAT_RAISE = True  # N+1 numa rota falha a verificação (check_queries.py)
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
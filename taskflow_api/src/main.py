@@ -5,86 +5,118 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
-from src.models.user import db, User
-from src.models.task import Category, Task, UserSettings, ActivityLog
+from sqlalchemy.orm import configure_mappers
+from src.models.user import db
+from src.models.task import TaskStatCounter
+from src.models.search import TaskSearch
+from src.cli import taskflow_cli
+from src.config import CONFIGS
+from src.migrations import current_version, latest_version, migrate
 from src.routes.user import user_bp
 from src.routes.task import task_bp
 from src.routes.frontend import frontend_bp
+from src.routes.events import events_bp
+from src.routes.export import export_bp
+from src.routes.metrics import metrics_bp
+from src.services.audit import audit_writer
+from src.services.auth import token_auth
+from src.services.events import event_broker
+from src.services.http_cache import response_cache
+from src.services.metrics import request_metrics
+from src.services.query_guard import query_guard
+from src.services.reminders import reminder_scheduler
+from src.services.retention import retention_job
+from src.services.serialization import FastJSONProvider
+from src.services.sqlite import configure_sqlite
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-CORS(app)  # Habilitar CORS para todas as rotas
+def create_app(config=None, **overrides):
+    """Cria e inicializa a aplicação
 
-# Configuração
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'taskflow.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JSON_SORT_KEYS'] = False  # Manter ordem das chaves em JSON
-
-# Registrar blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(task_bp, url_prefix='/api')
-app.register_blueprint(frontend_bp)
-
-# Inicializar banco de dados
-db.init_app(app)
-
-# Criar tabelas e dados iniciais
-with app.app_context():
-    db.create_all()
+    config pode ser o nome de uma configuração ('development', 'production',
+    'testing') ou uma classe de configuração; sem ele, usa TASKFLOW_CONFIG.
+    Argumentos nomeados sobrescrevem chaves individuais da configuração.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    CORS(app)  # Habilitar CORS para todas as rotas
     
-    # Criar usuário padrão se não existir
-    if not User.query.filter_by(id=1).first():
-        default_user = User(
-            id=1,
-            username='default',
-            email='default@taskflow.com',
-            password_hash='pbkdf2:sha256:150000$ImTyXAJY$b06a1fd31e5c336a177e4404b4cb1a2001f7c8ef7be8eea3498f53d078f3fd4a'  # senha: default
-        )
-        db.session.add(default_user)
-        db.session.commit()
+    # Configuração
+    if config is None or isinstance(config, str):
+        config = CONFIGS[config or os.environ.get('TASKFLOW_CONFIG', 'development')]
+    app.config.from_object(config)
+    app.config.update(overrides)
+    app.json = FastJSONProvider(app)
     
-    # Criar configurações padrão se não existirem
-    if not UserSettings.query.filter_by(user_id=1).first():
-        default_settings = UserSettings(user_id=1)
-        db.session.add(default_settings)
-        db.session.commit()
+    # Registrar blueprints
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(task_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(export_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(frontend_bp)
     
-    # Criar categorias padrão se não existirem
-    default_categories = [
-        {'name': 'Trabalho', 'color': '#667eea'},
-        {'name': 'Pessoal', 'color': '#4caf50'},
-        {'name': 'Estudos', 'color': '#ff9800'},
-        {'name': 'Saúde', 'color': '#e74c3c'},
-        {'name': 'Compras', 'color': '#9c27b0'}
-    ]
+    # Inicializar banco de dados
+    db.init_app(app)
+    request_metrics.init_app(app)
+    query_guard.init_app(app)
+    configure_sqlite(app)
+    event_broker.init_app(app)
+    response_cache.init_app(app)
+    audit_writer.init_app(app)
+    token_auth.init_app(app)
+    retention_job.init_app(app)
+    app.cli.add_command(taskflow_cli)
     
-    for cat_data in default_categories:
-        if not Category.query.filter_by(name=cat_data['name'], user_id=1).first():
-            category = Category(
-                name=cat_data['name'],
-                color=cat_data['color'],
-                user_id=1
+    # Esquema e dados iniciais: migrações versionadas (src/migrations). Com o
+    # esquema em dia a inicialização só consulta schema_version e a presença
+    # do índice de busca; a agenda de lembretes é carregada no primeiro uso
+    reminder_scheduler.init_app(app)
+    with app.app_context():
+        if app.config['AUTO_MIGRATE']:
+            applied = migrate(db.engine)
+            if applied:
+                app.logger.info('Migrações aplicadas: %s', ', '.join(map(str, applied)))
+                # Contadores materializados em dia com as tarefas de um banco recém-migrado
+                if app.config['STATS_USE_COUNTERS']:
+                    TaskStatCounter.rebuild()
+                    db.session.commit()
+        with db.engine.connect() as connection:
+            TaskSearch.detect(connection)
+            version = latest_version() if app.config['AUTO_MIGRATE'] else current_version(connection)
+        if version < latest_version():
+            app.logger.warning(
+                'Esquema do banco na versão %s, a aplicação espera a %s: execute "flask taskflow migrate"',
+                version, latest_version()
             )
-            db.session.add(category)
     
-    db.session.commit()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+    # Configurar os mapeamentos do ORM aqui, e não na primeira consulta: com
+    # gunicorn --preload o custo fica no processo mestre e não em cada worker
+    configure_mappers()
+    
+    # Conexões abertas na inicialização não devem ser herdadas pelos
+    # workers criados via fork (gunicorn --preload)
+    with app.app_context():
+        db.engine.dispose()
+    
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+    
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+    
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Servidor de desenvolvimento; em produção use wsgi.py com gunicorn ou waitress
+    app = create_app()
+    app.run(host='0.0.0.0', port=5001, debug=app.config['DEBUG'])
@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from src.migrations import v001_esquema_inicial, v002_busca_textual, v003_dados_iniciais, v004_limpeza_tombstones
+
+# Migrações em ordem: a versão de cada uma é a sua posição (1, 2, 3...).
+# Novas migrações entram sempre no final; as já publicadas não mudam.
+MIGRATIONS = [
+    v001_esquema_inicial,
+    v002_busca_textual,
+    v003_dados_iniciais,
+    v004_limpeza_tombstones,
+]
+
+SCHEMA_VERSION_TABLE = """CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL,
+    description VARCHAR(200) NOT NULL,
+    applied_at DATETIME NOT NULL,
+    PRIMARY KEY (version)
+)"""
+
+def latest_version():
+    return len(MIGRATIONS)
+
+def current_version(connection):
+    """Versão do esquema gravada no banco (0 se nunca migrado)"""
+    try:
+        return connection.exec_driver_sql('SELECT max(version) FROM schema_version').scalar() or 0
+    except OperationalError:
+        # Tabela schema_version ainda não existe
+        return 0
+
+def migrate(engine):
+    """Aplica as migrações pendentes numa única transação; retorna as versões aplicadas
+
+    Com o esquema em dia custa uma consulta. Caso contrário a transação começa
+    com BEGIN IMMEDIATE (lock de escrita do SQLite) e a versão é relida:
+    processos que iniciam juntos esperam o primeiro terminar (busy_timeout) e
+    não reaplicam nada. DDL no SQLite é transacional, então uma migração que
+    falha desfaz também as anteriores do mesmo lote.
+    """
+    with engine.connect() as connection:
+        if current_version(connection) >= latest_version():
+            return []
+        connection.rollback()
+
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+        try:
+            connection.exec_driver_sql(SCHEMA_VERSION_TABLE)
+            version = current_version(connection)
+            applied = []
+            for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+                migration.upgrade(connection)
+                connection.exec_driver_sql(
+                    'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                    (number, migration.__doc__.strip().splitlines()[0], datetime.utcnow().isoformat(' '))
+                )
+                applied.append(number)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    return applied
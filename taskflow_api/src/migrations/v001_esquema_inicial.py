@@ -0,0 +1,137 @@
+"""Esquema inicial: tabelas e índices dos modelos no início do versionamento"""
+
+TABLES = [
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        username VARCHAR(50) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (username),
+        UNIQUE (email)
+    )""",
+    """CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER NOT NULL,
+        name VARCHAR(50) NOT NULL,
+        color VARCHAR(7),
+        user_id INTEGER,
+        version INTEGER DEFAULT '0' NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        CONSTRAINT unique_category_per_user UNIQUE (name, user_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        priority VARCHAR(10),
+        category_id INTEGER,
+        reminder_datetime DATETIME,
+        completed BOOLEAN,
+        notified BOOLEAN,
+        user_id INTEGER,
+        version INTEGER DEFAULT '0' NOT NULL,
+        created_at DATETIME,
+        updated_at DATETIME,
+        completed_at DATETIME,
+        PRIMARY KEY (id),
+        CONSTRAINT check_priority CHECK (priority IN ('baixa', 'media', 'alta')),
+        FOREIGN KEY(category_id) REFERENCES categories (id) ON DELETE CASCADE,
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_settings (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        theme VARCHAR(10),
+        notifications_enabled BOOLEAN,
+        default_priority VARCHAR(10),
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        CONSTRAINT check_theme CHECK (theme IN ('light', 'dark')),
+        CONSTRAINT check_default_priority CHECK (default_priority IN ('baixa', 'media', 'alta')),
+        UNIQUE (user_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS task_stat_counters (
+        user_id INTEGER NOT NULL,
+        priority VARCHAR(10) NOT NULL,
+        completed BOOLEAN NOT NULL,
+        category_key INTEGER NOT NULL,
+        task_count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, priority, completed, category_key),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS activity_logs (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        task_id INTEGER,
+        action VARCHAR(50) NOT NULL,
+        details TEXT,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY(task_id) REFERENCES tasks (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS activity_daily_counts (
+        user_id INTEGER NOT NULL,
+        day DATE NOT NULL,
+        action VARCHAR(50) NOT NULL,
+        activity_count INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day, action),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS sync_versions (
+        user_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (user_id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS tombstones (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        entity VARCHAR(20) NOT NULL,
+        entity_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        deleted_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+    )""",
+]
+
+# Colunas adicionadas antes do versionamento, ausentes em bancos criados por versões antigas
+LEGACY_COLUMNS = [
+    ('categories', 'version', "INTEGER NOT NULL DEFAULT '0'"),
+    ('tasks', 'version', "INTEGER NOT NULL DEFAULT '0'"),
+]
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_categories_user_name ON categories (user_id, name)',
+    'CREATE INDEX IF NOT EXISTS ix_categories_user_version ON categories (user_id, version)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_category_completed ON tasks (category_id, completed)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_pending_reminders ON tasks (reminder_datetime) WHERE notified = 0 AND completed = 0',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_user_completed_created ON tasks (user_id, completed, created_at)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_user_created ON tasks (user_id, created_at)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_user_priority_completed ON tasks (user_id, priority, completed)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_user_reminder ON tasks (user_id, reminder_datetime)',
+    'CREATE INDEX IF NOT EXISTS ix_tasks_user_version ON tasks (user_id, version)',
+    'CREATE INDEX IF NOT EXISTS ix_activity_logs_created ON activity_logs (created_at)',
+    'CREATE INDEX IF NOT EXISTS ix_activity_logs_task ON activity_logs (task_id)',
+    'CREATE INDEX IF NOT EXISTS ix_activity_logs_user_created ON activity_logs (user_id, created_at)',
+    'CREATE INDEX IF NOT EXISTS ix_tombstones_user_version ON tombstones (user_id, version)',
+]
+
+def upgrade(connection):
+    # IF NOT EXISTS: bancos criados antes do versionamento já têm parte das tabelas
+    for statement in TABLES:
+        connection.exec_driver_sql(statement)
+    for table, column, definition in LEGACY_COLUMNS:
+        existing = {row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info({table})')}
+        if column not in existing:
+            connection.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    for statement in INDEXES:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,18 @@
+"""Índice de busca textual (FTS5) sobre tasks.text e triggers de sincronização"""
+
+from sqlalchemy.exc import OperationalError
+from src.models.search import FTS_SCHEMA
+
+def upgrade(connection):
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).first() is not None
+    try:
+        for statement in FTS_SCHEMA:
+            connection.exec_driver_sql(statement)
+    except OperationalError:
+        # SQLite compilado sem FTS5: a busca usa LIKE (TaskSearch.detect)
+        return
+    if not exists:
+        # Indexar as tarefas já existentes
+        connection.exec_driver_sql("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
@@ -0,0 +1,34 @@
+"""Usuário padrão, suas configurações e categorias padrão"""
+
+from datetime import datetime
+from src.models.user import db, User
+from src.models.task import Category, UserSettings
+
+DEFAULT_CATEGORIES = [
+    ('Trabalho', '#667eea'),
+    ('Pessoal', '#4caf50'),
+    ('Estudos', '#ff9800'),
+    ('Saúde', '#e74c3c'),
+    ('Compras', '#9c27b0'),
+]
+
+def upgrade(connection):
+    # OR IGNORE: registros já existentes (bancos anteriores ao versionamento) são mantidos
+    now = datetime.utcnow()
+    connection.execute(db.insert(User.__table__).prefix_with('OR IGNORE'), {
+        'id': 1,
+        'username': 'default',
+        'email': 'default@taskflow.com',
+        'password_hash': 'pbkdf2:sha256:150000$ImTyXAJY$b06a1fd31e5c336a177e4404b4cb1a2001f7c8ef7be8eea3498f53d078f3fd4a',  # senha: default
+        'created_at': now,
+        'updated_at': now,
+    })
+    connection.execute(db.insert(UserSettings.__table__).prefix_with('OR IGNORE'), {
+        'user_id': 1, 'theme': 'light', 'notifications_enabled': True, 'default_priority': 'media',
+        'created_at': now, 'updated_at': now,
+    })
+    # Únicas por (name, user_id): uma instrução para todas as categorias
+    connection.execute(db.insert(Category.__table__).prefix_with('OR IGNORE'), [
+        {'name': name, 'color': color, 'user_id': 1, 'version': 0, 'created_at': now, 'updated_at': now}
+        for name, color in DEFAULT_CATEGORIES
+    ])
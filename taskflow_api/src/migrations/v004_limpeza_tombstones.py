@@ -0,0 +1,6 @@
+"""Versão mínima de sincronização por usuário e índice para a limpeza de tombstones"""
+
+def upgrade(connection):
+    # Maior versão de tombstone já removida: cursores anteriores exigem sincronização completa
+    connection.exec_driver_sql("ALTER TABLE sync_versions ADD COLUMN pruned_version INTEGER NOT NULL DEFAULT '0'")
+    connection.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_tombstones_deleted_at ON tombstones (deleted_at)')
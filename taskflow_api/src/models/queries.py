@@ -0,0 +1,94 @@
+from src.models.user import db
+from src.models.task import Category, Task
+
+# Caminho de leitura das rotas GET: select() com colunas explícitas executado
+# direto na conexão da sessão. As linhas chegam como tuplas (Row), sem objetos
+# do ORM no identity map e sem autoflush; os dicts de resposta são montados a
+# partir delas e as datas são codificadas pelo provedor JSON.
+
+CATEGORY_COLUMNS = tuple(getattr(Category, field) for field in Category.SERIALIZABLE_FIELDS)
+
+def read_rows(statement, **execution_options):
+    """Executa um select() somente leitura na conexão da sessão
+
+    Não dispara o autoflush nem passa pelo identity map. Opções de execução
+    (yield_per, por exemplo) são repassadas à conexão.
+    """
+    return db.session.connection().execute(statement, execution_options=execution_options or None)
+
+def select_fields(model, fields=None):
+    """select() das colunas dos campos serializáveis do modelo, na ordem de fields"""
+    return db.select(*(getattr(model, field) for field in (fields or model.SERIALIZABLE_FIELDS)))
+
+def read_dicts(statement, fields):
+    """Executa o select() e retorna a lista de dicts {campo: valor} (fields na ordem das colunas)"""
+    return [dict(zip(fields, row)) for row in read_rows(statement)]
+
+def read_one(statement, fields):
+    """Como read_dicts, para uma única linha; retorna None se não houver"""
+    row = read_rows(statement).first()
+    return dict(zip(fields, row)) if row is not None else None
+
+def _task_layout(fields, category_format):
+    """Campos serializados e nomes das colunas de Task do select() de uma página de tarefas
+
+    As colunas começam sempre por id e created_at (chave da paginação); com a
+    categoria embutida as colunas de Category vêm logo após as de Task.
+    """
+    fields = list(fields or Task.SERIALIZABLE_FIELDS)
+    if category_format == 'map':
+        fields = [field for field in fields if field != 'category']
+        if 'category_id' not in fields:
+            fields.append('category_id')
+    names = ['id', 'created_at']
+    names.extend('category_id' if field == 'category' else field for field in fields)
+    return fields, list(dict.fromkeys(names))
+
+def select_tasks(fields=None, category_format='embed'):
+    """select() das colunas para serializar os campos pedidos das tarefas
+
+    Com category_format='embed' a categoria vem no mesmo SELECT (LEFT JOIN);
+    com 'map' apenas category_id, e as categorias são lidas por serialize_tasks.
+    As linhas começam por (id, created_at).
+    """
+    fields, names = _task_layout(fields, category_format)
+    statement = db.select(*(getattr(Task, name) for name in names))
+    if 'category' in fields:
+        statement = statement.add_columns(*CATEGORY_COLUMNS).outerjoin(Category, Task.category_id == Category.id)
+    return statement
+
+def serialize_tasks(rows, fields=None, category_format='embed'):
+    """Serializa as linhas de select_tasks no formato das tarefas da API
+
+    Retorna a tupla (tarefas, categorias): com category_format='embed' cada
+    tarefa traz o objeto `category` e categorias é None; com 'map' as tarefas
+    trazem category_id e as categorias vêm num mapa {id: categoria}, lidas num
+    único SELECT.
+    """
+    fields, names = _task_layout(fields, category_format)
+    positions = {name: index for index, name in enumerate(names)}
+    category_start = len(names)
+    layout = [(field, None if field == 'category' else positions[field]) for field in fields]
+
+    tasks = []
+    for row in rows:
+        task = {}
+        for field, index in layout:
+            if index is not None:
+                task[field] = row[index]
+            elif row[category_start] is None:
+                task[field] = None
+            else:
+                task[field] = dict(zip(Category.SERIALIZABLE_FIELDS, row[category_start:]))
+        tasks.append(task)
+
+    if category_format != 'map':
+        return tasks, None
+
+    categories = {}
+    category_ids = {task['category_id'] for task in tasks if task['category_id']}
+    if category_ids:
+        statement = db.select(*CATEGORY_COLUMNS).where(Category.id.in_(category_ids))
+        for category in read_dicts(statement, Category.SERIALIZABLE_FIELDS):
+            categories[str(category['id'])] = category
+    return tasks, categories
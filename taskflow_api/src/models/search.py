@@ -0,0 +1,56 @@
+import re
+from src.models.user import db
+
+# Índice FTS5 de conteúdo externo sobre tasks.text: guarda apenas o índice
+# invertido, o texto continua na tabela tasks. Os triggers mantêm o índice em
+# dia com qualquer escrita (ORM, SQL direto em lote e ON DELETE CASCADE).
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        text,
+        content='tasks',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF text ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO tasks_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+tasks_fts = db.table('tasks_fts', db.column('rowid'), db.column('text'))
+
+# Termos de busca: palavras (letras, dígitos e _), demais caracteres são separadores
+SEARCH_TERM = re.compile(r'\w+', re.UNICODE)
+
+class TaskSearch:
+    """Busca textual nas tarefas via SQLite FTS5, com LIKE quando o FTS5 não está disponível"""
+
+    available = False
+
+    @classmethod
+    def detect(cls, connection):
+        """Verifica se o índice FTS5 existe (criado pela migração 2, se o SQLite tiver FTS5)"""
+        cls.available = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        ).first() is not None
+        return cls.available
+
+    @staticmethod
+    def terms(text):
+        return SEARCH_TERM.findall(text or '')
+
+    @staticmethod
+    def match_expression(terms):
+        """Converte os termos numa consulta FTS5: todos obrigatórios, cada um como prefixo
+
+        Cada termo vai entre aspas, então operadores da sintaxe FTS5 digitados
+        pelo usuário (AND, OR, NEAR, *, ^) são tratados como texto.
+        """
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
@@ -0,0 +1,134 @@
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from src.models.user import db, User
+from src.models.task import Category, Task, UserSettings
+
+class SyncVersion(db.Model):
+    """Versão de alterações por usuário, incrementada a cada escrita em tarefas e categorias"""
+    __tablename__ = 'sync_versions'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    pruned_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Maior versão de tombstone removida
+    
+    @staticmethod
+    def bump(user_id, session=None):
+        """Incrementa e retorna a versão do usuário (na transação corrente)"""
+        session = session or db.session
+        now = datetime.utcnow()
+        stmt = sqlite_insert(SyncVersion).values(user_id=user_id, version=1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={'version': SyncVersion.version + 1, 'updated_at': now}
+        ).returning(SyncVersion.version)
+        version = session.execute(stmt).scalar_one()
+        # Versão da transação corrente, descartada no commit/rollback (ver bump_sync_versions)
+        session.info.setdefault('sync_versions', {})[user_id] = (version, now)
+        return version
+    
+    @staticmethod
+    def current(user_id):
+        """Versão atual do usuário (0 se ainda não houve alterações)"""
+        version = db.session.query(SyncVersion.version).filter_by(user_id=user_id).scalar()
+        return version or 0
+
+class Tombstone(db.Model):
+    """Registro de exclusão de tarefas e categorias para a sincronização incremental"""
+    __tablename__ = 'tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # 'task', 'category'
+    entity_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_tombstones_user_version', 'user_id', 'version'),
+        db.Index('ix_tombstones_deleted_at', 'deleted_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'entity': self.entity,
+            'id': self.entity_id,
+            'version': self.version,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
+    
+    @staticmethod
+    def prune(cutoff, chunk_size):
+        """Remove até chunk_size tombstones anteriores a cutoff (os mais antigos primeiro)
+
+        A maior versão removida de cada usuário é gravada em
+        sync_versions.pruned_version na mesma transação: cursores de
+        sincronização anteriores a ela recebem o estado completo. Retorna o
+        número de tombstones removidos.
+        """
+        expired = db.select(Tombstone.id).where(
+            Tombstone.deleted_at < cutoff
+        ).order_by(Tombstone.deleted_at).limit(chunk_size)
+        rows = db.session.execute(
+            db.delete(Tombstone)
+            .where(Tombstone.id.in_(expired))
+            .returning(Tombstone.user_id, Tombstone.version),
+            execution_options={'synchronize_session': False}
+        ).all()
+        pruned = {}
+        for user_id, version in rows:
+            pruned[user_id] = max(version, pruned.get(user_id, 0))
+        if pruned:
+            table = SyncVersion.__table__
+            db.session.execute(
+                db.update(table)
+                .where(table.c.user_id == db.bindparam('b_user_id'))
+                .values(pruned_version=db.func.max(table.c.pruned_version, db.bindparam('b_version'))),
+                [{'b_user_id': user_id, 'b_version': version} for user_id, version in pruned.items()]
+            )
+        return len(rows)
+
+# Entidades sincronizadas e o nome usado nos tombstones
+VERSIONED_ENTITIES = {Task: 'task', Category: 'category'}
+
+# Entidades sem coluna de versão cujas escritas também alteram a versão do usuário
+BUMP_ONLY_ENTITIES = (UserSettings,)
+
+@event.listens_for(Session, 'before_flush')
+def bump_sync_versions(session, flush_context, instances):
+    """Atribui a nova versão do usuário às tarefas/categorias alteradas e grava tombstones"""
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    
+    changed = {}
+    for obj in list(session.new) + list(session.dirty):
+        if type(obj) in VERSIONED_ENTITIES and session.is_modified(obj, include_collections=False):
+            # user_id ainda pode estar vazio antes do INSERT (default da coluna é 1)
+            changed.setdefault(obj.user_id or 1, []).append(obj)
+        elif isinstance(obj, BUMP_ONLY_ENTITIES) and session.is_modified(obj, include_collections=False):
+            changed.setdefault(obj.user_id, [])
+    
+    deleted = {}
+    for obj in session.deleted:
+        if type(obj) in VERSIONED_ENTITIES and obj.user_id not in deleted_users:
+            deleted.setdefault(obj.user_id, []).append(obj)
+    
+    # Uma única versão por usuário em cada transação, mesmo com vários flushes
+    pending = session.info.get('sync_versions', {})
+    for user_id in set(changed) | set(deleted):
+        version = pending[user_id][0] if user_id in pending else SyncVersion.bump(user_id, session)
+        for obj in changed.get(user_id, []):
+            obj.version = version
+        for obj in deleted.get(user_id, []):
+            session.add(Tombstone(
+                user_id=user_id,
+                entity=VERSIONED_ENTITIES[type(obj)],
+                entity_id=obj.id,
+                version=version
+            ))
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def discard_transaction_versions(session):
+    session.info.pop('sync_versions', None)
@@ -1,5 +1,8 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from collections import Counter
 from datetime import datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from src.models.user import db
 
 class Category(db.Model):
@@ -8,15 +11,23 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     color = db.Column(db.String(7), default='#667eea')
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), default=1)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), default=1)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # versão de sincronização
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Campos serializados (ordem de to_dict)
+    SERIALIZABLE_FIELDS = ('id', 'name', 'color', 'user_id', 'version', 'created_at', 'updated_at')
+    
     # Relacionamentos
-    tasks = db.relationship('Task', backref='category', lazy=True, cascade='all, delete-orphan')
+    tasks = db.relationship('Task', backref='category', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
-    # Constraint única para nome por usuário
-    __table_args__ = (db.UniqueConstraint('name', 'user_id', name='unique_category_per_user'),)
+    # Constraint única para nome por usuário e índice da listagem ordenada por nome
+    __table_args__ = (
+        db.UniqueConstraint('name', 'user_id', name='unique_category_per_user'),
+        db.Index('ix_categories_user_name', 'user_id', 'name'),
+        db.Index('ix_categories_user_version', 'user_id', 'version'),
+    )
     
     def to_dict(self):
         return {
@@ -24,6 +35,7 @@ class Category(db.Model):
             'name': self.name,
             'color': self.color,
             'user_id': self.user_id,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -34,38 +46,56 @@ class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
     priority = db.Column(db.String(10), default='media')
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), nullable=True)
     reminder_datetime = db.Column(db.DateTime, nullable=True)
     completed = db.Column(db.Boolean, default=False)
     notified = db.Column(db.Boolean, default=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), default=1)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), default=1)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # versão de sincronização
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     
     # Relacionamentos
-    activity_logs = db.relationship('ActivityLog', backref='task', lazy=True, cascade='all, delete-orphan')
+    activity_logs = db.relationship('ActivityLog', backref='task', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
     
-    # Constraints
+    # Constraints e índices dos caminhos de acesso das rotas
     __table_args__ = (
         db.CheckConstraint("priority IN ('baixa', 'media', 'alta')", name='check_priority'),
+        # Listagem paginada sem filtro de status: ORDER BY created_at DESC, id DESC
+        db.Index('ix_tasks_user_created', 'user_id', 'created_at'),
+        # Listagem filtrada por status (pendentes/concluídas)
+        db.Index('ix_tasks_user_completed_created', 'user_id', 'completed', 'created_at'),
+        # Filtro por prioridade e estatísticas
+        db.Index('ix_tasks_user_priority_completed', 'user_id', 'priority', 'completed'),
+        # Filtro por categoria e verificação antes de deletar categoria
+        db.Index('ix_tasks_category_completed', 'category_id', 'completed'),
+        # Sincronização incremental: GET /api/tasks/changes?since=<versão>
+        db.Index('ix_tasks_user_version', 'user_id', 'version'),
+        # Exportação iCalendar: lembretes do usuário em ordem cronológica
+        db.Index('ix_tasks_user_reminder', 'user_id', 'reminder_datetime'),
+        # Lembretes pendentes (índice parcial)
+        db.Index(
+            'ix_tasks_pending_reminders', 'reminder_datetime',
+            sqlite_where=db.text('notified = 0 AND completed = 0')
+        ),
     )
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'text': self.text,
-            'priority': self.priority,
-            'category_id': self.category_id,
-            'category': self.category.to_dict() if self.category else None,
-            'reminder_datetime': self.reminder_datetime.isoformat() if self.reminder_datetime else None,
-            'completed': self.completed,
-            'notified': self.notified,
-            'user_id': self.user_id,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
-        }
+    # Campos aceitos pela projeção `fields=` da listagem de tarefas
+    SERIALIZABLE_FIELDS = (
+        'id', 'text', 'priority', 'category_id', 'category', 'reminder_datetime', 'completed',
+        'notified', 'user_id', 'version', 'created_at', 'updated_at', 'completed_at'
+    )
+    
+    def to_dict(self, fields=None):
+        data = {}
+        for field in (fields or self.SERIALIZABLE_FIELDS):
+            if field == 'category':
+                data['category'] = self.category.to_dict() if self.category else None
+            else:
+                value = getattr(self, field)
+                data[field] = value.isoformat() if isinstance(value, datetime) else value
+        return data
     
     def mark_completed(self):
         """Marca a tarefa como concluída e define completed_at"""
@@ -77,11 +107,101 @@ class Task(db.Model):
         self.completed = False
         self.completed_at = None
 
+class TaskStatCounter(db.Model):
+    """Contadores materializados de tarefas por usuário, prioridade, status e categoria
+
+    Mantidos na mesma transação das rotas de escrita quando STATS_USE_COUNTERS
+    está ativo, permitindo que /api/stats seja lido sem varrer a tabela tasks.
+    """
+    __tablename__ = 'task_stat_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    priority = db.Column(db.String(10), primary_key=True)
+    completed = db.Column(db.Boolean, primary_key=True)
+    category_key = db.Column(db.Integer, primary_key=True)  # 0 = sem categoria
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    @staticmethod
+    def enabled():
+        return current_app.config.get('STATS_USE_COUNTERS', False)
+    
+    @staticmethod
+    def bucket(task):
+        """Chave do contador afetado por uma tarefa"""
+        return (task.user_id, task.priority, bool(task.completed), task.category_id)
+    
+    @staticmethod
+    def adjust(bucket, delta):
+        """Soma delta ao contador do bucket (user_id, priority, completed, category_id)"""
+        TaskStatCounter.adjust_many({bucket: delta})
+    
+    @staticmethod
+    def adjust_many(deltas):
+        """Soma as variações {bucket: delta} num único executemany, com uma linha por bucket
+
+        As rotas em lote agrupam as linhas afetadas por bucket antes de chamar:
+        o número de instruções não cresce com o número de tarefas.
+        """
+        if not TaskStatCounter.enabled():
+            return
+        rows = [
+            {'user_id': user_id, 'priority': priority, 'completed': completed, 'category_key': category_id or 0, 'task_count': delta}
+            for (user_id, priority, completed, category_id), delta in deltas.items() if delta
+        ]
+        if not rows:
+            return
+        table = TaskStatCounter.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'priority', 'completed', 'category_key'],
+            set_={'task_count': table.c.task_count + stmt.excluded.task_count}
+        )
+        db.session.execute(stmt, rows)
+    
+    @staticmethod
+    def move(old_bucket, new_bucket):
+        """Transfere uma tarefa de um bucket para outro"""
+        TaskStatCounter.move_many([(old_bucket, new_bucket)])
+    
+    @staticmethod
+    def move_many(moves):
+        """Transfere várias tarefas entre buckets (pares (antigo, novo)) num único executemany"""
+        deltas = Counter()
+        for old_bucket, new_bucket in moves:
+            if old_bucket != new_bucket:
+                deltas[old_bucket] -= 1
+                deltas[new_bucket] += 1
+        TaskStatCounter.adjust_many(deltas)
+    
+    @staticmethod
+    def rebuild():
+        """Recalcula todos os contadores a partir da tabela tasks"""
+        category_key = db.func.coalesce(Task.category_id, 0)
+        aggregate = db.select(
+            Task.user_id, Task.priority, Task.completed, category_key, db.func.count()
+        ).group_by(Task.user_id, Task.priority, Task.completed, category_key)
+        
+        db.session.execute(db.delete(TaskStatCounter))
+        db.session.execute(db.insert(TaskStatCounter).from_select(
+            ['user_id', 'priority', 'completed', 'category_key', 'task_count'], aggregate
+        ))
+    
+    @staticmethod
+    def grouped_counts(user_id):
+        """Retorna (completed, priority, category_id, total) a partir dos contadores"""
+        rows = db.session.query(
+            TaskStatCounter.completed,
+            TaskStatCounter.priority,
+            TaskStatCounter.category_key,
+            TaskStatCounter.task_count
+        ).filter(TaskStatCounter.user_id == user_id, TaskStatCounter.task_count > 0)
+        return [(completed, priority, category_key or None, count) for completed, priority, category_key, count in rows]
+
 class UserSettings(db.Model):
     __tablename__ = 'user_settings'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True)
     theme = db.Column(db.String(10), default='light')
     notifications_enabled = db.Column(db.Boolean, default=True)
     default_priority = db.Column(db.String(10), default='media')
@@ -94,6 +214,9 @@ class UserSettings(db.Model):
         db.CheckConstraint("default_priority IN ('baixa', 'media', 'alta')", name='check_default_priority'),
     )
     
+    # Campos serializados (ordem de to_dict)
+    SERIALIZABLE_FIELDS = ('id', 'user_id', 'theme', 'notifications_enabled', 'default_priority', 'created_at', 'updated_at')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -109,12 +232,23 @@ class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), nullable=True)
     action = db.Column(db.String(50), nullable=False)  # 'created', 'updated', 'completed', 'deleted'
     details = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_activity_logs_user_created', 'user_id', 'created_at'),
+        # Cascade de Task.activity_logs ao deletar tarefas
+        db.Index('ix_activity_logs_task', 'task_id'),
+        # Compactação por idade (retenção)
+        db.Index('ix_activity_logs_created', 'created_at'),
+    )
+    
+    # Campos serializados (ordem de to_dict)
+    SERIALIZABLE_FIELDS = ('id', 'user_id', 'task_id', 'action', 'details', 'created_at')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -136,3 +270,67 @@ class ActivityLog(db.Model):
         )
         db.session.add(log)
         return log
+    
+    @staticmethod
+    def log_many(rows):
+        """Registra várias atividades com um único executemany
+
+        rows: lista de dicts com user_id, task_id, action e details
+        """
+        if rows:
+            db.session.execute(db.insert(ActivityLog), rows)
+    
+    @staticmethod
+    def compact(cutoff, chunk_size, rollup=True):
+        """Remove até chunk_size registros anteriores a cutoff (os mais antigos primeiro)
+
+        Com rollup, os registros removidos são somados a activity_daily_counts na
+        mesma transação. Retorna o número de registros removidos.
+        """
+        expired = db.select(ActivityLog.id).where(
+            ActivityLog.created_at < cutoff
+        ).order_by(ActivityLog.created_at).limit(chunk_size)
+        rows = db.session.execute(
+            db.delete(ActivityLog)
+            .where(ActivityLog.id.in_(expired))
+            .returning(ActivityLog.user_id, ActivityLog.action, ActivityLog.created_at),
+            execution_options={'synchronize_session': False}
+        ).all()
+        if rollup:
+            ActivityDailyCount.add(rows)
+        return len(rows)
+
+class ActivityDailyCount(db.Model):
+    """Total diário de atividades por usuário e ação, preservado após a compactação do log"""
+    __tablename__ = 'activity_daily_counts'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    action = db.Column(db.String(50), primary_key=True)
+    activity_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'action': self.action,
+            'count': self.activity_count
+        }
+    
+    @staticmethod
+    def add(rows):
+        """Soma registros (user_id, action, created_at) aos totais diários"""
+        totals = {}
+        for user_id, action, created_at in rows:
+            key = (user_id, created_at.date(), action)
+            totals[key] = totals.get(key, 0) + 1
+        if not totals:
+            return
+        stmt = sqlite_insert(ActivityDailyCount)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'day', 'action'],
+            set_={'activity_count': ActivityDailyCount.activity_count + stmt.excluded.activity_count}
+        )
+        db.session.execute(stmt, [
+            {'user_id': user_id, 'day': day, 'action': action, 'activity_count': count}
+            for (user_id, day, action), count in totals.items()
+        ])
@@ -13,11 +13,14 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Relacionamentos
-    tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
-    categories = db.relationship('Category', backref='user', lazy=True, cascade='all, delete-orphan')
-    settings = db.relationship('UserSettings', backref='user', lazy=True, uselist=False, cascade='all, delete-orphan')
-    activity_logs = db.relationship('ActivityLog', backref='user', lazy=True, cascade='all, delete-orphan')
+    # Campos serializados (ordem de to_dict); password_hash nunca é exposto
+    SERIALIZABLE_FIELDS = ('id', 'username', 'email', 'created_at', 'updated_at')
+    
+    # Relacionamentos (passive_deletes: a exclusão dos filhos fica com o ON DELETE CASCADE do banco)
+    tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    categories = db.relationship('Category', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+    settings = db.relationship('UserSettings', backref='user', lazy=True, uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    activity_logs = db.relationship('ActivityLog', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -0,0 +1,26 @@
+from flask import Blueprint, Response, current_app, request
+from src.services.auth import current_user_id
+from src.services.events import event_broker
+
+events_bp = Blueprint('events', __name__)
+
+@events_bp.route('/events', methods=['GET'])
+def stream_events():
+    """Feed de alterações do usuário via Server-Sent Events
+
+    Retoma a partir do cabeçalho Last-Event-ID (enviado automaticamente pelo
+    EventSource ao reconectar) ou do parâmetro last_event_id.
+    """
+    user_id = current_user_id()
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    stream = event_broker.stream(
+        user_id,
+        last_event_id,
+        heartbeat=current_app.config.get('EVENTS_HEARTBEAT_SECONDS', 15),
+        max_duration=current_app.config.get('EVENTS_STREAM_SECONDS', 300)
+    )
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,501 @@
+import csv
+import io
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.exceptions import HTTPException
+from src.models.user import db, User
+from src.models.task import Task, Category, TaskStatCounter
+from src.models.queries import read_rows
+from src.models.sync import SyncVersion
+from src.services.audit import audit_writer
+from src.services.auth import current_user_id
+from src.services.events import event_broker
+from src.services.http_cache import cached_response
+from src.services.query_guard import allow_repeated_queries
+from src.services.reminders import reminder_scheduler, to_client_time
+from src.services.serialization import serialize_rows
+from src.services.unit_of_work import on_commit, unit_of_work
+
+export_bp = Blueprint('export', __name__)
+
+# ==================== EXPORTAÇÃO ====================
+
+# Tamanho máximo de uma linha de conteúdo iCalendar, em octetos (RFC 5545, seção 3.1)
+ICS_LINE_OCTETS = 75
+
+# Duração dos eventos gerados a partir dos lembretes
+ICS_EVENT_DURATION = timedelta(hours=1)
+
+# Prioridade iCalendar (1 = mais alta, 9 = mais baixa)
+ICS_PRIORITIES = {'alta': 1, 'media': 5, 'baixa': 9}
+
+# Colunas das exportações de tarefas (ordem das colunas do CSV)
+EXPORT_FIELDS = (
+    'id', 'text', 'priority', 'category', 'reminder_datetime', 'completed',
+    'notified', 'created_at', 'updated_at', 'completed_at'
+)
+
+# Início de célula que planilhas (Excel, LibreOffice) interpretam como fórmula
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+ICS_HEADER = [
+    'BEGIN:VCALENDAR',
+    'VERSION:2.0',
+    'PRODID:-//TaskFlow//TaskFlow//PT',
+    'CALSCALE:GREGORIAN',
+    'METHOD:PUBLISH',
+    'X-WR-CALNAME:TaskFlow',
+]
+
+def _escape_text(value):
+    """Escapa um valor TEXT do iCalendar: barra invertida, ponto e vírgula, vírgula e quebras de linha"""
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+def _fold(line):
+    """Dobra a linha em segmentos de até 75 octetos, sem partir caracteres UTF-8
+
+    As linhas de continuação começam com um espaço, que conta no limite.
+    """
+    if len(line) <= ICS_LINE_OCTETS and line.isascii():
+        return line + '\r\n'
+    encoded = line.encode('utf-8')
+    if len(encoded) <= ICS_LINE_OCTETS:
+        return line + '\r\n'
+
+    segments = []
+    start = 0
+    limit = ICS_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Recuar até o início de um caractere (bytes de continuação são 10xxxxxx)
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        segments.append(encoded[start:end].decode('utf-8'))
+        start = end
+        limit = ICS_LINE_OCTETS - 1
+    return '\r\n '.join(segments) + '\r\n'
+
+def _format_datetime(value, tz_offset):
+    """Data no formato iCalendar: UTC quando o fuso do cliente é conhecido, senão horário local (flutuante)"""
+    # isoformat é bem mais rápido que strftime na geração de arquivos grandes
+    if tz_offset is None:
+        return value.isoformat(timespec='seconds').replace('-', '').replace(':', '')
+    return (value + timedelta(minutes=tz_offset)).isoformat(timespec='seconds').replace('-', '').replace(':', '') + 'Z'
+
+def _parse_datetime(value, name):
+    """Lê uma data ou data e hora ISO 8601 (vazio retorna None); lança ValueError se inválida"""
+    if value is None or value == '':
+        return None
+    try:
+        # Lembretes são gravados no horário local do cliente, sem fuso
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return to_client_time(parsed, request.args.get('tz_offset', 0, type=int))
+    except (TypeError, AttributeError, ValueError) as e:
+        raise ValueError(f'Data inválida em {name}') from e
+
+def _stream_rows(query, render, header='', footer=''):
+    """Executa a consulta com um cursor do servidor e gera o texto de cada lote de linhas
+
+    As linhas são lidas em lotes de EXPORT_BATCH_SIZE (yield_per): a memória usada
+    não depende do número de tarefas exportadas.
+    """
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 500)
+
+    def generate():
+        if header:
+            yield header
+        for rows in read_rows(query, yield_per=batch_size).partitions():
+            yield render(rows)
+        if footer:
+            yield footer
+
+    return stream_with_context(generate())
+
+def _vevent(row, tz_offset, host):
+    """Gera o VEVENT de uma tarefa com lembrete"""
+    stamp = _format_datetime(row.updated_at or row.created_at, 0)
+    description = f'Prioridade: {row.priority}'
+    if row.category_name:
+        description += f'\nCategoria: {row.category_name}'
+
+    # Apenas as propriedades de texto livre podem passar de 75 octetos e precisam ser dobradas
+    event = (
+        f'BEGIN:VEVENT\r\n'
+        f'UID:task-{row.id}@{host}\r\n'
+        f'DTSTAMP:{stamp}\r\n'
+        f'LAST-MODIFIED:{stamp}\r\n'
+        f'DTSTART:{_format_datetime(row.reminder_datetime, tz_offset)}\r\n'
+        f'DTEND:{_format_datetime(row.reminder_datetime + ICS_EVENT_DURATION, tz_offset)}\r\n'
+        f'PRIORITY:{ICS_PRIORITIES.get(row.priority, 0)}\r\n'
+        f'STATUS:CONFIRMED\r\n'
+        f'TRANSP:OPAQUE\r\n'
+    )
+    if row.created_at:
+        event += f'CREATED:{_format_datetime(row.created_at, 0)}\r\n'
+    event += _fold(f'SUMMARY:{_escape_text(row.text)}')
+    event += _fold(f'DESCRIPTION:{_escape_text(description)}')
+    if row.category_name:
+        event += _fold(f'CATEGORIES:{_escape_text(row.category_name)}')
+    return event + 'END:VEVENT\r\n'
+
+@export_bp.route('/export/calendar.ics', methods=['GET'])
+@cached_response
+def export_calendar():
+    """Exportar as tarefas com lembrete em formato iCalendar
+
+    O arquivo é gerado em streaming a partir de um cursor do banco, em lotes de
+    EXPORT_BATCH_SIZE tarefas, e pode ser assinado por aplicativos de
+    calendário (ETag/Last-Modified permitem revalidar a assinatura com 304).
+    Parâmetros opcionais:
+    - start / end: intervalo de datas dos lembretes (início inclusivo, fim exclusivo)
+    - tz_offset: diferença do fuso do cliente em minutos (Date.getTimezoneOffset);
+      sem ele os horários são exportados como horário local
+    """
+    try:
+        user_id = current_user_id()
+        tz_offset = request.args.get('tz_offset', type=int)
+
+        try:
+            start = _parse_datetime(request.args.get('start'), 'start')
+            end = _parse_datetime(request.args.get('end'), 'end')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        query = (
+            db.select(
+                Task.id, Task.text, Task.priority, Task.reminder_datetime,
+                Task.created_at, Task.updated_at, Category.name.label('category_name')
+            )
+            .outerjoin(Category, Task.category_id == Category.id)
+            .where(Task.user_id == user_id, Task.reminder_datetime.isnot(None))
+            .order_by(Task.reminder_datetime, Task.id)
+        )
+        if start:
+            query = query.where(Task.reminder_datetime >= start)
+        if end:
+            query = query.where(Task.reminder_datetime < end)
+
+        host = request.host.split(':')[0]
+        stream = _stream_rows(
+            query,
+            lambda rows: ''.join(_vevent(row, tz_offset, host) for row in rows),
+            header=''.join(_fold(line) for line in ICS_HEADER),
+            footer=_fold('END:VCALENDAR')
+        )
+
+        return Response(stream, mimetype='text/calendar', headers={
+            'Content-Disposition': 'attachment; filename="taskflow_calendario.ics"'
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _task_export_query(user_id):
+    """Tarefas do usuário com o nome da categoria, na ordem de criação"""
+    return (
+        db.select(
+            Task.id, Task.text, Task.priority, Category.name.label('category'), Task.reminder_datetime,
+            Task.completed, Task.notified, Task.created_at, Task.updated_at, Task.completed_at
+        )
+        .outerjoin(Category, Task.category_id == Category.id)
+        .where(Task.user_id == user_id)
+        .order_by(Task.created_at, Task.id)
+    )
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str) and value.lstrip("'").startswith(CSV_FORMULA_PREFIXES):
+        # Injeção de CSV: o apóstrofo faz a planilha tratar a célula como texto
+        # (também acrescentado a um texto que já começa com apóstrofo, para a importação)
+        return "'" + value
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _csv_unescape(value):
+    """Desfaz o apóstrofo acrescentado por _csv_value (exportar e importar preserva o texto)"""
+    if isinstance(value, str) and value.startswith("'") and value.lstrip("'").startswith(CSV_FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+def _ndjson_lines(rows):
+    dumps = current_app.json.dumps_bytes
+    return b''.join(dumps(record) + b'\n' for record in serialize_rows(rows, EXPORT_FIELDS))
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+def _csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue()
+
+@export_bp.route('/export/tasks.ndjson', methods=['GET'])
+@cached_response
+def export_tasks_ndjson():
+    """Exportar as tarefas do usuário em NDJSON (um objeto JSON por linha), em streaming"""
+    try:
+        user_id = current_user_id()
+        return Response(_stream_rows(_task_export_query(user_id), _ndjson_lines), mimetype='application/x-ndjson', headers={
+            'Content-Disposition': 'attachment; filename="taskflow_tarefas.ndjson"'
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@export_bp.route('/export/tasks.csv', methods=['GET'])
+@cached_response
+def export_tasks_csv():
+    """Exportar as tarefas do usuário em CSV (com linha de cabeçalho), em streaming"""
+    try:
+        user_id = current_user_id()
+        return Response(_stream_rows(_task_export_query(user_id), _csv_lines, header=_csv_header()), mimetype='text/csv', headers={
+            'Content-Disposition': 'attachment; filename="taskflow_tarefas.csv"'
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== IMPORTAÇÃO ====================
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+# Valores aceitos para os campos booleanos (CSV e NDJSON)
+BOOLEAN_VALUES = {
+    'true': True, '1': True, 'sim': True, 'yes': True,
+    'false': False, '0': False, 'nao': False, 'não': False, 'no': False, '': False
+}
+
+def _parse_boolean(value, name):
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in BOOLEAN_VALUES:
+        return BOOLEAN_VALUES[value.strip().lower()]
+    raise ValueError(f'Valor inválido em {name}')
+
+def _ndjson_records(stream):
+    """Gera (número da linha, registro, erro) para cada linha não vazia do corpo NDJSON"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = current_app.json.loads(line)
+        except ValueError:
+            yield line_number, None, 'JSON inválido'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Cada linha deve ser um objeto JSON'
+            continue
+        yield line_number, record, None
+
+def _csv_records(reader):
+    """Gera (número da linha, registro, erro) para cada registro do corpo CSV"""
+    for record in reader:
+        if None in record:
+            yield reader.line_num, None, 'Mais colunas que o cabeçalho'
+            continue
+        for field in ('text', 'category'):
+            record[field] = _csv_unescape(record.get(field))
+        yield reader.line_num, record, None
+
+def _parse_import_record(record, now):
+    """Valida um registro importado; retorna (valores da tarefa, nome da categoria) ou lança ValueError
+
+    Aceita os campos da exportação; id e updated_at são ignorados.
+    """
+    text = record.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError('Texto da tarefa é obrigatório')
+
+    priority = record.get('priority') or 'media'
+    if priority not in ['baixa', 'media', 'alta']:
+        raise ValueError('Prioridade inválida')
+
+    category = record.get('category') or None
+    if category is not None:
+        if not isinstance(category, str) or len(category.strip()) > 50:
+            raise ValueError('Nome de categoria inválido')
+        category = category.strip() or None
+
+    completed = _parse_boolean(record.get('completed'), 'completed')
+    completed_at = _parse_datetime(record.get('completed_at'), 'completed_at') if completed else None
+    return {
+        'text': text,
+        'priority': priority,
+        'reminder_datetime': _parse_datetime(record.get('reminder_datetime'), 'reminder_datetime'),
+        'completed': completed,
+        'notified': _parse_boolean(record.get('notified'), 'notified'),
+        'created_at': _parse_datetime(record.get('created_at'), 'created_at') or now,
+        'updated_at': now,
+        'completed_at': (completed_at or now) if completed else None,
+    }, category
+
+def _resolve_categories(user_id, names, categories, version):
+    """Completa o mapa nome -> id com os nomes do lote, criando as categorias que não existem
+
+    Retorna o número de categorias criadas.
+    """
+    missing = sorted(name for name in names if name not in categories)
+    if not missing:
+        return 0
+
+    created = db.session.execute(
+        sqlite_insert(Category).on_conflict_do_nothing().returning(Category.name, Category.id),
+        [{'name': name, 'user_id': user_id, 'version': version} for name in missing]
+    ).all()
+    categories.update(created)
+
+    # Criadas por outra requisição entre a leitura inicial e este lote
+    if len(created) < len(missing):
+        categories.update(db.session.query(Category.name, Category.id).filter(
+            Category.user_id == user_id, Category.name.in_([name for name in missing if name not in categories])
+        ).all())
+    return len(created)
+
+def _import_batch(user_id, batch, categories):
+    """Grava um lote de tarefas válidas numa única transação
+
+    batch: lista de (valores da tarefa, nome da categoria). Retorna o novo mapa de
+    categorias e o número de categorias criadas; o mapa recebido só é substituído
+    após o commit, para não guardar ids de categorias desfeitas num rollback.
+    """
+    categories = dict(categories)
+    with unit_of_work():
+        # Escritas em SQL direto não passam pelo ORM: versão de sincronização atribuída aqui
+        version = SyncVersion.bump(user_id)
+        created_categories = _resolve_categories(user_id, {name for _, name in batch if name}, categories, version)
+
+        rows = []
+        for values, name in batch:
+            rows.append({**values, 'category_id': categories[name] if name else None, 'user_id': user_id, 'version': version})
+        # Um único executemany pela tabela (Core): o insert em massa do ORM divide o
+        # lote conforme as colunas nulas de cada linha e, com RETURNING, o custo de
+        # juntar os resultados cresce com o tamanho do lote
+        db.session.execute(db.insert(Task.__table__), rows)
+
+        TaskStatCounter.adjust_many(Counter((user_id, row['priority'], row['completed'], row['category_id']) for row in rows))
+
+        # Os ids dos lembretes pendentes do lote são lidos pela versão, exclusiva do lote
+        if any(row['reminder_datetime'] and not row['completed'] and not row['notified'] for row in rows):
+            pending = db.session.query(Task.id, Task.reminder_datetime).filter(
+                Task.user_id == user_id,
+                Task.version == version,
+                Task.reminder_datetime.isnot(None),
+                Task.completed == db.false(),
+                Task.notified == db.false()
+            )
+            for task_id, reminder_datetime in pending:
+                on_commit(reminder_scheduler.schedule_entry, task_id, user_id, reminder_datetime)
+
+        # Um registro por lote no log de atividades, e não um por tarefa
+        audit_writer.log(user_id, 'imported', details=f'{len(rows)} tarefas importadas')
+    return categories, created_categories
+
+@export_bp.route('/import', methods=['POST'])
+@allow_repeated_queries
+def import_tasks():
+    """Importar tarefas em NDJSON ou CSV (mesmos campos da exportação)
+
+    O corpo é lido de forma incremental e as tarefas são gravadas em transações de
+    IMPORT_BATCH_SIZE tarefas; as categorias são resolvidas pelo nome (as que não
+    existem são criadas). Linhas inválidas são relatadas em `errors` (até
+    IMPORT_MAX_ERRORS) sem interromper a importação das demais.
+    Parâmetros: user_id e format ('ndjson' ou 'csv'; padrão pelo Content-Type).
+    """
+    summary = {'imported': 0, 'failed': 0, 'categories_created': 0}
+    try:
+        user_id = current_user_id()
+        import_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+        if import_format not in IMPORT_FORMATS:
+            return jsonify({'success': False, 'error': 'Formato inválido'}), 400
+
+        if not db.session.get(User, user_id):
+            return jsonify({'success': False, 'error': 'Usuário não encontrado'}), 404
+
+        stream = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8-sig', newline='' if import_format == 'csv' else None)
+        if import_format == 'csv':
+            reader = csv.DictReader(stream)
+            if not reader.fieldnames or 'text' not in reader.fieldnames:
+                return jsonify({'success': False, 'error': 'Cabeçalho CSV sem a coluna text'}), 400
+            records = _csv_records(reader)
+        else:
+            records = _ndjson_records(stream)
+
+        batch_size = current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+        max_errors = current_app.config.get('IMPORT_MAX_ERRORS', 100)
+
+        # Categorias do usuário carregadas numa única consulta
+        categories = dict(db.session.query(Category.name, Category.id).filter_by(user_id=user_id).all())
+        db.session.commit()
+
+        errors = []
+
+        def report(line_number, error, count=1):
+            summary['failed'] += count
+            if len(errors) < max_errors:
+                errors.append({'line': line_number, 'error': error})
+
+        def flush(batch, lines):
+            nonlocal categories
+            try:
+                categories, created = _import_batch(user_id, batch, categories)
+            except Exception as e:
+                current_app.logger.exception('Falha ao importar o lote das linhas %d a %d', lines[0], lines[-1])
+                report(lines[0], f'Falha ao gravar o lote das linhas {lines[0]} a {lines[-1]}: {e}', len(batch))
+                return
+            summary['imported'] += len(batch)
+            summary['categories_created'] += created
+
+        now = datetime.utcnow()
+        batch, lines = [], []
+        for line_number, record, error in records:
+            if error is None:
+                try:
+                    batch.append(_parse_import_record(record, now))
+                    lines.append(line_number)
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                report(line_number, error)
+            if len(batch) >= batch_size:
+                flush(batch, lines)
+                batch, lines = [], []
+        if batch:
+            flush(batch, lines)
+
+        if summary['imported']:
+            # Importações podem criar muitas tarefas: o cliente recarrega a listagem
+            event_broker.publish(user_id, 'tasks_changed', summary)
+
+        return jsonify({
+            'success': True,
+            **summary,
+            'errors': errors,
+            'message': f"{summary['imported']} tarefa(s) importada(s)"
+        })
+
+    except UnicodeDecodeError:
+        db.session.rollback()
+        # Lotes anteriores ao erro já foram gravados
+        return jsonify({'success': False, 'error': 'O arquivo deve estar em UTF-8', **summary}), 400
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
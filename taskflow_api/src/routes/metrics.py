@@ -0,0 +1,11 @@
+from flask import Blueprint, Response, jsonify
+from src.services.metrics import request_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas das requisições no formato texto do Prometheus (requer METRICS_ENABLED)"""
+    if not request_metrics.enabled:
+        return jsonify({'success': False, 'error': 'Métricas desativadas'}), 404
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
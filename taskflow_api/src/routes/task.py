@@ -1,46 +1,293 @@
-from flask import Blueprint, request, jsonify
+import base64
+import json
+from collections import Counter
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import HTTPException
 from src.models.user import db
-from src.models.task import Task, Category, UserSettings, ActivityLog
+from src.models.task import Task, Category, TaskStatCounter, UserSettings, ActivityLog, ActivityDailyCount
+from src.models.queries import read_dicts, read_one, read_rows, select_fields, select_tasks, serialize_tasks
+from src.models.search import TaskSearch, tasks_fts
+from src.models.sync import SyncVersion, Tombstone
+from src.services.audit import audit_writer
+from src.services.auth import current_user_id
+from src.services.events import event_broker
+from src.services.http_cache import cached_response
+from src.services.reminders import reminder_scheduler, to_client_time
+from src.services.serialization import json_stream, serialize_rows
+from src.services.unit_of_work import on_commit, transactional
 
 task_bp = Blueprint('task', __name__)
 
+# Paginação da listagem de tarefas
+TASKS_DEFAULT_LIMIT = 50
+TASKS_MAX_LIMIT = 200
+
+# Máximo de termos considerados numa busca
+SEARCH_MAX_TERMS = 10
+
+def _encode_cursor(created_at, task_id):
+    """Gera um cursor opaco a partir da chave de ordenação (created_at, id)"""
+    payload = json.dumps([created_at.isoformat() if created_at else None, task_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor):
+    """Decodifica um cursor gerado por _encode_cursor; lança ValueError se inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Cursor inválido') from e
+
+def _encode_rank_cursor(rank, task_id):
+    """Gera um cursor opaco a partir da chave de ordenação da busca (rank, id)"""
+    payload = json.dumps([rank, task_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_rank_cursor(cursor):
+    """Decodifica um cursor gerado por _encode_rank_cursor; lança ValueError se inválido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, task_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return float(rank), int(task_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Cursor inválido') from e
+
+def _list_options():
+    """Lê limit, fields e category_format da listagem; lança ValueError se inválidos"""
+    limit = request.args.get('limit', TASKS_DEFAULT_LIMIT, type=int)
+    if limit < 1:
+        raise ValueError('Limite inválido')
+    limit = min(limit, TASKS_MAX_LIMIT)
+    
+    fields = None
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        invalid = [field for field in fields if field not in Task.SERIALIZABLE_FIELDS]
+        if invalid:
+            raise ValueError(f'Campos inválidos: {", ".join(invalid)}')
+    
+    category_format = request.args.get('category_format', 'embed')
+    if category_format not in ['embed', 'map']:
+        raise ValueError('Formato de categoria inválido')
+    
+    return limit, fields, category_format
+
+def _filter_tasks(statement):
+    """Aplica os filtros opcionais completed, priority e category_id da query string"""
+    completed = request.args.get('completed')
+    priority = request.args.get('priority')
+    category_id = request.args.get('category_id', type=int)
+    
+    if completed is not None:
+        statement = statement.where(Task.completed == (completed.lower() == 'true'))
+    
+    if priority:
+        statement = statement.where(Task.priority == priority)
+        
+    if category_id:
+        statement = statement.where(Task.category_id == category_id)
+    
+    return statement
+
+def _load_task(task_id):
+    """Carrega uma tarefa do usuário da requisição já com a categoria (evita um SELECT extra na serialização)
+
+    Retorna None se a tarefa não existir ou pertencer a outro usuário (as rotas
+    respondem 404 nos dois casos, sem revelar quais ids existem).
+    """
+    task = db.session.get(Task, task_id, options=[joinedload(Task.category)])
+    if task is None or task.user_id != current_user_id():
+        return None
+    return task
+
+def _load_category(category_id):
+    """Carrega uma categoria do usuário da requisição; None se não existir ou for de outro usuário"""
+    category = db.session.get(Category, category_id)
+    if category is None or category.user_id != current_user_id():
+        return None
+    return category
+
+def _user_category_exists(category_id, user_id):
+    """Indica se a categoria existe e pertence ao usuário informado"""
+    return db.session.query(Category.id).filter_by(id=category_id, user_id=user_id).first() is not None
+
+# Campos comparados para registrar alterações no log de atividades
+TRACKED_FIELDS = ('text', 'priority', 'category_id', 'reminder_datetime', 'completed')
+
+def _parse_reminder(value):
+    """Converte a data do lembrete enviada pelo cliente; lança ValueError se inválida
+
+    Lembretes são gravados sem fuso, no horário local do cliente (input
+    datetime-local). Datas sem horário valem a partir de 00:00; datas com fuso
+    (ex.: 'Z') são convertidas para o horário do cliente com o parâmetro
+    tz_offset da requisição (padrão 0: UTC), o mesmo que os leitores usam.
+    """
+    reminder = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return to_client_time(reminder, request.args.get('tz_offset', 0, type=int))
+
+def _apply_task_update(task, data):
+    """Aplica os campos enviados à tarefa; retorna a mensagem de erro de validação ou None"""
+    # A consulta da categoria faz autoflush: validá-la antes de alterar qualquer campo,
+    # senão o flush zera o histórico que _describe_changes usa para o log de atividades
+    if data.get('category_id') and not _user_category_exists(data['category_id'], task.user_id):
+        return 'Categoria não encontrada'
+    
+    if 'text' in data:
+        if not data['text'].strip():
+            return 'Texto da tarefa não pode estar vazio'
+        task.text = data['text']
+    
+    if 'priority' in data:
+        if data['priority'] not in ['baixa', 'media', 'alta']:
+            return 'Prioridade inválida'
+        task.priority = data['priority']
+    
+    if 'category_id' in data:
+        task.category_id = data['category_id']
+    
+    if 'reminder_datetime' in data:
+        if data['reminder_datetime']:
+            try:
+                # CORREÇÃO: Remover completamente a validação de data futura
+                reminder_datetime = _parse_reminder(data['reminder_datetime'])
+            except ValueError:
+                return 'Formato de data inválido'
+            # Resetar flag de notificação se lembrete mudou
+            if task.reminder_datetime != reminder_datetime:
+                task.notified = False
+            task.reminder_datetime = reminder_datetime
+        else:
+            task.reminder_datetime = None
+            task.notified = False
+    
+    if 'completed' in data:
+        if data['completed'] and not task.completed:
+            task.mark_completed()
+        elif not data['completed'] and task.completed:
+            task.mark_uncompleted()
+    
+    return None
+
+# Campos das tarefas enviados no feed de alterações (/api/events)
+EVENT_TASK_FIELDS = ['id', 'text', 'priority', 'completed', 'category_id', 'reminder_datetime', 'created_at']
+
+def _publish_task_event(event_type, user_id, data, old_completed=None, new_completed=None):
+    """Publica, após o commit, a alteração de uma tarefa e a variação das estatísticas
+
+    old_completed/new_completed None indicam que a tarefa não existia antes
+    (criação) ou deixou de existir (exclusão). Retorna a variação, devolvida
+    também na resposta para o cliente que fez a escrita.
+    """
+    on_commit(event_broker.publish, user_id, event_type, data)
+    
+    delta = {'total_tasks': 0, 'completed_tasks': 0, 'pending_tasks': 0}
+    for completed, sign in ((old_completed, -1), (new_completed, 1)):
+        if completed is not None:
+            delta['total_tasks'] += sign
+            delta['completed_tasks' if completed else 'pending_tasks'] += sign
+    if any(delta.values()):
+        on_commit(event_broker.publish, user_id, 'stats_delta', delta)
+    return delta
+
+def _schedule_reminder(task):
+    """Agenda o lembrete da tarefa após o commit (a tarefa já deve ter id)"""
+    if task.reminder_datetime and not task.completed and not task.notified:
+        on_commit(reminder_scheduler.schedule_entry, task.id, task.user_id, task.reminder_datetime)
+
+def _describe_changes(task):
+    """Lista os campos com alterações ainda não gravadas, a partir do histórico de atributos
+
+    Apenas os nomes vão para o log de atividades (nunca os valores, como o
+    texto da tarefa). Deve ser chamada antes do flush, que zera o histórico.
+    """
+    state = db.inspect(task)
+    changes = []
+    for key in TRACKED_FIELDS:
+        history = state.attrs[key].history
+        if not history.has_changes():
+            continue
+        old_value = history.deleted[0] if history.deleted else None
+        new_value = history.added[0] if history.added else None
+        if old_value != new_value:
+            changes.append(key)
+    return changes
+
 # ==================== ROTAS DE TAREFAS ====================
 
 @task_bp.route('/tasks', methods=['GET'])
+@cached_response
 def get_tasks():
-    """Obter todas as tarefas do usuário"""
+    """Obter tarefas do usuário com paginação por cursor (keyset)
+
+    Parâmetros opcionais:
+    - limit: tamanho da página (padrão 50, máximo 200)
+    - cursor: valor opaco `next_cursor` retornado pela página anterior
+    - fields: lista de campos separados por vírgula (ex.: id,text,priority)
+    - include_total: se 'true', calcula o total de tarefas com os mesmos filtros
+    - category_format: 'embed' (padrão) inclui a categoria em cada tarefa;
+      'map' retorna as categorias uma única vez em `categories`
+    """
     try:
-        user_id = request.args.get('user_id', 1, type=int)
+        user_id = current_user_id()
         
-        # Filtros opcionais
-        completed = request.args.get('completed')
-        priority = request.args.get('priority')
-        category_id = request.args.get('category_id', type=int)
+        try:
+            limit, fields, category_format = _list_options()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        query = Task.query.filter_by(user_id=user_id)
+        # Total calculado separadamente e apenas quando solicitado
+        total = None
+        if request.args.get('include_total', '').lower() == 'true':
+            count = _filter_tasks(db.select(db.func.count(Task.id)).where(Task.user_id == user_id))
+            total = read_rows(count).scalar()
         
-        if completed is not None:
-            query = query.filter_by(completed=completed.lower() == 'true')
+        # Colunas dos campos pedidos, com a categoria no mesmo SELECT; filtros opcionais
+        statement = _filter_tasks(select_tasks(fields, category_format).where(Task.user_id == user_id))
         
-        if priority:
-            query = query.filter_by(priority=priority)
-            
-        if category_id:
-            query = query.filter_by(category_id=category_id)
+        if request.args.get('cursor'):
+            try:
+                cursor_created_at, cursor_id = _decode_cursor(request.args['cursor'])
+            except ValueError:
+                return jsonify({'success': False, 'error': 'Cursor inválido'}), 400
+            statement = statement.where(db.or_(
+                Task.created_at < cursor_created_at,
+                db.and_(Task.created_at == cursor_created_at, Task.id < cursor_id)
+            ))
         
-        tasks = query.order_by(Task.created_at.desc()).all()
+        # Buscar um registro extra para saber se existe próxima página
+        rows = read_rows(statement.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
-        return jsonify({
+        next_cursor = None
+        if has_more:
+            # As linhas começam por (id, created_at)
+            next_cursor = _encode_cursor(rows[-1][1], rows[-1][0])
+        
+        serialized, categories = serialize_tasks(rows, fields=fields, category_format=category_format)
+        
+        response = {
             'success': True,
-            'tasks': [task.to_dict() for task in tasks],
-            'total': len(tasks)
-        })
+            'tasks': serialized,
+            'next_cursor': next_cursor
+        }
+        if categories is not None:
+            response['categories'] = categories
+        if total is not None:
+            response['total'] = total
+        
+        return jsonify(response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/tasks', methods=['POST'])
+@transactional
 def create_task():
     """Criar nova tarefa"""
     try:
@@ -54,24 +301,20 @@ def create_task():
         if priority not in ['baixa', 'media', 'alta']:
             return jsonify({'success': False, 'error': 'Prioridade inválida'}), 400
         
-        # Validar categoria se fornecida
+        user_id = current_user_id(data.get('user_id', 1))
+        
+        # Validar categoria se fornecida (apenas categorias do próprio usuário)
         category_id = data.get('category_id')
-        if category_id:
-            category = Category.query.get(category_id)
-            if not category:
-                return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
+        if category_id and not _user_category_exists(category_id, user_id):
+            return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
         
         # Validar data do lembrete
         reminder_datetime = None
         if data.get('reminder_datetime'):
             try:
-                # CORREÇÃO ROBUSTA: Aceitar qualquer formato de data e converter para UTC
-                reminder_str = data['reminder_datetime'].replace('Z', '+00:00')
-                reminder_datetime = datetime.fromisoformat(reminder_str) if 'T' in reminder_str else datetime.fromisoformat(f"{reminder_str}T00:00:00+00:00")
-                
                 # CORREÇÃO: Remover completamente a validação de data futura
                 # Isso permite adicionar tarefas com lembretes para qualquer momento
-                
+                reminder_datetime = _parse_reminder(data['reminder_datetime'])
             except ValueError:
                 return jsonify({'success': False, 'error': 'Formato de data inválido'}), 400
         
@@ -81,163 +324,272 @@ def create_task():
             priority=priority,
             category_id=category_id,
             reminder_datetime=reminder_datetime,
-            user_id=data.get('user_id', 1)
+            user_id=user_id
         )
         
         db.session.add(task)
-        db.session.commit()
+        TaskStatCounter.adjust((task.user_id, priority, False, category_id), 1)
+        db.session.flush()
         
         # Registrar atividade
-        ActivityLog.log_activity(
-            user_id=task.user_id,
-            task_id=task.id,
-            action='created',
-            details=f'Tarefa criada: {task.text}'
-        )
-        db.session.commit()
+        audit_writer.log(user_id=task.user_id, task_id=task.id, action='created')
+        _schedule_reminder(task)
+        stats_delta = _publish_task_event('task_created', task.user_id, task.to_dict(fields=EVENT_TASK_FIELDS), new_completed=False)
         
         return jsonify({
             'success': True,
             'task': task.to_dict(),
+            'stats_delta': stats_delta,
             'message': 'Tarefa criada com sucesso'
         }), 201
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@task_bp.route('/tasks/search', methods=['GET'])
+@cached_response
+def search_tasks():
+    """Buscar tarefas pelo texto, ordenadas por relevância (bm25 do índice FTS5)
+
+    Parâmetros:
+    - q: termos da busca; todos devem aparecer, cada um como prefixo
+      ("rel" encontra "Relatório"; acentos e maiúsculas são ignorados)
+    - completed, priority, category_id: mesmos filtros de GET /api/tasks
+    - limit, cursor, fields, category_format: como em GET /api/tasks
+    Sem FTS5 no SQLite a busca usa LIKE e as tarefas vêm em ordem de id.
+    """
+    try:
+        user_id = current_user_id()
+        
+        terms = TaskSearch.terms(request.args.get('q'))[:SEARCH_MAX_TERMS]
+        if not terms:
+            return jsonify({'success': False, 'error': 'Termo de busca é obrigatório'}), 400
+        
+        try:
+            limit, fields, category_format = _list_options()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        statement = _filter_tasks(select_tasks(fields, category_format).where(Task.user_id == user_id))
+        
+        if TaskSearch.available:
+            fts = db.literal_column('tasks_fts')
+            rank = db.literal_column('tasks_fts.rank')
+            statement = statement.join_from(Task, tasks_fts, tasks_fts.c.rowid == Task.id).where(
+                fts.op('MATCH')(TaskSearch.match_expression(terms))
+            )
+        else:
+            rank = db.literal(0.0)
+            for term in terms:
+                escaped = term.replace('_', '\\_')
+                statement = statement.where(Task.text.ilike(f'%{escaped}%', escape='\\'))
+        
+        if request.args.get('cursor'):
+            try:
+                cursor_rank, cursor_id = _decode_rank_cursor(request.args['cursor'])
+            except ValueError:
+                return jsonify({'success': False, 'error': 'Cursor inválido'}), 400
+            statement = statement.where(db.or_(
+                rank > cursor_rank,
+                db.and_(rank == cursor_rank, Task.id > cursor_id)
+            ))
+        
+        # O rank vai na última coluna: as anteriores são as de select_tasks
+        rows = read_rows(statement.add_columns(rank).order_by(rank, Task.id).limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        next_cursor = None
+        if has_more:
+            next_cursor = _encode_rank_cursor(rows[-1][-1], rows[-1][0])
+        
+        serialized, categories = serialize_tasks(rows, fields=fields, category_format=category_format)
+        
+        response = {
+            'success': True,
+            'tasks': serialized,
+            'next_cursor': next_cursor
+        }
+        if categories is not None:
+            response['categories'] = categories
+        
+        return jsonify(response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@task_bp.route('/tasks/changes', methods=['GET'])
+@cached_response
+def get_task_changes():
+    """Sincronização incremental: tarefas, categorias e exclusões após uma versão
+
+    Sem `since` (ou com since=0) retorna o estado completo. O cliente deve
+    guardar o `version` retornado e enviá-lo como `since` na próxima chamada.
+    Tarefas, categorias e exclusões devem ser aplicadas em ordem de `version`
+    (o SQLite pode reutilizar o id de uma tarefa excluída). Se os tombstones
+    posteriores a `since` já foram removidos (TOMBSTONE_RETENTION_DAYS), a
+    resposta traz o estado completo com `reset: true` e o cliente deve
+    substituir os dados locais.
+    
+    A resposta é gerada em streaming direto das linhas do banco, sem objetos do
+    ORM: a sincronização completa de contas grandes usa memória constante.
+    """
+    try:
+        user_id = current_user_id()
+        since = request.args.get('since', 0, type=int)
+        
+        version, pruned_version = db.session.execute(
+            db.select(SyncVersion.version, SyncVersion.pruned_version).where(SyncVersion.user_id == user_id)
+        ).first() or (0, 0)
+        reset = 0 < since < pruned_version
+        if reset:
+            since = 0
+        
+        task_fields = [field for field in Task.SERIALIZABLE_FIELDS if field != 'category']
+        tasks_query = select_fields(Task, task_fields).where(Task.user_id == user_id)
+        categories_query = select_fields(Category).where(Category.user_id == user_id)
+        deleted_query = None
+        if since > 0:
+            tasks_query = tasks_query.where(Task.version > since)
+            categories_query = categories_query.where(Category.version > since)
+            deleted_query = db.select(
+                Tombstone.entity, Tombstone.entity_id, Tombstone.version, Tombstone.deleted_at
+            ).where(Tombstone.user_id == user_id, Tombstone.version > since).order_by(Tombstone.version)
+        
+        batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 500)
+        
+        def rows(query, fields):
+            return serialize_rows(read_rows(query, yield_per=batch_size), fields)
+        
+        body = json_stream({
+            'success': True,
+            'version': version,
+            'reset': reset,
+            'tasks': rows(tasks_query.order_by(Task.version, Task.id), task_fields),
+            'categories': rows(categories_query.order_by(Category.version, Category.id), Category.SERIALIZABLE_FIELDS),
+            'deleted': rows(deleted_query, ('entity', 'id', 'version', 'deleted_at')) if deleted_query is not None else []
+        }, batch_size)
+        return Response(stream_with_context(body), mimetype='application/json')
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     """Obter tarefa específica"""
     try:
-        task = Task.query.get_or_404(task_id)
+        rows = read_rows(select_tasks().where(Task.id == task_id, Task.user_id == current_user_id())).all()
+        if not rows:
+            return jsonify({'success': False, 'error': 'Tarefa não encontrada'}), 404
+        tasks, _ = serialize_tasks(rows)
         return jsonify({
             'success': True,
-            'task': task.to_dict()
+            'task': tasks[0]
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/tasks/<int:task_id>', methods=['PUT'])
+@transactional
 def update_task(task_id):
     """Atualizar tarefa"""
     try:
-        task = Task.query.get_or_404(task_id)
+        task = _load_task(task_id)
+        if task is None:
+            return jsonify({'success': False, 'error': 'Tarefa não encontrada'}), 404
         data = request.get_json()
         
         if not data:
             return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
         
-        old_values = {
-            'text': task.text,
-            'priority': task.priority,
-            'category_id': task.category_id,
-            'reminder_datetime': task.reminder_datetime,
-            'completed': task.completed
-        }
+        old_bucket = TaskStatCounter.bucket(task)
         
         # Atualizar campos
-        if 'text' in data:
-            if not data['text'].strip():
-                return jsonify({'success': False, 'error': 'Texto da tarefa não pode estar vazio'}), 400
-            task.text = data['text']
-        
-        if 'priority' in data:
-            if data['priority'] not in ['baixa', 'media', 'alta']:
-                return jsonify({'success': False, 'error': 'Prioridade inválida'}), 400
-            task.priority = data['priority']
-        
-        if 'category_id' in data:
-            if data['category_id'] and not Category.query.get(data['category_id']):
-                return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 400
-            task.category_id = data['category_id']
-        
-        if 'reminder_datetime' in data:
-            if data['reminder_datetime']:
-                try:
-                    # CORREÇÃO ROBUSTA: Aceitar qualquer formato de data e converter para UTC
-                    reminder_str = data['reminder_datetime'].replace('Z', '+00:00')
-                    reminder_datetime = datetime.fromisoformat(reminder_str) if 'T' in reminder_str else datetime.fromisoformat(f"{reminder_str}T00:00:00+00:00")
-                    
-                    # CORREÇÃO: Remover completamente a validação de data futura
-                    
-                    task.reminder_datetime = reminder_datetime
-                    # Resetar flag de notificação se lembrete mudou
-                    if old_values['reminder_datetime'] != reminder_datetime:
-                        task.notified = False
-                except ValueError:
-                    return jsonify({'success': False, 'error': 'Formato de data inválido'}), 400
-            else:
-                task.reminder_datetime = None
-                task.notified = False
+        error = _apply_task_update(task, data)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        if 'completed' in data:
-            if data['completed'] and not task.completed:
-                task.mark_completed()
-            elif not data['completed'] and task.completed:
-                task.mark_uncompleted()
-        
-        db.session.commit()
+        # Antes dos contadores: o upsert deles faz autoflush e zera o histórico de atributos
+        changes = _describe_changes(task)
+        TaskStatCounter.move(old_bucket, TaskStatCounter.bucket(task))
         
         # Registrar atividade
-        changes = []
-        for key, old_value in old_values.items():
-            new_value = getattr(task, key)
-            if old_value != new_value:
-                changes.append(f'{key}: {old_value} → {new_value}')
-        
         if changes:
-            ActivityLog.log_activity(
+            audit_writer.log(
                 user_id=task.user_id,
                 task_id=task.id,
                 action='updated',
                 details=f'Alterações: {", ".join(changes)}'
             )
-            db.session.commit()
+        db.session.flush()
+        
+        if 'reminder_datetime' in data or 'completed' in data:
+            _schedule_reminder(task)
+        stats_delta = _publish_task_event(
+            'task_updated', task.user_id, task.to_dict(fields=EVENT_TASK_FIELDS),
+            old_completed=old_bucket[2], new_completed=task.completed
+        )
         
         return jsonify({
             'success': True,
             'task': task.to_dict(),
+            'stats_delta': stats_delta,
             'message': 'Tarefa atualizada com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/tasks/<int:task_id>', methods=['DELETE'])
+@transactional
 def delete_task(task_id):
     """Deletar tarefa"""
     try:
-        task = Task.query.get_or_404(task_id)
-        task_text = task.text
+        task = _load_task(task_id)
+        if task is None:
+            return jsonify({'success': False, 'error': 'Tarefa não encontrada'}), 404
         user_id = task.user_id
+        was_completed = task.completed
         
-        # Registrar atividade antes de deletar
-        ActivityLog.log_activity(
-            user_id=user_id,
-            task_id=task_id,
-            action='deleted',
-            details=f'Tarefa deletada: {task_text}'
-        )
+        # Registrar atividade sem task_id: o registro sobrevive à exclusão da tarefa
+        audit_writer.log(user_id=user_id, action='deleted', details=f'Tarefa {task_id}')
         
+        TaskStatCounter.adjust(TaskStatCounter.bucket(task), -1)
+        # Logs da tarefa em SQL direto (bancos criados antes do ON DELETE CASCADE não o fazem)
+        ActivityLog.query.filter_by(task_id=task_id).delete(synchronize_session=False)
         db.session.delete(task)
-        db.session.commit()
+        stats_delta = _publish_task_event('task_deleted', user_id, {'id': task_id}, old_completed=was_completed)
         
         return jsonify({
             'success': True,
+            'stats_delta': stats_delta,
             'message': 'Tarefa deletada com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/tasks/toggle/<int:task_id>', methods=['PATCH'])
+@transactional
 def toggle_task(task_id):
     """Alternar status de conclusão da tarefa"""
     try:
-        task = Task.query.get_or_404(task_id)
+        task = _load_task(task_id)
+        if task is None:
+            return jsonify({'success': False, 'error': 'Tarefa não encontrada'}), 404
+        old_bucket = TaskStatCounter.bucket(task)
         
         if task.completed:
             task.mark_uncompleted()
@@ -248,45 +600,521 @@ def toggle_task(task_id):
             action = 'completed'
             message = 'Tarefa concluída'
         
-        db.session.commit()
+        TaskStatCounter.move(old_bucket, TaskStatCounter.bucket(task))
         
         # Registrar atividade
-        ActivityLog.log_activity(
+        audit_writer.log(
             user_id=task.user_id,
             task_id=task.id,
             action=action,
             details=f'Status alterado para: {action}'
         )
-        db.session.commit()
+        db.session.flush()
+        _schedule_reminder(task)
+        stats_delta = _publish_task_event(
+            'task_updated', task.user_id, task.to_dict(fields=EVENT_TASK_FIELDS),
+            old_completed=old_bucket[2], new_completed=task.completed
+        )
         
         return jsonify({
             'success': True,
             'task': task.to_dict(),
+            'stats_delta': stats_delta,
             'message': message
         })
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== OPERAÇÕES EM LOTE ====================
+
+# Limite de operações por requisição em lote
+BULK_MAX_OPERATIONS = 1000
+
+class BulkValidationError(ValueError):
+    """Erro de validação de uma operação em lote (nada é aplicado)"""
+    
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.index = index
+
+def _bulk_filter_condition(user_id, data):
+    """Monta a condição WHERE das operações em lote por filtro ou lista de ids"""
+    condition = Task.user_id == user_id
+    
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(task_id, int) for task_id in ids):
+            raise BulkValidationError('ids deve ser uma lista de inteiros')
+        if len(ids) > BULK_MAX_OPERATIONS:
+            raise BulkValidationError(f'Máximo de {BULK_MAX_OPERATIONS} ids por requisição')
+        condition = db.and_(condition, Task.id.in_(ids))
+    elif 'filter' in data:
+        filters = data['filter']
+        if not isinstance(filters, dict):
+            raise BulkValidationError('filter deve ser um objeto')
+        criteria = []
+        if 'completed' in filters:
+            criteria.append(Task.completed == bool(filters['completed']))
+        if filters.get('priority'):
+            criteria.append(Task.priority == filters['priority'])
+        if filters.get('category_id'):
+            criteria.append(Task.category_id == filters['category_id'])
+        # Um filtro vazio selecionaria todas as tarefas do usuário (ex.: excluir tudo)
+        if not criteria:
+            raise BulkValidationError('filter deve conter completed, priority ou category_id')
+        condition = db.and_(condition, *criteria)
+    else:
+        raise BulkValidationError('Informe "operations", "ids" ou "filter"')
+    
+    return condition
+
+def _bulk_delete(user_id, condition, version):
+    """Deleta as tarefas que satisfazem a condição; retorna os registros de log"""
+    # Equivalente ao cascade de Task.activity_logs, sem carregar os logs no ORM
+    db.session.execute(
+        db.delete(ActivityLog).where(ActivityLog.task_id.in_(db.select(Task.id).where(condition))),
+        execution_options={'synchronize_session': False}
+    )
+    deleted = db.session.execute(
+        db.delete(Task).where(condition).returning(Task.id, Task.priority, Task.completed, Task.category_id),
+        execution_options={'synchronize_session': False}
+    ).all()
+    
+    if deleted:
+        db.session.execute(db.insert(Tombstone), [
+            {'user_id': user_id, 'entity': 'task', 'entity_id': task_id, 'version': version}
+            for task_id, _, _, _ in deleted
+        ])
+    
+    # Contadores ajustados com uma linha por bucket, não por tarefa
+    removed = Counter((user_id, priority, bool(completed), category_id) for _, priority, completed, category_id in deleted)
+    TaskStatCounter.adjust_many({bucket: -count for bucket, count in removed.items()})
+    
+    logs = []
+    for task_id, _, _, _ in deleted:
+        logs.append({
+            'user_id': user_id,
+            'task_id': None,
+            'action': 'deleted',
+            'details': f'Tarefa {task_id}'
+        })
+    return logs
+
+def _bulk_set_completed(user_id, condition, completed, version):
+    """Conclui ou reabre as tarefas que satisfazem a condição; retorna os registros de log"""
+    now = datetime.utcnow()
+    changed = db.session.execute(
+        db.update(Task)
+        .where(condition, Task.completed == (not completed))
+        .values(completed=completed, completed_at=now if completed else None, version=version)
+        .returning(Task.id, Task.priority, Task.category_id),
+        execution_options={'synchronize_session': False}
+    ).all()
+    
+    TaskStatCounter.move_many(
+        ((user_id, priority, not completed, category_id), (user_id, priority, completed, category_id))
+        for _, priority, category_id in changed
+    )
+    
+    action = 'completed' if completed else 'uncompleted'
+    logs = []
+    for task_id, _, _ in changed:
+        logs.append({
+            'user_id': user_id,
+            'task_id': task_id,
+            'action': action,
+            'details': f'Status alterado para: {action}'
+        })
+    return logs
+
+def _bulk_toggle(user_id, task_ids, version):
+    """Alterna o status das tarefas informadas; retorna os registros de log"""
+    if not task_ids:
+        return []
+    # No UPDATE do SQLite as expressões usam os valores anteriores da linha
+    toggled = db.session.execute(
+        db.update(Task)
+        .where(Task.user_id == user_id, Task.id.in_(task_ids))
+        .values(
+            completed=db.not_(Task.completed),
+            completed_at=db.case((Task.completed == db.true(), None), else_=datetime.utcnow()),
+            version=version
+        )
+        .returning(Task.id, Task.priority, Task.completed, Task.category_id),
+        execution_options={'synchronize_session': False}
+    ).all()
+    
+    TaskStatCounter.move_many(
+        ((user_id, priority, not completed, category_id), (user_id, priority, bool(completed), category_id))
+        for _, priority, completed, category_id in toggled
+    )
+    
+    logs = []
+    for task_id, _, completed, _ in toggled:
+        action = 'completed' if completed else 'uncompleted'
+        logs.append({
+            'user_id': user_id,
+            'task_id': task_id,
+            'action': action,
+            'details': f'Status alterado para: {action}'
+        })
+    return logs
+
+def _bulk_operations(user_id, operations, version):
+    """Valida e aplica uma lista mista de operações
+
+    Retorna (resumo, registros de log, lembretes a agendar após o commit).
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BulkValidationError('operations deve ser uma lista não vazia')
+    if len(operations) > BULK_MAX_OPERATIONS:
+        raise BulkValidationError(f'Máximo de {BULK_MAX_OPERATIONS} operações por requisição')
+    
+    creates, updates, toggles, deletes = [], {}, [], []
+    seen_ids = set()
+    category_ids = set()
+    
+    # Validação completa antes de qualquer escrita
+    for index, operation in enumerate(operations):
+        action = operation.get('action') if isinstance(operation, dict) else None
+        if action == 'create':
+            if not operation.get('text'):
+                raise BulkValidationError('Texto da tarefa é obrigatório', index)
+            priority = operation.get('priority', 'media')
+            if priority not in ['baixa', 'media', 'alta']:
+                raise BulkValidationError('Prioridade inválida', index)
+            reminder_datetime = None
+            if operation.get('reminder_datetime'):
+                try:
+                    reminder_datetime = _parse_reminder(operation['reminder_datetime'])
+                except ValueError:
+                    raise BulkValidationError('Formato de data inválido', index)
+            if operation.get('category_id'):
+                category_ids.add(operation['category_id'])
+            creates.append({
+                'text': operation['text'],
+                'priority': priority,
+                'category_id': operation.get('category_id'),
+                'reminder_datetime': reminder_datetime,
+                'user_id': user_id,
+                'version': version
+            })
+        elif action in ('update', 'toggle', 'delete'):
+            task_id = operation.get('id')
+            if not isinstance(task_id, int):
+                raise BulkValidationError('id da tarefa é obrigatório', index)
+            if task_id in seen_ids:
+                raise BulkValidationError(f'Tarefa {task_id} aparece em mais de uma operação', index)
+            seen_ids.add(task_id)
+            if action == 'update':
+                updates[task_id] = (index, operation)
+            elif action == 'toggle':
+                toggles.append(task_id)
+            else:
+                deletes.append(task_id)
+        else:
+            raise BulkValidationError('Ação inválida', index)
+    
+    # Categorias das novas tarefas resolvidas numa única consulta
+    if category_ids:
+        found = {category_id for (category_id,) in db.session.query(Category.id).filter(
+            Category.user_id == user_id, Category.id.in_(category_ids)
+        )}
+        for index, operation in enumerate(operations):
+            if operation.get('action') == 'create' and operation.get('category_id') and operation['category_id'] not in found:
+                raise BulkValidationError('Categoria não encontrada', index)
+    
+    logs = []
+    scheduled = []
+    summary = {'created': [], 'updated': 0, 'toggled': 0, 'deleted': 0}
+    
+    if creates:
+        created_ids = db.session.scalars(
+            db.insert(Task).returning(Task.id, sort_by_parameter_order=True), creates
+        ).all()
+        TaskStatCounter.adjust_many(Counter((user_id, row['priority'], False, row['category_id']) for row in creates))
+        for task_id, row in zip(created_ids, creates):
+            if row['reminder_datetime']:
+                scheduled.append((task_id, user_id, row['reminder_datetime']))
+            logs.append({
+                'user_id': user_id,
+                'task_id': task_id,
+                'action': 'created'
+            })
+        summary['created'] = created_ids
+    
+    if updates:
+        tasks = Task.query.filter(Task.user_id == user_id, Task.id.in_(updates)).all()
+        if len(tasks) != len(updates):
+            missing = set(updates) - {task.id for task in tasks}
+            raise BulkValidationError('Tarefa não encontrada', updates[min(missing)][0])
+        for task in tasks:
+            index, operation = updates[task.id]
+            old_bucket = TaskStatCounter.bucket(task)
+            error = _apply_task_update(task, operation)
+            if error:
+                raise BulkValidationError(error, index)
+            changes = _describe_changes(task)
+            TaskStatCounter.move(old_bucket, TaskStatCounter.bucket(task))
+            if task.reminder_datetime and not task.completed and not task.notified:
+                scheduled.append((task.id, user_id, task.reminder_datetime))
+            if changes:
+                logs.append({
+                    'user_id': user_id,
+                    'task_id': task.id,
+                    'action': 'updated',
+                    'details': f'Alterações: {", ".join(changes)}'
+                })
+        db.session.flush()
+        summary['updated'] = len(tasks)
+    
+    toggle_logs = _bulk_toggle(user_id, toggles, version)
+    summary['toggled'] = len(toggle_logs)
+    logs.extend(toggle_logs)
+    
+    if deletes:
+        delete_logs = _bulk_delete(user_id, db.and_(Task.user_id == user_id, Task.id.in_(deletes)), version)
+        summary['deleted'] = len(delete_logs)
+        logs.extend(delete_logs)
+    
+    return summary, logs, scheduled
+
+@task_bp.route('/tasks/bulk', methods=['POST'])
+@transactional
+def bulk_tasks():
+    """Aplicar operações em lote sobre tarefas numa única transação
+
+    Formatos aceitos:
+    - {"operations": [{"action": "create", "text": ...}, {"action": "update", "id": 1, ...},
+      {"action": "toggle", "id": 2}, {"action": "delete", "id": 3}]}
+    - {"action": "delete" | "complete" | "uncomplete", "filter": {"completed": true, ...}}
+    - {"action": "delete" | "complete" | "uncomplete", "ids": [1, 2, 3]}
+    Em caso de erro de validação nenhuma operação é aplicada.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'success': False, 'error': 'Dados não fornecidos'}), 400
+        
+        user_id = current_user_id(data.get('user_id', 1))
+        
+        # Escritas em SQL direto não passam pelo ORM: versão de sincronização atribuída aqui
+        version = SyncVersion.bump(user_id)
+        
+        scheduled = []
+        if 'operations' in data:
+            summary, logs, scheduled = _bulk_operations(user_id, data['operations'], version)
+        else:
+            action = data.get('action')
+            if action not in ('delete', 'complete', 'uncomplete'):
+                raise BulkValidationError('Ação inválida')
+            condition = _bulk_filter_condition(user_id, data)
+            summary = {'created': [], 'updated': 0, 'toggled': 0, 'deleted': 0}
+            if action == 'delete':
+                logs = _bulk_delete(user_id, condition, version)
+                summary['deleted'] = len(logs)
+            else:
+                logs = _bulk_set_completed(user_id, condition, action == 'complete', version)
+                summary['updated'] = len(logs)
+        
+        # Registrar todas as atividades com um único executemany
+        audit_writer.log_many(logs)
+        
+        for entry in scheduled:
+            on_commit(reminder_scheduler.schedule_entry, *entry)
+        # Lotes podem afetar muitas tarefas: o cliente recarrega a listagem
+        on_commit(event_broker.publish, user_id, 'tasks_changed', summary)
+        
+        return jsonify({
+            'success': True,
+            **summary,
+            'message': 'Operações em lote aplicadas com sucesso'
+        })
+        
+    except BulkValidationError as e:
+        error = {'success': False, 'error': str(e)}
+        if e.index is not None:
+            error['index'] = e.index
+        return jsonify(error), 400
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== ROTAS DE LEMBRETES ====================
+
+@task_bp.route('/reminders/due', methods=['GET'])
+@transactional
+def get_due_reminders():
+    """Obter lembretes que vencem nos próximos minutos
+
+    Os lembretes retornados são marcados como notificados de forma atômica.
+    Parâmetros opcionais:
+    - tz_offset: diferença do fuso do cliente em minutos (Date.getTimezoneOffset)
+    - since: `horizon` retornado pela consulta anterior; lembretes já notificados
+      por outra aba com data posterior a `since` também são retornados
+    """
+    try:
+        user_id = current_user_id()
+        tz_offset = request.args.get('tz_offset', 0, type=int)
+        
+        since = None
+        if request.args.get('since'):
+            try:
+                since = datetime.fromisoformat(request.args['since'])
+            except ValueError:
+                return jsonify({'success': False, 'error': 'Formato de data inválido'}), 400
+        
+        # Lembretes são gravados no horário local do cliente
+        now = datetime.utcnow() - timedelta(minutes=tz_offset)
+        claimed_ids, horizon = reminder_scheduler.claim_due(user_id, now)
+        
+        conditions = []
+        if claimed_ids:
+            conditions.append(Task.id.in_(claimed_ids))
+        if since is not None:
+            conditions.append(db.and_(
+                Task.notified == db.true(),
+                Task.reminder_datetime > since,
+                Task.reminder_datetime <= horizon
+            ))
+        
+        reminders = []
+        if conditions:
+            fields = ['id', 'text', 'category', 'reminder_datetime']
+            rows = read_rows(select_tasks(fields).where(
+                Task.user_id == user_id,
+                Task.completed == db.false(),
+                db.or_(*conditions)
+            ).order_by(Task.reminder_datetime)).all()
+            reminders, _ = serialize_tasks(rows, fields=fields)
+        
+        return jsonify({
+            'success': True,
+            'reminders': reminders,
+            'horizon': horizon.isoformat()
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ==================== ROTAS DE ATIVIDADES ====================
+
+@task_bp.route('/activity', methods=['GET'])
+def get_activity():
+    """Obter o log de atividades do usuário, do mais recente para o mais antigo
+
+    Paginação por cursor (keyset) sobre o índice (user_id, created_at).
+    Parâmetros opcionais:
+    - limit: tamanho da página (padrão 50, máximo 200)
+    - cursor: valor opaco `next_cursor` retornado pela página anterior
+    """
+    try:
+        user_id = current_user_id()
+        
+        limit = request.args.get('limit', TASKS_DEFAULT_LIMIT, type=int)
+        if limit < 1:
+            return jsonify({'success': False, 'error': 'Limite inválido'}), 400
+        limit = min(limit, TASKS_MAX_LIMIT)
+        
+        statement = select_fields(ActivityLog).where(ActivityLog.user_id == user_id)
+        
+        if request.args.get('cursor'):
+            try:
+                cursor_created_at, cursor_id = _decode_cursor(request.args['cursor'])
+            except ValueError:
+                return jsonify({'success': False, 'error': 'Cursor inválido'}), 400
+            statement = statement.where(db.or_(
+                ActivityLog.created_at < cursor_created_at,
+                db.and_(ActivityLog.created_at == cursor_created_at, ActivityLog.id < cursor_id)
+            ))
+        
+        statement = statement.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(limit + 1)
+        logs = read_dicts(statement, ActivityLog.SERIALIZABLE_FIELDS)
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+        
+        return jsonify({
+            'success': True,
+            'activity': logs,
+            'next_cursor': _encode_cursor(logs[-1]['created_at'], logs[-1]['id']) if has_more else None
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@task_bp.route('/activity/daily', methods=['GET'])
+def get_daily_activity():
+    """Obter o total diário de atividades por ação
+
+    Dias já compactados vêm de activity_daily_counts; os demais são agregados
+    a partir do log. Parâmetro opcional: days (padrão 30, máximo 366).
+    """
+    try:
+        user_id = current_user_id()
+        days = request.args.get('days', 30, type=int)
+        if days < 1:
+            return jsonify({'success': False, 'error': 'Período inválido'}), 400
+        days = min(days, 366)
+        
+        start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+        
+        totals = {}
+        rollups = db.select(
+            ActivityDailyCount.day, ActivityDailyCount.action, ActivityDailyCount.activity_count
+        ).where(ActivityDailyCount.user_id == user_id, ActivityDailyCount.day >= start.date())
+        live = db.select(
+            db.func.date(ActivityLog.created_at), ActivityLog.action, db.func.count()
+        ).where(ActivityLog.user_id == user_id, ActivityLog.created_at >= start).group_by(
+            db.func.date(ActivityLog.created_at), ActivityLog.action
+        )
+        for day, action, count in read_rows(rollups).all() + read_rows(live).all():
+            key = (str(day), action)
+            totals[key] = totals.get(key, 0) + count
+        
+        return jsonify({
+            'success': True,
+            'daily': [
+                {'day': day, 'action': action, 'count': count}
+                for (day, action), count in sorted(totals.items())
+            ]
+        })
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ==================== ROTAS DE CATEGORIAS ====================
 
 @task_bp.route('/categories', methods=['GET'])
+@cached_response
 def get_categories():
     """Obter todas as categorias do usuário"""
     try:
-        user_id = request.args.get('user_id', 1, type=int)
-        categories = Category.query.filter_by(user_id=user_id).order_by(Category.name).all()
+        user_id = current_user_id()
+        statement = select_fields(Category).where(Category.user_id == user_id).order_by(Category.name)
         
         return jsonify({
             'success': True,
-            'categories': [category.to_dict() for category in categories]
+            'categories': read_dicts(statement, Category.SERIALIZABLE_FIELDS)
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/categories', methods=['POST'])
+@transactional
 def create_category():
     """Criar nova categoria"""
     try:
@@ -295,7 +1123,7 @@ def create_category():
         if not data or not data.get('name'):
             return jsonify({'success': False, 'error': 'Nome da categoria é obrigatório'}), 400
         
-        user_id = data.get('user_id', 1)
+        user_id = current_user_id(data.get('user_id', 1))
         
         # Verificar se categoria já existe para o usuário
         existing = Category.query.filter_by(name=data['name'], user_id=user_id).first()
@@ -309,7 +1137,8 @@ def create_category():
         )
         
         db.session.add(category)
-        db.session.commit()
+        db.session.flush()
+        on_commit(event_broker.publish, category.user_id, 'category_created', category.to_dict())
         
         return jsonify({
             'success': True,
@@ -317,15 +1146,19 @@ def create_category():
             'message': 'Categoria criada com sucesso'
         }), 201
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/categories/<int:category_id>', methods=['PUT'])
+@transactional
 def update_category(category_id):
     """Atualizar categoria"""
     try:
-        category = Category.query.get_or_404(category_id)
+        category = _load_category(category_id)
+        if category is None:
+            return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 404
         data = request.get_json()
         
         if not data:
@@ -349,7 +1182,8 @@ def update_category(category_id):
         if 'color' in data:
             category.color = data['color']
         
-        db.session.commit()
+        db.session.flush()
+        on_commit(event_broker.publish, category.user_id, 'category_updated', category.to_dict())
         
         return jsonify({
             'success': True,
@@ -357,15 +1191,19 @@ def update_category(category_id):
             'message': 'Categoria atualizada com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/categories/<int:category_id>', methods=['DELETE'])
+@transactional
 def delete_category(category_id):
     """Deletar categoria"""
     try:
-        category = Category.query.get_or_404(category_id)
+        category = _load_category(category_id)
+        if category is None:
+            return jsonify({'success': False, 'error': 'Categoria não encontrada'}), 404
         
         # Verificar se há tarefas usando esta categoria
         tasks_count = Task.query.filter_by(category_id=category_id).count()
@@ -375,48 +1213,69 @@ def delete_category(category_id):
                 'error': f'Não é possível deletar categoria com {tasks_count} tarefa(s) associada(s)'
             }), 400
         
+        user_id = category.user_id
         db.session.delete(category)
-        db.session.commit()
+        if TaskStatCounter.enabled():
+            TaskStatCounter.query.filter_by(user_id=user_id, category_key=category_id).delete()
+        on_commit(event_broker.publish, user_id, 'category_deleted', {'id': category_id})
         
         return jsonify({
             'success': True,
             'message': 'Categoria deletada com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ==================== ROTAS DE ESTATÍSTICAS ====================
 
 @task_bp.route('/stats', methods=['GET'])
+@cached_response
 def get_stats():
-    """Obter estatísticas das tarefas"""
+    """Obter estatísticas das tarefas
+
+    Calculadas a partir de uma única agregação agrupada por (completed, priority,
+    category_id) ou, com STATS_USE_COUNTERS ativo, da tabela task_stat_counters.
+    """
     try:
-        user_id = request.args.get('user_id', 1, type=int)
+        user_id = current_user_id()
         
-        total_tasks = Task.query.filter_by(user_id=user_id).count()
-        completed_tasks = Task.query.filter_by(user_id=user_id, completed=True).count()
+        if TaskStatCounter.enabled():
+            grouped_counts = TaskStatCounter.grouped_counts(user_id)
+        else:
+            grouped_counts = read_rows(db.select(
+                Task.completed, Task.priority, Task.category_id, db.func.count()
+            ).where(Task.user_id == user_id).group_by(
+                Task.completed, Task.priority, Task.category_id
+            )).all()
+        
+        total_tasks = 0
+        completed_tasks = 0
+        priority_stats = {'baixa': 0, 'media': 0, 'alta': 0}
+        pending_by_category = {}
+        for completed, priority, category_id, count in grouped_counts:
+            total_tasks += count
+            if completed:
+                completed_tasks += count
+                continue
+            priority_stats[priority] = priority_stats.get(priority, 0) + count
+            if category_id:
+                pending_by_category[category_id] = pending_by_category.get(category_id, 0) + count
         pending_tasks = total_tasks - completed_tasks
         
-        # Estatísticas por prioridade
-        priority_stats = {}
-        for priority in ['baixa', 'media', 'alta']:
-            priority_stats[priority] = Task.query.filter_by(
-                user_id=user_id, 
-                priority=priority, 
-                completed=False
-            ).count()
-        
-        # Estatísticas por categoria
+        # Estatísticas por categoria (apenas categorias com tarefas pendentes)
         category_stats = []
-        categories = Category.query.filter_by(user_id=user_id).all()
-        for category in categories:
-            task_count = Task.query.filter_by(category_id=category.id, completed=False).count()
-            if task_count > 0:
+        if pending_by_category:
+            statement = select_fields(Category).where(
+                Category.user_id == user_id,
+                Category.id.in_(pending_by_category)
+            ).order_by(Category.id)
+            for category in read_dicts(statement, Category.SERIALIZABLE_FIELDS):
                 category_stats.append({
-                    'category': category.to_dict(),
-                    'task_count': task_count
+                    'category': category,
+                    'task_count': pending_by_category[category['id']]
                 })
         
         return jsonify({
@@ -431,32 +1290,42 @@ def get_stats():
             }
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ==================== ROTAS DE CONFIGURAÇÕES ====================
 
 @task_bp.route('/settings/<int:user_id>', methods=['GET'])
+@cached_response
+@transactional
 def get_user_settings(user_id):
     """Obter configurações do usuário"""
     try:
-        settings = UserSettings.query.filter_by(user_id=user_id).first()
+        settings = read_one(
+            select_fields(UserSettings).where(UserSettings.user_id == user_id), UserSettings.SERIALIZABLE_FIELDS
+        )
         
         if not settings:
             # Criar configurações padrão
-            settings = UserSettings(user_id=user_id)
-            db.session.add(settings)
-            db.session.commit()
+            created = UserSettings(user_id=user_id)
+            db.session.add(created)
+            db.session.flush()
+            settings = created.to_dict()
         
         return jsonify({
             'success': True,
-            'settings': settings.to_dict()
+            'settings': settings
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @task_bp.route('/settings/<int:user_id>', methods=['PUT'])
+@transactional
 def update_user_settings(user_id):
     """Atualizar configurações do usuário"""
     try:
@@ -483,7 +1352,7 @@ def update_user_settings(user_id):
                 return jsonify({'success': False, 'error': 'Prioridade padrão inválida'}), 400
             settings.default_priority = data['default_priority']
         
-        db.session.commit()
+        db.session.flush()
         
         return jsonify({
             'success': True,
@@ -491,6 +1360,7 @@ def update_user_settings(user_id):
             'message': 'Configurações atualizadas com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,23 +1,35 @@
 from flask import Blueprint, jsonify, request
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.exceptions import HTTPException
+from werkzeug.security import check_password_hash
 from src.models.user import User, db
-from src.models.task import UserSettings
+from src.models.queries import read_dicts, read_one, select_fields
+from src.models.task import ActivityDailyCount, ActivityLog, Category, Task, TaskStatCounter, UserSettings
+from src.models.sync import SyncVersion, Tombstone
+from src.services.auth import token_auth
+from src.services.unit_of_work import transactional
 
 user_bp = Blueprint('user', __name__)
 
+# Tabelas com registros do usuário, na ordem de exclusão
+USER_OWNED_MODELS = (
+    ActivityLog, ActivityDailyCount, Tombstone, SyncVersion, TaskStatCounter, Task, Category, UserSettings
+)
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
     """Obter todos os usuários (apenas para fins administrativos)"""
     try:
-        users = User.query.all()
         return jsonify({
             'success': True,
-            'users': [user.to_dict() for user in users]
+            'users': read_dicts(select_fields(User), User.SERIALIZABLE_FIELDS)
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @user_bp.route('/users', methods=['POST'])
+@transactional
 def create_user():
     """Registrar novo usuário"""
     try:
@@ -40,44 +52,54 @@ def create_user():
         user = User(
             username=data['username'],
             email=data['email'],
-            password_hash=generate_password_hash(data['password'])
+            password_hash=token_auth.hash_password(data['password'])
         )
         
         db.session.add(user)
-        db.session.commit()
+        db.session.flush()
         
         # Criar configurações padrão para o usuário
         settings = UserSettings(user_id=user.id)
         db.session.add(settings)
-        db.session.commit()
+        db.session.flush()
         
         return jsonify({
             'success': True,
             'user': user.to_dict(),
+            'token': token_auth.issue(user.id),
+            'expires_in': token_auth.max_age,
             'message': 'Usuário criado com sucesso'
         }), 201
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Obter usuário específico"""
     try:
-        user = User.query.get_or_404(user_id)
+        user = read_one(select_fields(User).where(User.id == user_id), User.SERIALIZABLE_FIELDS)
+        if not user:
+            return jsonify({'success': False, 'error': 'Usuário não encontrado'}), 404
         return jsonify({
             'success': True,
-            'user': user.to_dict()
+            'user': user
         })
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
+@transactional
 def update_user(user_id):
     """Atualizar usuário"""
     try:
-        user = User.query.get_or_404(user_id)
+        user = db.session.get(User, user_id)
+        if user is None:
+            return jsonify({'success': False, 'error': 'Usuário não encontrado'}), 404
         data = request.get_json()
         
         if not data:
@@ -110,9 +132,9 @@ def update_user(user_id):
             if not data['password'] or len(data['password']) < 6:
                 return jsonify({'success': False, 'error': 'Senha deve ter pelo menos 6 caracteres'}), 400
             
-            user.password_hash = generate_password_hash(data['password'])
+            user.password_hash = token_auth.hash_password(data['password'])
         
-        db.session.commit()
+        db.session.flush()
         
         return jsonify({
             'success': True,
@@ -120,35 +142,50 @@ def update_user(user_id):
             'message': 'Usuário atualizado com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@transactional
 def delete_user(user_id):
     """Deletar usuário"""
     try:
-        user = User.query.get_or_404(user_id)
+        user = db.session.get(User, user_id)
+        if user is None:
+            return jsonify({'success': False, 'error': 'Usuário não encontrado'}), 404
         
         # Não permitir deletar o usuário padrão
         if user_id == 1:
             return jsonify({'success': False, 'error': 'Não é possível deletar o usuário padrão'}), 400
         
+        # Um DELETE ... WHERE user_id = ? por tabela, sem carregar os registros no ORM.
+        # O ON DELETE CASCADE faria o mesmo, mas bancos criados antes dele não o têm.
+        # Ordem: filhos antes dos pais (logs → tarefas → categorias)
+        for model in USER_OWNED_MODELS:
+            model.query.filter_by(user_id=user_id).delete(synchronize_session=False)
         db.session.delete(user)
-        db.session.commit()
         
         return jsonify({
             'success': True,
             'message': 'Usuário deletado com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
-        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @user_bp.route('/login', methods=['POST'])
+@transactional
 def login():
-    """Autenticar usuário"""
+    """Autenticar usuário
+
+    Retorna o token de sessão (`token`), a ser enviado nas demais requisições
+    no cabeçalho `Authorization: Bearer <token>`; apenas aqui a senha é
+    verificada. Hashes gerados com outro método são regravados com o atual.
+    """
     try:
         data = request.get_json()
         
@@ -161,11 +198,19 @@ def login():
         if not user or not check_password_hash(user.password_hash, data['password']):
             return jsonify({'success': False, 'error': 'Credenciais inválidas'}), 401
         
+        # Parâmetros de custo do hash alterados desde a gravação: regravar com os atuais
+        if token_auth.needs_rehash(user.password_hash):
+            user.password_hash = token_auth.hash_password(data['password'])
+        
         return jsonify({
             'success': True,
             'user': user.to_dict(),
+            'token': token_auth.issue(user.id),
+            'expires_in': token_auth.max_age,
             'message': 'Login realizado com sucesso'
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
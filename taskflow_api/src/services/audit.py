@@ -0,0 +1,186 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.task import ActivityLog, Task
+from src.services.unit_of_work import on_commit
+
+# Marcador que encerra a thread de gravação
+_STOP = object()
+
+class AuditWriter:
+    """Registro do log de atividades, síncrono ou em lotes por uma thread de fundo
+
+    Os registros são eventos estruturados: ação, tarefa (task_id) e, em
+    details, apenas metadados (campos alterados, id da tarefa excluída),
+    nunca o texto da tarefa.
+
+    Modos (ACTIVITY_LOG_MODE):
+    - 'sync': as atividades são inseridas na transação da requisição e gravadas
+      junto com a alteração que descrevem (nenhum registro se perde);
+    - 'batched': após o commit, as atividades entram numa fila limitada a
+      ACTIVITY_LOG_QUEUE_SIZE linhas e uma
+      thread as grava com executemany ao atingir ACTIVITY_LOG_BATCH_SIZE linhas
+      ou ACTIVITY_LOG_FLUSH_SECONDS segundos. Registros ainda na fila se perdem
+      se o processo for encerrado à força; a fila é esvaziada no encerramento normal.
+
+    Com a fila cheia a requisição espera até ACTIVITY_LOG_ENQUEUE_TIMEOUT
+    segundos por espaço e, se ainda assim não houver, grava o lote ela mesma;
+    lotes maiores que a fila inteira (ex.: importações) são sempre gravados
+    pela própria requisição.
+    """
+
+    def __init__(self):
+        self.mode = 'sync'
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.enqueue_timeout = 1.0
+        self.max_pending_rows = 10000
+        self.dropped = 0
+        self._app = None
+        self._queue = queue.Queue()
+        self._pending_rows = 0
+        self._space = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.shutdown)
+
+    def init_app(self, app):
+        # Registros pendentes da aplicação anterior são gravados antes da troca
+        self.shutdown()
+        self.mode = app.config.get('ACTIVITY_LOG_MODE', 'sync')
+        if self.mode not in ('sync', 'batched'):
+            raise ValueError(f'ACTIVITY_LOG_MODE inválido: {self.mode}')
+        self.batch_size = app.config.get('ACTIVITY_LOG_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('ACTIVITY_LOG_FLUSH_SECONDS', 1.0)
+        self.enqueue_timeout = app.config.get('ACTIVITY_LOG_ENQUEUE_TIMEOUT', 1.0)
+        self.max_pending_rows = app.config.get('ACTIVITY_LOG_QUEUE_SIZE', 10000)
+        self._app = app
+        self._queue = queue.Queue()
+        self._pending_rows = 0
+
+    def log(self, user_id, action, task_id=None, details=None):
+        """Registra uma atividade da requisição atual"""
+        self.log_many([{'user_id': user_id, 'task_id': task_id, 'action': action, 'details': details}])
+
+    def log_many(self, rows):
+        """Registra várias atividades (dicts com user_id, task_id, action e details opcional)"""
+        if not rows:
+            return
+        now = datetime.utcnow()
+        rows = [{'details': None, **row, 'created_at': now} for row in rows]
+        if self.mode == 'sync':
+            ActivityLog.log_many(rows)
+        else:
+            # Apenas alterações confirmadas entram no log
+            on_commit(self._enqueue, rows)
+
+    def _enqueue(self, rows):
+        if len(rows) > self.max_pending_rows:
+            # Lote maior que a fila inteira: gravado pela própria requisição
+            self._write(rows)
+            return
+        self._ensure_thread()
+        with self._space:
+            # Contrapressão: a fila é limitada pelo número de linhas, não de lotes
+            queued = self._space.wait_for(
+                lambda: self._pending_rows + len(rows) <= self.max_pending_rows, self.enqueue_timeout
+            )
+            if queued:
+                self._pending_rows += len(rows)
+        if not queued:
+            # A fila não esvaziou a tempo, a requisição grava o próprio lote
+            self._write(rows)
+            return
+        self._queue.put(rows)
+
+    def _release(self, count):
+        with self._space:
+            self._pending_rows -= count
+            self._space.notify_all()
+
+    def _ensure_thread(self):
+        with self._lock:
+            # Após um fork (gunicorn --preload) a thread do processo pai não existe no filho
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(self._app, self._queue), name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self, app, pending):
+        batch = []
+        acknowledged = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = pending.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if isinstance(item, threading.Event):
+                acknowledged.append(item)
+            elif item is not None and not stop:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.extend(item)
+
+            if batch and (stop or acknowledged or item is None or len(batch) >= self.batch_size):
+                self._write(batch, app)
+                self._release(len(batch))
+                batch = []
+            for event in acknowledged:
+                event.set()
+            acknowledged = []
+            if stop:
+                return
+
+    def _write(self, rows, app=None):
+        app = app or self._app
+        try:
+            with app.app_context():
+                try:
+                    ActivityLog.log_many(rows)
+                    db.session.commit()
+                except IntegrityError:
+                    # Tarefas excluídas antes da gravação: seus registros teriam sido
+                    # removidos pelo ON DELETE CASCADE, então são descartados
+                    db.session.rollback()
+                    ActivityLog.log_many(self._existing_tasks_only(rows))
+                    db.session.commit()
+        except Exception:
+            self.dropped += len(rows)
+            app.logger.exception('Falha ao gravar %d registros do log de atividades', len(rows))
+
+    @staticmethod
+    def _existing_tasks_only(rows):
+        task_ids = {row['task_id'] for row in rows if row.get('task_id')}
+        existing = {task_id for (task_id,) in db.session.query(Task.id).filter(Task.id.in_(task_ids))} if task_ids else set()
+        return [row for row in rows if not row.get('task_id') or row['task_id'] in existing]
+
+    def flush(self, timeout=5.0):
+        """Grava imediatamente os registros pendentes; retorna False se não concluiu a tempo"""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Esvazia a fila e encerra a thread de gravação (chamado no encerramento do processo)"""
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._queue.put(_STOP)
+            self._thread = None
+        thread.join(timeout)
+
+audit_writer = AuditWriter()
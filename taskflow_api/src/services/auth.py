@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.security import generate_password_hash
+
+# Rotas /api acessíveis sem token mesmo com AUTH_REQUIRED
+PUBLIC_ENDPOINTS = {'user.login', 'user.create_user', 'metrics.get_metrics'}
+
+class TokenAuth:
+    """Tokens de sessão assinados e identificação do usuário de cada requisição
+
+    Apenas o login paga o custo do hash de senha (PBKDF2/scrypt): ele devolve um
+    token assinado com a SECRET_KEY (itsdangerous) contendo o id do usuário e a
+    data de emissão. As demais requisições enviam o token no cabeçalho
+    `Authorization: Bearer <token>` ou no parâmetro `token` (EventSource e
+    downloads não enviam cabeçalhos) e o usuário é obtido sem consultar o
+    banco: a assinatura é verificada uma vez e o resultado fica num cache LRU
+    de AUTH_TOKEN_CACHE_SIZE tokens até a expiração.
+
+    Os tokens não têm estado no servidor: valem por AUTH_TOKEN_MAX_AGE
+    segundos e trocar a SECRET_KEY invalida todos. Sem token o usuário vem do
+    parâmetro user_id (clientes anteriores aos tokens), a menos que
+    AUTH_REQUIRED esteja ativo.
+    """
+
+    def __init__(self):
+        self.max_age = 7 * 24 * 3600
+        self.cache_size = 10000
+        self.required = False
+        self.hash_method = 'pbkdf2:sha256:600000'
+        self.rehash_on_login = True
+        self._serializer = None
+        self._verified = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age = app.config.get('AUTH_TOKEN_MAX_AGE', 7 * 24 * 3600)
+        self.cache_size = app.config.get('AUTH_TOKEN_CACHE_SIZE', 10000)
+        self.required = app.config.get('AUTH_REQUIRED', False)
+        self.hash_method = app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+        self.rehash_on_login = app.config.get('PASSWORD_REHASH_ON_LOGIN', True)
+        self._serializer = URLSafeTimedSerializer(app.secret_key, salt='taskflow-auth')
+        with self._lock:
+            self._verified.clear()
+        app.before_request(self._authenticate)
+
+    def issue(self, user_id):
+        """Gera o token de sessão do usuário"""
+        return self._serializer.dumps(user_id)
+
+    def verify(self, token):
+        """Retorna o id do usuário do token, ou None se a assinatura for inválida ou o token tiver expirado"""
+        now = time.time()
+        with self._lock:
+            cached = self._verified.get(token)
+            if cached is not None:
+                if cached[1] > now:
+                    self._verified.move_to_end(token)
+                    return cached[0]
+                del self._verified[token]
+
+        try:
+            user_id, issued_at = self._serializer.loads(token, max_age=self.max_age, return_timestamp=True)
+        except BadSignature:  # inclui SignatureExpired
+            return None
+        if not isinstance(user_id, int):
+            return None
+
+        if self.cache_size:
+            with self._lock:
+                self._verified[token] = (user_id, issued_at.timestamp() + self.max_age)
+                # Remover os tokens menos usados até respeitar o limite
+                while len(self._verified) > self.cache_size:
+                    self._verified.popitem(last=False)
+        return user_id
+
+    def hash_password(self, password):
+        """Hash da senha com o método configurado (PASSWORD_HASH_METHOD)"""
+        return generate_password_hash(password, method=self.hash_method)
+
+    def needs_rehash(self, password_hash):
+        """Indica se o hash foi gerado com outro método ou outros parâmetros de custo
+
+        Compara o prefixo gravado no hash (ex.: 'pbkdf2:sha256:600000') com
+        PASSWORD_HASH_METHOD, que por isso deve estar na forma completa.
+        """
+        return self.rehash_on_login and password_hash.split('$', 1)[0] != self.hash_method
+
+    @staticmethod
+    def _request_token():
+        header = request.headers.get('Authorization', '')
+        if header[:7].lower() == 'bearer ':
+            return header[7:].strip()
+        return request.args.get('token')
+
+    def _authenticate(self):
+        """Identifica o usuário da requisição pelo token (before_request)"""
+        g.token_user_id = None
+        if request.method == 'OPTIONS' or not request.path.startswith('/api/'):
+            return None
+
+        token = self._request_token()
+        if token:
+            user_id = self.verify(token)
+            if user_id is None:
+                return jsonify({'success': False, 'error': 'Token inválido ou expirado'}), 401
+            # Rotas com o usuário no caminho (/settings/<user_id>, /users/<user_id>)
+            path_user_id = (request.view_args or {}).get('user_id')
+            if path_user_id is not None and path_user_id != user_id:
+                return jsonify({'success': False, 'error': 'Acesso negado'}), 403
+            g.token_user_id = user_id
+        elif self.required and request.endpoint not in PUBLIC_ENDPOINTS:
+            return jsonify({'success': False, 'error': 'Autenticação necessária'}), 401
+        return None
+
+token_auth = TokenAuth()
+
+def current_user_id(default=None):
+    """Usuário da requisição: o do token de sessão ou, sem token, o informado pelo cliente
+
+    default: usuário informado em outro lugar (ex.: corpo JSON); sem ele, lê o
+    parâmetro user_id da query string (padrão 1).
+    """
+    user_id = g.get('token_user_id')
+    if user_id is not None:
+        return user_id
+    if default is not None:
+        return default
+    return request.args.get('user_id', 1, type=int)
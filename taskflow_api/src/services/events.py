@@ -0,0 +1,113 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from flask import has_request_context, request
+
+class EventBroker:
+    """Feed de alterações por usuário, consumido via Server-Sent Events
+
+    Cada usuário tem um buffer circular com os eventos mais recentes e uma
+    sequência crescente. Os ids enviados ao cliente têm o formato
+    "<época>-<sequência>", em que a época identifica o processo: após um
+    reinício, ou se o evento pedido já saiu do buffer, o cliente recebe um
+    evento `reset` e deve recarregar o estado completo.
+
+    O feed é mantido em memória no processo; com vários workers cada um
+    publica apenas as alterações que ele próprio processou: o cliente aplica
+    as próprias escritas a partir da resposta da requisição e ignora os eventos
+    com o seu "origin" (cabeçalho X-Client-Id). Cada stream ocupa uma thread
+    por até max_duration: sirva a rota com um worker assíncrono.
+    """
+    
+    def __init__(self, buffer_size=500):
+        self.buffer_size = buffer_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._buffers = {}
+        self._sequences = {}
+        self._condition = threading.Condition()
+    
+    def init_app(self, app):
+        self.buffer_size = app.config.get('EVENTS_BUFFER_SIZE', 500)
+    
+    def publish(self, user_id, event_type, data, origin=None):
+        """Publica um evento para o usuário e acorda os streams em espera
+
+        origin identifica a aba que fez a escrita; por padrão, o cabeçalho
+        X-Client-Id da requisição atual.
+        """
+        if origin is None and has_request_context():
+            origin = request.headers.get('X-Client-Id')
+        if origin:
+            data = {**data, 'origin': origin}
+        with self._condition:
+            sequence = self._sequences.get(user_id, 0) + 1
+            self._sequences[user_id] = sequence
+            buffer = self._buffers.get(user_id)
+            if buffer is None:
+                buffer = self._buffers[user_id] = deque(maxlen=self.buffer_size)
+            buffer.append((sequence, event_type, data))
+            self._condition.notify_all()
+        return sequence
+    
+    def parse_event_id(self, event_id):
+        """Converte o Last-Event-ID recebido em sequência; None se for de outra época ou inválido"""
+        if not event_id:
+            return 0
+        epoch, _, sequence = event_id.partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+    
+    def events_since(self, user_id, last_sequence):
+        """Retorna (eventos após last_sequence, reset), onde reset indica lacuna no buffer"""
+        buffer = self._buffers.get(user_id)
+        if not buffer:
+            return [], last_sequence > self._sequences.get(user_id, 0)
+        if last_sequence < buffer[0][0] - 1:
+            return [], True
+        return [event for event in buffer if event[0] > last_sequence], False
+    
+    def wait(self, user_id, last_sequence, timeout):
+        """Bloqueia até haver eventos após last_sequence ou até o timeout"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._sequences.get(user_id, 0) > last_sequence,
+                timeout=timeout
+            )
+            return self.events_since(user_id, last_sequence)
+    
+    def format(self, sequence, event_type, data):
+        """Formata um evento no protocolo text/event-stream"""
+        payload = json.dumps(data, separators=(',', ':'), default=str)
+        return f'id: {self.epoch}-{sequence}\nevent: {event_type}\ndata: {payload}\n\n'
+    
+    def stream(self, user_id, last_event_id=None, heartbeat=15, max_duration=300):
+        """Gera o stream SSE do usuário a partir do Last-Event-ID informado
+
+        O stream é encerrado após max_duration segundos para liberar o worker;
+        o EventSource reconecta sozinho enviando o último id recebido.
+        """
+        last_sequence = self.parse_event_id(last_event_id)
+        yield 'retry: 3000\n\n'
+        
+        if last_sequence is None:
+            last_sequence = self._sequences.get(user_id, 0)
+            yield f'id: {self.epoch}-{last_sequence}\nevent: reset\ndata: {{}}\n\n'
+        
+        deadline = time.monotonic() + max_duration
+        while time.monotonic() < deadline:
+            events, reset = self.wait(user_id, last_sequence, timeout=heartbeat)
+            if reset:
+                last_sequence = self._sequences.get(user_id, 0)
+                yield f'id: {self.epoch}-{last_sequence}\nevent: reset\ndata: {{}}\n\n'
+                continue
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for sequence, event_type, data in events:
+                last_sequence = sequence
+                yield self.format(sequence, event_type, data)
+
+event_broker = EventBroker()
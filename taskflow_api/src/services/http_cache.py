@@ -0,0 +1,116 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, request
+from src.models.user import db
+from src.models.sync import SyncVersion
+from src.services.auth import current_user_id
+
+class ResponseCache:
+    """Validadores HTTP (ETag/Last-Modified) e cache LRU de respostas por usuário
+
+    As respostas são identificadas pela versão de dados do usuário
+    (sync_versions), incrementada a cada escrita via ORM e relida do banco
+    em cada requisição (consulta pela chave primária): escritas feitas em
+    outros workers são vistas imediatamente. O cache LRU dos corpos é mantido
+    por processo e só é usado com um único worker (WORKER_PROCESSES).
+    """
+    
+    def __init__(self):
+        self.enabled = True
+        self.max_bytes = 16 * 1024 * 1024
+        self._bodies = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def init_app(self, app):
+        self.enabled = app.config.get('HTTP_CACHE_ENABLED', True)
+        self.max_bytes = app.config.get('HTTP_CACHE_MAX_BYTES', 16 * 1024 * 1024)
+        if app.config.get('WORKER_PROCESSES', 1) > 1:
+            self.max_bytes = 0
+    
+    def version_for(self, user_id):
+        """Retorna (versão, data da última alteração) do usuário"""
+        row = db.session.query(SyncVersion.version, SyncVersion.updated_at).filter_by(user_id=user_id).first()
+        return row if row else (0, None)
+    
+    def get_body(self, key):
+        with self._lock:
+            entry = self._bodies.get(key)
+            if entry is not None:
+                self._bodies.move_to_end(key)
+            return entry
+    
+    def put_body(self, key, body, mimetype):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._bodies:
+                return
+            self._bodies[key] = (body, mimetype)
+            self._size += size
+            # Remover as entradas menos usadas até respeitar o limite de bytes
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._bodies.popitem(last=False)
+                self._size -= len(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+            self._size = 0
+
+response_cache = ResponseCache()
+
+def _not_modified(etag, last_modified):
+    """Verifica as pré-condições If-None-Match / If-Modified-Since da requisição"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return request.if_modified_since >= last_modified.replace(microsecond=0, tzinfo=request.if_modified_since.tzinfo)
+    return False
+
+def cached_response(view):
+    """Decora rotas GET de leitura por usuário com ETag forte, 304 e cache LRU do corpo
+
+    O usuário é obtido do parâmetro `user_id` da rota ou do token de sessão
+    (sem token, do parâmetro user_id da query string).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not response_cache.enabled:
+            return view(*args, **kwargs)
+        
+        user_id = kwargs.get('user_id') or current_user_id()
+        version, last_modified = response_cache.version_for(user_id)
+        
+        path_digest = hashlib.sha1(request.full_path.encode('utf-8')).hexdigest()[:16]
+        etag = f'{user_id}-{version}-{path_digest}'
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache'}
+        if last_modified:
+            headers['Last-Modified'] = last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        
+        if _not_modified(etag, last_modified):
+            return Response(status=304, headers=headers)
+        
+        key = (user_id, version, request.full_path)
+        cached = response_cache.max_bytes and response_cache.get_body(key)
+        if cached:
+            body, mimetype = cached
+            return Response(body, mimetype=mimetype, headers=headers)
+        
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        
+        # Só guarda o corpo se a própria requisição não alterou a versão (ex.: settings criados)
+        if response_cache.version_for(user_id)[0] != version:
+            return response
+        
+        response.headers.update(headers)
+        if response_cache.max_bytes and not response.is_streamed:
+            response_cache.put_body(key, response.get_data(), response.mimetype)
+        return response
+    
+    return wrapper
@@ -0,0 +1,193 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _CountingCursor:
+    """Cursor DBAPI que conta as linhas lidas pelo SQLAlchemy (as de SELECT não têm rowcount)"""
+
+    __slots__ = ('_cursor', '_stats')
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats['rows'] += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._stats['rows'] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats['rows'] += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._stats['rows'] += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class _EndpointMetrics:
+    """Contadores acumulados de um endpoint (rota + método)"""
+
+    __slots__ = ('buckets', 'count', 'duration', 'statuses', 'sql_count', 'sql_duration', 'sql_rows')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.statuses = {}
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.sql_rows = 0
+
+class RequestMetrics:
+    """Instrumentação opcional das requisições (METRICS_ENABLED)
+
+    Mede por endpoint a latência (histograma), as instruções SQL executadas,
+    o tempo gasto nelas e as linhas lidas ou alteradas, a partir dos hooks
+    before_request/after_request do Flask e before_cursor_execute/
+    after_cursor_execute do SQLAlchemy. Cada resposta recebe o cabeçalho
+    Server-Timing e os totais são expostos em GET /api/metrics no formato
+    texto do Prometheus.
+
+    Desativada, nenhum hook é registrado. Os totais são mantidos por processo:
+    com vários workers, cada um é coletado separadamente.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._sql_hooks = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', False)
+        if not self.enabled:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        with self._lock:
+            if not self._sql_hooks:
+                # Hooks em Engine valem para todas as engines; fora de uma requisição medida não fazem nada
+                event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+                self._sql_hooks = True
+
+    @staticmethod
+    def _request_stats():
+        if not has_request_context():
+            return None
+        return g.get('request_metrics')
+
+    def _start(self):
+        g.request_metrics = {'started': time.perf_counter(), 'sql_count': 0, 'sql_duration': 0.0, 'rows': 0}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = self._request_stats()
+        if stats is not None:
+            stats['sql_started'] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = self._request_stats()
+        if stats is None or 'sql_started' not in stats:
+            return
+        stats['sql_duration'] += time.perf_counter() - stats.pop('sql_started')
+        stats['sql_count'] += 1
+        if cursor.description is None:
+            # INSERT/UPDATE/DELETE sem RETURNING: linhas alteradas
+            stats['rows'] += max(cursor.rowcount, 0)
+        elif context is not None:
+            # As linhas de SELECT são contadas à medida que o resultado as lê do cursor
+            context.cursor = _CountingCursor(cursor, stats)
+
+    def _finish(self, response):
+        # Mantido em g: consultas feitas durante o streaming do corpo ainda são contadas
+        stats = g.get('request_metrics')
+        if stats is None:
+            return response
+        endpoint = request.endpoint or 'desconhecido'
+        method = request.method
+        elapsed = time.perf_counter() - stats['started']
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'sql;desc="consultas: {stats["sql_count"]}";dur={stats["sql_duration"] * 1000:.1f}'
+        )
+        if response.is_streamed:
+            # O corpo (e as consultas feitas durante o streaming) só termina no fechamento
+            response.call_on_close(lambda: self._record(endpoint, method, response.status_code, stats))
+        else:
+            self._record(endpoint, method, response.status_code, stats)
+        return response
+
+    def _record(self, endpoint, method, status, stats):
+        elapsed = time.perf_counter() - stats['started']
+        with self._lock:
+            metrics = self._endpoints.get((endpoint, method))
+            if metrics is None:
+                metrics = self._endpoints[(endpoint, method)] = _EndpointMetrics()
+            metrics.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            metrics.count += 1
+            metrics.duration += elapsed
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.sql_count += stats['sql_count']
+            metrics.sql_duration += stats['sql_duration']
+            metrics.sql_rows += stats['rows']
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """Totais no formato texto de exposição do Prometheus (versão 0.0.4)"""
+        with self._lock:
+            snapshot = [
+                (endpoint, method, metrics.buckets[:], metrics.count, metrics.duration, dict(metrics.statuses),
+                 metrics.sql_count, metrics.sql_duration, metrics.sql_rows)
+                for (endpoint, method), metrics in sorted(self._endpoints.items())
+            ]
+
+        lines = [
+            '# HELP taskflow_request_duration_seconds Latência das requisições por endpoint.',
+            '# TYPE taskflow_request_duration_seconds histogram',
+        ]
+        for endpoint, method, buckets, count, duration, *_ in snapshot:
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for limit, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f'taskflow_request_duration_seconds_bucket{{{labels},le="{limit}"}} {cumulative}')
+            lines.append(f'taskflow_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'taskflow_request_duration_seconds_sum{{{labels}}} {duration:.6f}')
+            lines.append(f'taskflow_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines += ['# HELP taskflow_requests_total Requisições por endpoint e status.', '# TYPE taskflow_requests_total counter']
+        for endpoint, method, _, _, _, statuses, *_ in snapshot:
+            for status, total in sorted(statuses.items()):
+                lines.append(f'taskflow_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {total}')
+
+        for name, help_text, position, fmt in (
+            ('taskflow_sql_statements_total', 'Instruções SQL executadas por endpoint.', 6, '{}'),
+            ('taskflow_sql_duration_seconds_total', 'Tempo gasto em instruções SQL por endpoint.', 7, '{:.6f}'),
+            ('taskflow_sql_rows_total', 'Linhas lidas ou alteradas pelas instruções SQL por endpoint.', 8, '{}'),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for row in snapshot:
+                lines.append(f'{name}{{endpoint="{row[0]}",method="{row[1]}"}} {fmt.format(row[position])}')
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
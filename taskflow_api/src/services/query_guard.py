@@ -0,0 +1,107 @@
+import re
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Listas de parâmetros de tamanho variável (IN (?, ?, ?)) contam como a mesma instrução
+_PARAMETER_LIST = re.compile(r'\((?:\?, )+\?\)')
+
+# Instruções consideradas pelo detector de N+1 (BEGIN, PRAGMA, SAVEPOINT... ficam de fora)
+_TRACKED_PREFIXES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+class RepeatedQueryError(RuntimeError):
+    """A mesma instrução SQL foi executada mais de QUERY_REPEAT_LIMIT vezes numa requisição"""
+
+class QueryGuard:
+    """Log de consultas lentas e detector de N+1 sobre os eventos da engine
+
+    - Consultas lentas: instruções acima de SLOW_QUERY_MS milissegundos são
+      registradas no log da aplicação com os parâmetros, a duração e a rota
+      de origem.
+    - N+1: conta, por requisição, as execuções de cada formato de instrução
+      (o SQL com os parâmetros, listas IN de qualquer tamanho contam como uma).
+      Acima de QUERY_REPEAT_LIMIT execuções o formato é registrado no log ou,
+      com QUERY_REPEAT_RAISE (configuração de testes), a requisição falha com
+      RepeatedQueryError. executemany conta como uma execução; rotas que
+      repetem instruções de propósito (lotes) usam @allow_repeated_queries.
+
+    Com as duas verificações desativadas nenhum hook é registrado.
+    """
+
+    def __init__(self):
+        self.slow_ms = 0
+        self.repeat_limit = 0
+        self.repeat_raise = False
+        self._hooks = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.slow_ms = app.config.get('SLOW_QUERY_MS', 0)
+        self.repeat_limit = app.config.get('QUERY_REPEAT_LIMIT', 0)
+        self.repeat_raise = app.config.get('QUERY_REPEAT_RAISE', False)
+        if not (self.slow_ms or self.repeat_limit):
+            return
+        with self._lock:
+            if not self._hooks:
+                # Hooks em Engine valem para todas as engines da aplicação
+                event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+                self._hooks = True
+
+    @staticmethod
+    def _origin():
+        """Rota (ou thread) que originou a instrução"""
+        if has_request_context():
+            return f'{request.method} {request.path} ({request.endpoint})'
+        return f'thread {threading.current_thread().name}'
+
+    @staticmethod
+    def _log_warning(message, *args):
+        if has_app_context():
+            current_app.logger.warning(message, *args)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.repeat_limit and not executemany and has_request_context():
+            self._count_shape(statement)
+        if self.slow_ms:
+            conn.info['query_guard_started'] = time.perf_counter()
+
+    def _count_shape(self, statement):
+        if not statement.lstrip()[:6].upper().startswith(_TRACKED_PREFIXES) or g.get('query_repeats_allowed'):
+            return
+        shapes = g.get('query_shapes')
+        if shapes is None:
+            shapes = g.query_shapes = {}
+        shape = _PARAMETER_LIST.sub('(?)', statement)
+        count = shapes[shape] = shapes.get(shape, 0) + 1
+        if count == self.repeat_limit + 1:
+            message = f'N+1: instrução executada mais de {self.repeat_limit} vezes em {self._origin()}: {" ".join(shape.split())}'
+            if self.repeat_raise:
+                raise RepeatedQueryError(message)
+            self._log_warning('%s', message)
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('query_guard_started', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= self.slow_ms:
+            shown = repr(parameters)
+            self._log_warning(
+                'Consulta lenta (%.1f ms) em %s: %s | parâmetros: %s',
+                elapsed_ms, self._origin(), ' '.join(statement.split()),
+                shown if len(shown) <= 200 else shown[:199] + '…'
+            )
+
+query_guard = QueryGuard()
+
+def allow_repeated_queries(view):
+    """Desativa o detector de N+1 na rota (instruções repetidas de propósito, como lotes)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.query_repeats_allowed = True
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,133 @@
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from src.models.user import db
+from src.models.task import Task
+from src.models.sync import SyncVersion
+
+# Lembretes são gravados no horário local do navegador (input datetime-local);
+# a carga cobre a maior diferença de fuso possível em relação ao UTC
+MAX_TZ_OFFSET = timedelta(hours=14)
+
+def to_client_time(value, tz_offset):
+    """Converte uma data com fuso para o horário local do cliente, sem fuso
+
+    tz_offset é a diferença do fuso do cliente em minutos (Date.getTimezoneOffset),
+    a mesma usada na leitura por /reminders/due e pela exportação .ics. Datas sem
+    fuso já estão no horário do cliente e são retornadas como estão.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None) - timedelta(minutes=tz_offset)
+
+class ReminderScheduler:
+    """Agenda em memória dos lembretes pendentes, organizada em heaps por usuário
+
+    A agenda é carregada do índice parcial ix_tasks_pending_reminders na
+    primeira consulta e recarregada periodicamente (para enxergar escritas de outros
+    processos). As rotas de tarefas a mantêm sincronizada chamando schedule().
+    Entradas obsoletas (lembrete alterado, tarefa concluída ou excluída) são
+    descartadas ao reivindicar o lembrete, que só é marcado como notificado se
+    ainda estiver pendente no banco. Lembretes vencidos há mais de grace não
+    são notificados (ex.: na primeira consulta após o login).
+    """
+    
+    def __init__(self):
+        self.lead_time = timedelta(minutes=5)
+        self.reload_interval = timedelta(seconds=60)
+        self.grace = timedelta(minutes=10)
+        self._heaps = {}
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._loaded_until = None
+    
+    def init_app(self, app):
+        self.lead_time = timedelta(minutes=app.config.get('REMINDER_LEAD_MINUTES', 5))
+        self.reload_interval = timedelta(seconds=app.config.get('REMINDER_RELOAD_SECONDS', 60))
+        self.grace = timedelta(minutes=app.config.get('REMINDER_GRACE_MINUTES', 10))
+        # Carregada na primeira consulta (pop_due), não na inicialização do processo
+        self._loaded_at = None
+        self._loaded_until = None
+    
+    def load(self, now=None):
+        """Recarrega os lembretes pendentes até o próximo recarregamento"""
+        now = now or datetime.utcnow()
+        loaded_until = now + MAX_TZ_OFFSET + self.reload_interval + self.lead_time
+        
+        rows = db.session.query(Task.reminder_datetime, Task.id, Task.user_id).filter(
+            Task.notified == db.false(),
+            Task.completed == db.false(),
+            Task.reminder_datetime >= now - MAX_TZ_OFFSET - self.grace,
+            Task.reminder_datetime <= loaded_until
+        ).all()
+        
+        heaps = {}
+        for reminder_datetime, task_id, user_id in rows:
+            heaps.setdefault(user_id, []).append((reminder_datetime, task_id))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        
+        with self._lock:
+            self._heaps = heaps
+            self._loaded_at = now
+            self._loaded_until = loaded_until
+    
+    def schedule(self, task):
+        """Agenda (ou reagenda) o lembrete de uma tarefa criada ou alterada"""
+        if task.reminder_datetime and not task.completed and not task.notified:
+            self.schedule_entry(task.id, task.user_id, task.reminder_datetime)
+    
+    def schedule_entry(self, task_id, user_id, reminder_datetime):
+        """Agenda o lembrete de uma tarefa pendente a partir dos seus valores"""
+        with self._lock:
+            # Lembretes além do horizonte carregado entram no próximo recarregamento
+            if self._loaded_until is None or reminder_datetime > self._loaded_until:
+                return
+            heapq.heappush(self._heaps.setdefault(user_id, []), (reminder_datetime, task_id))
+    
+    def pop_due(self, user_id, until, since=None):
+        """Remove e retorna os ids das tarefas do usuário com lembrete até `until`
+
+        Entradas anteriores a `since` são descartadas sem serem retornadas.
+        """
+        if self._loaded_at is None or datetime.utcnow() - self._loaded_at >= self.reload_interval:
+            self.load()
+        
+        task_ids = []
+        with self._lock:
+            heap = self._heaps.get(user_id)
+            while heap and heap[0][0] <= until:
+                reminder_datetime, task_id = heapq.heappop(heap)
+                if since is None or reminder_datetime >= since:
+                    task_ids.append(task_id)
+        return task_ids
+    
+    def claim_due(self, user_id, now):
+        """Marca como notificados, de forma atômica, os lembretes entre now - grace e now + lead_time
+
+        Retorna os ids efetivamente reivindicados por esta chamada e o horizonte usado.
+        """
+        horizon = now + self.lead_time
+        earliest = now - self.grace
+        candidates = self.pop_due(user_id, horizon, since=earliest)
+        if not candidates:
+            return [], horizon
+        
+        version = SyncVersion.bump(user_id)
+        claimed = db.session.scalars(
+            db.update(Task)
+            .where(
+                Task.id.in_(candidates),
+                Task.user_id == user_id,
+                Task.notified == db.false(),
+                Task.completed == db.false(),
+                Task.reminder_datetime >= earliest,
+                Task.reminder_datetime <= horizon
+            )
+            .values(notified=True, version=version)
+            .returning(Task.id),
+            execution_options={'synchronize_session': False}
+        ).all()
+        return claimed, horizon
+
+reminder_scheduler = ReminderScheduler()
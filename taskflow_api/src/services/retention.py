@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from src.models.user import db
+from src.models.task import ActivityLog
+from src.models.sync import Tombstone
+
+class RetentionJob:
+    """Compactação periódica do log de atividades e limpeza dos tombstones
+
+    Registros mais antigos que ACTIVITY_LOG_RETENTION_DAYS são removidos em
+    lotes de ACTIVITY_LOG_COMPACTION_CHUNK linhas, cada lote na sua própria
+    transação, para que o lock de escrita do SQLite seja mantido apenas por
+    pouco tempo. Com ACTIVITY_LOG_ROLLUP os registros removidos são somados à
+    tabela activity_daily_counts.
+
+    Tombstones (exclusões para a sincronização incremental) mais antigos que
+    TOMBSTONE_RETENTION_DAYS são removidos da mesma forma; clientes com
+    cursor anterior aos tombstones removidos recebem o estado completo em
+    GET /api/tasks/changes.
+
+    A thread de fundo é iniciada na primeira requisição de cada processo.
+    Vários workers podem compactar ao mesmo tempo: o DELETE ... RETURNING
+    garante que cada registro seja somado ao rollup uma única vez.
+    """
+
+    def __init__(self):
+        self.retention_days = 90
+        self.chunk_size = 5000
+        self.interval = 3600
+        self.rollup = True
+        self.tombstone_retention_days = 30
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.retention_days = app.config.get('ACTIVITY_LOG_RETENTION_DAYS', 90)
+        self.chunk_size = app.config.get('ACTIVITY_LOG_COMPACTION_CHUNK', 5000)
+        self.interval = app.config.get('ACTIVITY_LOG_COMPACTION_SECONDS', 3600)
+        self.rollup = app.config.get('ACTIVITY_LOG_ROLLUP', True)
+        self.tombstone_retention_days = app.config.get('TOMBSTONE_RETENTION_DAYS', 30)
+        self._app = app
+        if (self.retention_days or self.tombstone_retention_days) and self.interval and not app.testing:
+            app.before_request(self._ensure_thread)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(self._app,), name='activity-retention', daemon=True)
+            self._thread.start()
+
+    def _run(self, app):
+        while True:
+            try:
+                with app.app_context():
+                    self.run_once()
+                    self.prune_tombstones()
+            except Exception:
+                app.logger.exception('Falha na compactação do log de atividades')
+            time.sleep(self.interval)
+
+    def run_once(self, retention_days=None, now=None):
+        """Remove todos os registros expirados, lote a lote; retorna o total removido"""
+        retention_days = self.retention_days if retention_days is None else retention_days
+        if not retention_days:
+            return 0
+        cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+        # Corte em dias inteiros: cada dia sai do log (e entra no rollup) de uma vez
+        cutoff = cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        removed = 0
+        while True:
+            count = ActivityLog.compact(cutoff, self.chunk_size, rollup=self.rollup)
+            db.session.commit()
+            removed += count
+            if count < self.chunk_size:
+                return removed
+
+    def prune_tombstones(self, retention_days=None, now=None):
+        """Remove todos os tombstones expirados, lote a lote; retorna o total removido"""
+        retention_days = self.tombstone_retention_days if retention_days is None else retention_days
+        if not retention_days:
+            return 0
+        cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+
+        removed = 0
+        while True:
+            count = Tombstone.prune(cutoff, self.chunk_size)
+            db.session.commit()
+            removed += count
+            if count < self.chunk_size:
+                return removed
+
+retention_job = RetentionJob()
@@ -0,0 +1,214 @@
+import random
+from bisect import bisect
+from itertools import accumulate
+from datetime import datetime, timedelta
+from src.models.user import db, User
+from src.models.task import ActivityLog, Category, Task, UserSettings
+from src.models.search import FTS_SCHEMA
+from src.models.sync import SyncVersion
+
+# Distribuições dos dados gerados
+PRIORITY_WEIGHTS = {'baixa': 30, 'media': 50, 'alta': 20}
+UNCATEGORIZED_RATIO = 0.15  # Tarefas sem categoria
+UPDATED_RATIO = 0.3  # Tarefas com um registro 'updated' no log de atividades
+REMINDER_SPREAD = 14 * 86400  # Lembretes entre 1 hora e 14 dias após a criação
+
+CATEGORY_PALETTE = [
+    ('Trabalho', '#667eea'), ('Pessoal', '#4caf50'), ('Estudos', '#ff9800'), ('Saúde', '#e74c3c'),
+    ('Compras', '#9c27b0'), ('Casa', '#00bcd4'), ('Finanças', '#795548'), ('Viagem', '#3f51b5'),
+    ('Projetos', '#8bc34a'), ('Família', '#ff5722'), ('Leitura', '#607d8b'), ('Exercícios', '#cddc39'),
+]
+
+TASK_VERBS = ['Revisar', 'Enviar', 'Organizar', 'Comprar', 'Agendar', 'Ligar para', 'Atualizar', 'Preparar', 'Pagar', 'Estudar']
+TASK_OBJECTS = ['relatório', 'orçamento', 'reunião', 'documentos', 'apresentação', 'fornecedor', 'contas', 'planilha', 'consulta', 'capítulo 3']
+
+# PRAGMAs da conexão de carga: sem fsync (a carga pode ser refeita se o processo cair) e cache maior
+LOAD_PRAGMAS = {'synchronous': 0, 'cache_size': -256000, 'temp_store': 2}
+
+# Trigger que indexa cada tarefa inserida no FTS5; suspenso na carga e substituído por um INSERT ... SELECT
+FTS_INSERT_TRIGGER = 'tasks_fts_insert'
+
+# Colunas das tuplas de tarefas e do log gravadas pela carga (na ordem das colunas da tabela)
+TASK_COLUMNS = (
+    'id', 'text', 'priority', 'category_id', 'reminder_datetime', 'completed', 'notified',
+    'user_id', 'version', 'created_at', 'updated_at', 'completed_at',
+)
+ACTIVITY_COLUMNS = ('user_id', 'task_id', 'action', 'details', 'created_at')
+
+def _insert_sql(connection, table, columns):
+    """INSERT do Core compilado para o dialeto, com parâmetros posicionais na ordem de columns
+
+    Executado por exec_driver_sql com uma lista de tuplas: o executemany vai
+    direto ao driver, sem o processamento de tipos do SQLAlchemy por linha; por
+    isso as datas já vêm no formato gravado pelo tipo DateTime no SQLite.
+    """
+    statement = db.insert(table).values({column: db.bindparam(column) for column in columns})
+    return str(statement.compile(dialect=connection.dialect))
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+class DatasetSeeder:
+    """Geração de dados sintéticos em massa para testes de escala
+
+    Cria usuários com configurações, categorias, tarefas e o log de atividades
+    correspondente, com distribuições realistas (prioridades, categorias mais
+    e menos usadas, proporção de concluídas, lembretes espalhados, tarefas
+    mais recentes mais frequentes). O resultado depende apenas da semente, da
+    data de referência e dos parâmetros; os ids continuam os já existentes.
+
+    Tudo é gravado numa única transação, em executemany de batch_size tuplas
+    (tarefas e log de atividades). Durante a carga a
+    conexão usa LOAD_PRAGMAS, os índices secundários de tasks e activity_logs
+    são removidos e recriados no final e o índice FTS5 recebe as novas
+    tarefas de uma vez, em vez de um INSERT por tarefa no trigger.
+    """
+
+    def __init__(self, seed=42, reference=None, batch_size=10000):
+        self.rng = random.Random(seed)
+        self.reference = reference or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.batch_size = batch_size
+
+    def run(self, users, tasks_per_user, categories_per_user=8, completed_ratio=0.6, reminder_ratio=0.3,
+            days=365, activity=True, prefix='seed', password_hash='', rebuild_indexes=True):
+        """Gera os dados e retorna o número de linhas criadas por tabela"""
+        counts = {'users': 0, 'categories': 0, 'tasks': 0, 'activity_logs': 0}
+        connection = db.engine.connect()
+        try:
+            previous = {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in LOAD_PRAGMAS}
+            for name, value in LOAD_PRAGMAS.items():
+                connection.exec_driver_sql(f'PRAGMA {name}={value}')
+            connection.commit()
+
+            with connection.begin():
+                taken = connection.execute(
+                    db.select(db.func.count()).select_from(User).where(User.username.like(f'{prefix}\\_%', escape='\\'))
+                ).scalar()
+                if taken:
+                    raise ValueError(f'Já existem usuários com o prefixo "{prefix}"')
+
+                fts_trigger = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (FTS_INSERT_TRIGGER,)
+                ).first() is not None
+                if fts_trigger:
+                    connection.exec_driver_sql(f'DROP TRIGGER {FTS_INSERT_TRIGGER}')
+                indexes = list(Task.__table__.indexes) + list(ActivityLog.__table__.indexes) if rebuild_indexes else []
+                for index in indexes:
+                    index.drop(connection, checkfirst=True)
+
+                first_task_id = (connection.execute(db.select(db.func.max(Task.id))).scalar() or 0) + 1
+                user_ids = self._insert_users(connection, users, prefix, password_hash)
+                counts['users'] = len(user_ids)
+                task_id = first_task_id
+                for user_id in user_ids:
+                    category_ids = self._insert_categories(connection, user_id, categories_per_user)
+                    counts['categories'] += len(category_ids)
+                    created, logged = self._insert_tasks(
+                        connection, user_id, task_id, tasks_per_user, category_ids,
+                        completed_ratio, reminder_ratio, days, activity
+                    )
+                    task_id += created
+                    counts['tasks'] += created
+                    counts['activity_logs'] += logged
+
+                for index in indexes:
+                    index.create(connection)
+                if fts_trigger:
+                    connection.exec_driver_sql(
+                        'INSERT INTO tasks_fts(rowid, text) SELECT id, text FROM tasks WHERE id >= ?', (first_task_id,)
+                    )
+                    connection.exec_driver_sql(next(statement for statement in FTS_SCHEMA if FTS_INSERT_TRIGGER in statement))
+
+            for name, value in previous.items():
+                connection.exec_driver_sql(f'PRAGMA {name}={value}')
+            connection.commit()
+        finally:
+            connection.close()
+        return counts
+
+    def _insert_users(self, connection, users, prefix, password_hash):
+        if not users:
+            return []
+        now = self.reference
+        user_ids = [user_id for (user_id,) in connection.execute(db.insert(User.__table__).returning(User.id), [
+            {'username': f'{prefix}_{index}', 'email': f'{prefix}_{index}@example.com', 'password_hash': password_hash,
+             'created_at': now, 'updated_at': now}
+            for index in range(users)
+        ])]
+        connection.execute(db.insert(UserSettings.__table__), [
+            {'user_id': user_id, 'theme': 'light', 'notifications_enabled': True,
+             'default_priority': _weighted(self.rng, PRIORITY_WEIGHTS), 'created_at': now, 'updated_at': now}
+            for user_id in user_ids
+        ])
+        # Tarefas e categorias geradas ficam na versão 1 de sincronização do usuário
+        connection.execute(db.insert(SyncVersion.__table__), [
+            {'user_id': user_id, 'version': 1, 'updated_at': now} for user_id in user_ids
+        ])
+        return user_ids
+
+    def _insert_categories(self, connection, user_id, count):
+        if not count:
+            return []
+        now = self.reference
+        rows = []
+        for index in range(count):
+            name, color = CATEGORY_PALETTE[index % len(CATEGORY_PALETTE)]
+            if index >= len(CATEGORY_PALETTE):
+                name = f'{name} {index // len(CATEGORY_PALETTE) + 1}'
+            rows.append({'name': name, 'color': color, 'user_id': user_id, 'version': 1, 'created_at': now, 'updated_at': now})
+        return [category_id for (category_id,) in connection.execute(
+            db.insert(Category.__table__).returning(Category.id), rows
+        )]
+
+    def _insert_tasks(self, connection, user_id, first_id, count, category_ids, completed_ratio, reminder_ratio, days, activity):
+        """Gera as tarefas do usuário (e o log) em lotes; retorna (tarefas, registros do log)"""
+        random_value = self.rng.random
+        verbs, objects = len(TASK_VERBS), len(TASK_OBJECTS)
+        reference = self.reference
+        tasks_sql = _insert_sql(connection, Task.__table__, TASK_COLUMNS)
+        activity_sql = _insert_sql(connection, ActivityLog.__table__, ACTIVITY_COLUMNS)
+        # Sorteios ponderados por bisect nos pesos acumulados (random.choices é caro por linha)
+        priorities = list(PRIORITY_WEIGHTS)
+        priority_bounds = list(accumulate(PRIORITY_WEIGHTS.values()))
+        # Categorias mais e menos usadas (pesos 1, 1/2, 1/3...)
+        category_bounds = list(accumulate(1 / (rank + 1) for rank in range(len(category_ids))))
+
+        # Idades em segundos, mais tarefas recentes que antigas; ids crescem com a data de criação
+        span = days * 86400
+        ages = sorted((span * random_value() ** 2 for _ in range(count)), reverse=True)
+        logged = 0
+        for start in range(0, count, self.batch_size):
+            tasks, logs = [], []
+            for offset, age in enumerate(ages[start:start + self.batch_size], start):
+                task_id = first_id + offset
+                created_at = reference - timedelta(seconds=age)
+                created = created_at.isoformat(' ', 'microseconds')
+                text = f'{TASK_VERBS[int(random_value() * verbs)]} {TASK_OBJECTS[int(random_value() * objects)]} #{offset + 1}'
+                completed = random_value() < completed_ratio
+                completed_at = None
+                if completed:
+                    completed_at = (created_at + timedelta(seconds=age * random_value())).isoformat(' ', 'microseconds')
+                reminder = notified = None
+                if random_value() < reminder_ratio:
+                    reminder_at = created_at + timedelta(seconds=3600 + random_value() * REMINDER_SPREAD)
+                    reminder, notified = reminder_at.isoformat(' ', 'microseconds'), reminder_at <= reference
+                category_id = None
+                if category_bounds and random_value() >= UNCATEGORIZED_RATIO:
+                    category_id = category_ids[bisect(category_bounds, random_value() * category_bounds[-1])]
+                priority = priorities[bisect(priority_bounds, random_value() * priority_bounds[-1])]
+                tasks.append((
+                    task_id, text, priority, category_id, reminder, completed, bool(notified),
+                    user_id, 1, created, completed_at or created, completed_at
+                ))
+                if activity:
+                    logs.append((user_id, task_id, 'created', None, created))
+                    if random_value() < UPDATED_RATIO:
+                        updated_at = (created_at + timedelta(seconds=age * random_value())).isoformat(' ', 'microseconds')
+                        logs.append((user_id, task_id, 'updated', 'Alterações: priority', updated_at))
+                    if completed:
+                        logs.append((user_id, task_id, 'completed', 'Status alterado para: completed', completed_at))
+            connection.exec_driver_sql(tasks_sql, tasks)
+            if logs:
+                connection.exec_driver_sql(activity_sql, logs)
+                logged += len(logs)
+        return count, logged
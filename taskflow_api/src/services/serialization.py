@@ -0,0 +1,105 @@
+import dataclasses
+import json
+from collections.abc import Iterator
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from uuid import UUID
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional: sem ela é usado o json da biblioteca padrão
+    orjson = None
+
+def _default(value):
+    """Tipos que não são nativos do JSON; datas em ISO 8601, como no orjson"""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Objeto do tipo {type(value).__name__} não é serializável em JSON')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provedor JSON da aplicação: orjson quando instalado, json da biblioteca padrão caso contrário
+
+    Datas e horas (datetime) são codificadas em ISO 8601 pelos dois caminhos,
+    então os serializadores podem entregar os valores das colunas sem
+    convertê-los um a um. A ordem das chaves segue JSON_SORT_KEYS.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+        self.use_orjson = orjson is not None and app.config.get('JSON_USE_ORJSON', True)
+        self._orjson_options = 0
+        if self.use_orjson:
+            self._orjson_options = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                self._orjson_options |= orjson.OPT_SORT_KEYS
+
+    def dumps_bytes(self, obj, indent=False):
+        """Codifica obj em JSON (UTF-8); compacto, a menos que indent seja True"""
+        if self.use_orjson:
+            options = (self._orjson_options | orjson.OPT_INDENT_2) if indent else self._orjson_options
+            return orjson.dumps(obj, default=_default, option=options)
+        if indent:
+            return super().dumps(obj, indent=2).encode('utf-8')
+        return super().dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # Argumentos do json da biblioteca padrão (indent, separators...) não existem no orjson
+        if self.use_orjson and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Como no provedor padrão do Flask: indentado em modo debug, a menos que compact seja True
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype)
+
+def serialize_rows(rows, fields):
+    """Converte linhas de um select() (tuplas ou Row) em dicts {campo: valor}, sem objetos do ORM
+
+    fields: nomes das colunas na ordem do select. As datas continuam datetime e
+    são codificadas pelo provedor JSON.
+    """
+    return (dict(zip(fields, row)) for row in rows)
+
+def json_stream(obj, batch_size=500):
+    """Codifica o dict obj em partes, para respostas em streaming
+
+    Valores que são iteradores (geradores de linhas, por exemplo) viram arrays
+    codificados em lotes de batch_size itens, sem materializar a lista inteira;
+    os demais valores são codificados normalmente. A saída é sempre compacta.
+    """
+    dumps = current_app.json.dumps_bytes
+    yield b'{'
+    for position, (key, value) in enumerate(obj.items()):
+        yield (b',' if position else b'') + dumps(key) + b':'
+        if not isinstance(value, Iterator):
+            yield dumps(value)
+            continue
+        separator = b'['
+        while True:
+            batch = list(islice(value, batch_size))
+            if not batch:
+                break
+            # Um lote codificado de uma vez, sem os colchetes da lista
+            yield separator + dumps(batch)[1:-1]
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+    yield b'}\n'
@@ -0,0 +1,23 @@
+from sqlalchemy import event
+from src.models.user import db
+
+def configure_sqlite(app):
+    """Aplica SQLITE_PRAGMAS a cada conexão aberta pelo pool do SQLAlchemy
+
+    journal_mode=WAL fica gravado no arquivo, mas os demais PRAGMAs valem apenas
+    para a conexão, por isso são reaplicados no evento "connect" do engine.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
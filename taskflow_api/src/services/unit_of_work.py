@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, jsonify
+from werkzeug.exceptions import HTTPException
+from src.models.user import db
+
+# Chave em session.info com os callbacks pendentes da transação
+CALLBACKS_KEY = 'on_commit_callbacks'
+
+class _Rollback(Exception):
+    """Interrompe a unidade de trabalho quando a rota responde com erro"""
+
+    def __init__(self, response):
+        super().__init__(response.status)
+        self.response = response
+
+def on_commit(callback, *args, **kwargs):
+    """Agenda callback(*args, **kwargs) para depois do commit da transação atual
+
+    Usado para efeitos fora do banco (feed de eventos, agenda de lembretes), que
+    não devem acontecer se a transação for desfeita. Os argumentos devem ser
+    valores já calculados: após o commit os objetos do ORM estão expirados.
+    """
+    db.session.info.setdefault(CALLBACKS_KEY, []).append((callback, args, kwargs))
+
+@contextmanager
+def unit_of_work():
+    """Transação com um único commit ao final do bloco e rollback em caso de exceção
+
+    Os callbacks registrados com on_commit() rodam após o commit e são
+    descartados no rollback.
+    """
+    session = db.session
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        session.info.pop(CALLBACKS_KEY, None)
+        raise
+
+    for callback, args, kwargs in session.info.pop(CALLBACKS_KEY, []):
+        try:
+            callback(*args, **kwargs)
+        except Exception:
+            # A transação já foi confirmada: a falha não deve virar erro da requisição
+            current_app.logger.exception('Falha ao executar callback pós-commit')
+
+def transactional(view):
+    """Executa a rota numa unidade de trabalho (um único commit por requisição)
+
+    A transação é confirmada se a rota responder com sucesso (status < 400) e
+    desfeita caso contrário; as rotas não chamam commit()/rollback() por conta
+    própria. Uma falha no commit é retornada como erro 500.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            with unit_of_work():
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code >= 400:
+                    raise _Rollback(response)
+        except _Rollback as e:
+            return e.response
+        except HTTPException:
+            raise
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+        return response
+    return wrapper
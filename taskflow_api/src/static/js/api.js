@@ -13,6 +13,16 @@ const API = {
         username: 'default'
     },
     
+    // Token de sessão retornado pelo login (null: identificação por user_id)
+    token: null,
+    
+    // Identifica esta aba nas escritas (X-Client-Id): o feed marca os eventos com ele
+    // e o cliente ignora os que ecoam as próprias alterações
+    clientId: (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : Math.random().toString(36).slice(2),
+    
+    // Chamado quando a API responde 401 (AUTH_REQUIRED=1 sem sessão, ou token expirado)
+    onAuthRequired: null,
+    
     /**
      * Configurações do usuário
      */
@@ -28,6 +38,8 @@ const API = {
     init: async function() {
         console.log('Inicializando API client...');
         
+        this.restoreSession();
+        
         try {
             // Carregar configurações do usuário
             await this.loadUserSettings();
@@ -42,6 +54,54 @@ const API = {
         }
     },
     
+    /**
+     * Restaura a sessão (token e usuário) salva pelo último login
+     */
+    restoreSession: function() {
+        try {
+            const session = JSON.parse(localStorage.getItem('taskflow_session'));
+            if (session && session.token && session.user) {
+                this.token = session.token;
+                this.currentUser = session.user;
+            }
+        } catch (error) {
+            localStorage.removeItem('taskflow_session');
+        }
+    },
+    
+    /**
+     * Autentica o usuário e guarda o token de sessão
+     * A senha é verificada apenas aqui; as demais requisições enviam o token
+     * @param {string} username - Nome de usuário
+     * @param {string} password - Senha
+     * @returns {Promise} - Promise com o usuário autenticado
+     */
+    login: async function(username, password) {
+        const result = await this.request('/login', 'POST', { username, password });
+        this.token = result.token;
+        this.currentUser = { id: result.user.id, username: result.user.username };
+        localStorage.setItem('taskflow_session', JSON.stringify({ token: this.token, user: this.currentUser }));
+        return result.user;
+    },
+    
+    /**
+     * Encerra a sessão e volta ao usuário padrão
+     */
+    logout: function() {
+        this.token = null;
+        this.currentUser = { id: 1, username: 'default' };
+        localStorage.removeItem('taskflow_session');
+    },
+    
+    /**
+     * Parâmetros de identificação para URLs abertas fora de fetch (EventSource, downloads),
+     * que não enviam o cabeçalho Authorization
+     * @returns {URLSearchParams} - token de sessão ou user_id
+     */
+    authParams: function() {
+        return new URLSearchParams(this.token ? { token: this.token } : { user_id: this.currentUser.id });
+    },
+    
     /**
      * Realiza uma requisição para a API
      * @param {string} endpoint - Endpoint da API
@@ -55,10 +115,17 @@ const API = {
         const options = {
             method,
             headers: {
-                'Content-Type': 'application/json'
-            }
+                'Content-Type': 'application/json',
+                'X-Client-Id': this.clientId
+            },
+            // Revalidar com o servidor (ETag/304) em vez de baixar o corpo de novo
+            cache: 'no-cache'
         };
         
+        if (this.token) {
+            options.headers['Authorization'] = `Bearer ${this.token}`;
+        }
+        
         if (data) {
             options.body = JSON.stringify(data);
         }
@@ -67,6 +134,12 @@ const API = {
             const response = await fetch(url, options);
             const result = await response.json();
             
+            // Token expirado ou inválido: descartar a sessão salva e pedir novo login
+            if (response.status === 401) {
+                if (this.token) this.logout();
+                if (this.onAuthRequired && endpoint !== '/login') this.onAuthRequired();
+            }
+            
             if (!result.success && result.error) {
                 throw new Error(result.error);
             }
@@ -136,11 +209,16 @@ const API = {
     },
     
     /**
-     * Obtém todas as tarefas do usuário
+     * Campos usados pela listagem de tarefas (projeção `fields=`)
+     */
+    listFields: ['id', 'text', 'priority', 'completed', 'category_id', 'reminder_datetime'],
+    
+    /**
+     * Monta a query string de filtros da listagem de tarefas
      * @param {object} filters - Filtros opcionais (completed, priority, category_id)
-     * @returns {Promise} - Promise com as tarefas
+     * @returns {string} - Query string
      */
-    getTasks: async function(filters = {}) {
+    buildTaskQuery: function(filters = {}) {
         let queryParams = `user_id=${this.currentUser.id}`;
         
         if (filters.completed !== undefined) {
@@ -155,27 +233,126 @@ const API = {
             queryParams += `&category_id=${filters.category_id}`;
         }
         
+        return queryParams;
+    },
+    
+    /**
+     * Obtém uma página de tarefas do usuário
+     * @param {object} filters - Filtros opcionais (completed, priority, category_id)
+     * @param {object} options - Paginação e projeção (cursor, limit, fields)
+     * @returns {Promise} - Promise com { tasks, next_cursor }
+     */
+    getTasksPage: async function(filters = {}, options = {}) {
+        // Categorias retornadas uma única vez no mapa `categories`
+        let queryParams = `${this.buildTaskQuery(filters)}&category_format=map`;
+        
+        if (options.cursor) {
+            queryParams += `&cursor=${encodeURIComponent(options.cursor)}`;
+        }
+        
+        if (options.limit) {
+            queryParams += `&limit=${options.limit}`;
+        }
+        
+        if (options.fields) {
+            queryParams += `&fields=${options.fields.join(',')}`;
+        }
+        
         try {
             const result = await this.request(`/tasks?${queryParams}`);
-            return result.tasks || [];
+            const categories = result.categories || {};
+            const tasks = (result.tasks || []).map(task => ({
+                ...task,
+                category: task.category_id ? categories[task.category_id] || null : null
+            }));
+            return { tasks, next_cursor: result.next_cursor || null };
         } catch (error) {
             console.error('Erro ao obter tarefas:', error);
-            return [];
+            return { tasks: [], next_cursor: null };
+        }
+    },
+    
+    /**
+     * Busca tarefas pelo texto (ordenadas por relevância)
+     * @param {string} query - Termos da busca (cada termo é tratado como prefixo)
+     * @param {object} filters - Filtros opcionais (completed, priority, category_id)
+     * @param {object} options - Paginação e projeção (cursor, limit, fields)
+     * @returns {Promise} - Promise com { tasks, next_cursor }
+     */
+    searchTasksPage: async function(query, filters = {}, options = {}) {
+        let queryParams = `${this.buildTaskQuery(filters)}&category_format=map&q=${encodeURIComponent(query)}`;
+        
+        if (options.cursor) {
+            queryParams += `&cursor=${encodeURIComponent(options.cursor)}`;
+        }
+        
+        if (options.limit) {
+            queryParams += `&limit=${options.limit}`;
+        }
+        
+        if (options.fields) {
+            queryParams += `&fields=${options.fields.join(',')}`;
+        }
+        
+        try {
+            const result = await this.request(`/tasks/search?${queryParams}`);
+            const categories = result.categories || {};
+            const tasks = (result.tasks || []).map(task => ({
+                ...task,
+                category: task.category_id ? categories[task.category_id] || null : null
+            }));
+            return { tasks, next_cursor: result.next_cursor || null };
+        } catch (error) {
+            console.error('Erro ao buscar tarefas:', error);
+            return { tasks: [], next_cursor: null };
+        }
+    },
+    
+    /**
+     * Obtém todas as tarefas do usuário percorrendo todas as páginas
+     * @param {object} filters - Filtros opcionais (completed, priority, category_id)
+     * @param {object} options - Projeção opcional (fields)
+     * @returns {Promise} - Promise com as tarefas
+     */
+    getTasks: async function(filters = {}, options = {}) {
+        const tasks = [];
+        let cursor = null;
+        
+        do {
+            const page = await this.getTasksPage(filters, { ...options, cursor, limit: 200 });
+            tasks.push(...page.tasks);
+            cursor = page.next_cursor;
+        } while (cursor);
+        
+        return tasks;
+    },
+    
+    /**
+     * Obtém uma tarefa específica
+     * @param {number} taskId - ID da tarefa
+     * @returns {Promise} - Promise com a tarefa
+     */
+    getTask: async function(taskId) {
+        try {
+            const result = await this.request(`/tasks/${taskId}`);
+            return result.task;
+        } catch (error) {
+            console.error(`Erro ao obter tarefa ${taskId}:`, error);
+            throw error;
         }
     },
     
     /**
      * Adiciona uma nova tarefa
      * @param {object} taskData - Dados da tarefa
-     * @returns {Promise} - Promise com a tarefa criada
+     * @returns {Promise} - Promise com a resposta ({ task, stats_delta })
      */
     addTask: async function(taskData) {
         // Adicionar ID do usuário atual
         taskData.user_id = this.currentUser.id;
         
         try {
-            const result = await this.request('/tasks', 'POST', taskData);
-            return result.task;
+            return await this.request('/tasks', 'POST', taskData);
         } catch (error) {
             console.error('Erro ao adicionar tarefa:', error);
             throw error;
@@ -186,12 +363,11 @@ const API = {
      * Atualiza uma tarefa existente
      * @param {number} taskId - ID da tarefa
      * @param {object} taskData - Dados atualizados da tarefa
-     * @returns {Promise} - Promise com a tarefa atualizada
+     * @returns {Promise} - Promise com a resposta ({ task, stats_delta })
      */
     updateTask: async function(taskId, taskData) {
         try {
-            const result = await this.request(`/tasks/${taskId}`, 'PUT', taskData);
-            return result.task;
+            return await this.request(`/tasks/${taskId}`, 'PUT', taskData);
         } catch (error) {
             console.error(`Erro ao atualizar tarefa ${taskId}:`, error);
             throw error;
@@ -201,12 +377,11 @@ const API = {
     /**
      * Alterna o status de conclusão de uma tarefa
      * @param {number} taskId - ID da tarefa
-     * @returns {Promise} - Promise com a tarefa atualizada
+     * @returns {Promise} - Promise com a resposta ({ task, stats_delta })
      */
     toggleTask: async function(taskId) {
         try {
-            const result = await this.request(`/tasks/toggle/${taskId}`, 'PATCH');
-            return result.task;
+            return await this.request(`/tasks/toggle/${taskId}`, 'PATCH');
         } catch (error) {
             console.error(`Erro ao alternar status da tarefa ${taskId}:`, error);
             throw error;
@@ -216,18 +391,63 @@ const API = {
     /**
      * Exclui uma tarefa
      * @param {number} taskId - ID da tarefa
-     * @returns {Promise} - Promise com o resultado da operação
+     * @returns {Promise} - Promise com a resposta ({ stats_delta })
      */
     deleteTask: async function(taskId) {
         try {
-            const result = await this.request(`/tasks/${taskId}`, 'DELETE');
-            return result;
+            return await this.request(`/tasks/${taskId}`, 'DELETE');
         } catch (error) {
             console.error(`Erro ao excluir tarefa ${taskId}:`, error);
             throw error;
         }
     },
     
+    /**
+     * Aplica operações em lote numa única transação no servidor
+     * @param {object} payload - { operations: [...] } ou { action, filter | ids }
+     * @returns {Promise} - Promise com o resumo das operações
+     */
+    bulkTasks: async function(payload) {
+        try {
+            return await this.request('/tasks/bulk', 'POST', {
+                ...payload,
+                user_id: this.currentUser.id
+            });
+        } catch (error) {
+            console.error('Erro ao aplicar operações em lote:', error);
+            throw error;
+        }
+    },
+    
+    /**
+     * Exclui todas as tarefas concluídas do usuário
+     * @returns {Promise} - Promise com o resumo das operações
+     */
+    clearCompletedTasks: async function() {
+        return this.bulkTasks({ action: 'delete', filter: { completed: true } });
+    },
+    
+    /**
+     * Obtém os lembretes que vencem nos próximos minutos (já marcados como notificados)
+     * @param {string|null} since - `horizon` retornado pela consulta anterior
+     * @returns {Promise} - Promise com { reminders, horizon }
+     */
+    getDueReminders: async function(since = null) {
+        let queryParams = `user_id=${this.currentUser.id}&tz_offset=${new Date().getTimezoneOffset()}`;
+        
+        if (since) {
+            queryParams += `&since=${encodeURIComponent(since)}`;
+        }
+        
+        try {
+            const result = await this.request(`/reminders/due?${queryParams}`);
+            return { reminders: result.reminders || [], horizon: result.horizon };
+        } catch (error) {
+            console.error('Erro ao obter lembretes:', error);
+            return { reminders: [], horizon: since };
+        }
+    },
+    
     /**
      * Obtém todas as categorias do usuário
      * @returns {Promise} - Promise com as categorias
@@ -306,76 +526,57 @@ const API = {
     },
     
     /**
-     * Exporta tarefas para formato iCalendar
-     * @returns {Promise} - Promise com o arquivo iCalendar
+     * Abre o feed de alterações do usuário (Server-Sent Events)
+     * @returns {EventSource} - Conexão SSE; reconecta automaticamente a partir do último evento
      */
-    exportToICalendar: async function() {
-        try {
-            // Obter tarefas com lembretes
-            const tasks = await this.getTasks();
-            const tasksWithReminders = tasks.filter(task => task.reminder_datetime);
-            
-            if (tasksWithReminders.length === 0) {
-                throw new Error('Nenhuma tarefa com lembrete encontrada!');
-            }
-            
-            // Gerar conteúdo iCalendar
-            let icsContent = [
-                'BEGIN:VCALENDAR',
-                'VERSION:2.0',
-                'PRODID:-//TaskFlow//TaskFlow//PT',
-                'CALSCALE:GREGORIAN',
-                'METHOD:PUBLISH'
-            ];
-            
-            tasksWithReminders.forEach(task => {
-                const startDate = new Date(task.reminder_datetime);
-                const endDate = new Date(startDate.getTime() + 60 * 60 * 1000); // 1 hora depois
-                
-                icsContent.push(
-                    'BEGIN:VEVENT',
-                    `UID:${task.id}@taskflow.com`,
-                    `DTSTART:${this.formatDateForICS(startDate)}`,
-                    `DTEND:${this.formatDateForICS(endDate)}`,
-                    `SUMMARY:${task.text}`,
-                    `DESCRIPTION:Prioridade: ${task.priority}${task.category ? `\\nCategoria: ${task.category.name}` : ''}`,
-                    `CREATED:${this.formatDateForICS(new Date(task.created_at))}`,
-                    'STATUS:CONFIRMED',
-                    'TRANSP:OPAQUE',
-                    'END:VEVENT'
-                );
-            });
-            
-            icsContent.push('END:VCALENDAR');
-            
-            // Criar blob e download
-            const blob = new Blob([icsContent.join('\r\n')], { type: 'text/calendar;charset=utf-8;' });
-            const url = URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.href = url;
-            a.download = 'taskflow_calendario.ics';
-            document.body.appendChild(a);
-            a.click();
-            document.body.removeChild(a);
-            URL.revokeObjectURL(url);
-            
-            return {
-                success: true,
-                message: `${tasksWithReminders.length} evento(s) exportado(s) para calendário!`
-            };
-        } catch (error) {
-            console.error('Erro ao exportar para iCalendar:', error);
-            throw error;
-        }
+    openEventStream: function() {
+        return new EventSource(`${this.baseUrl}/events?${this.authParams()}`);
+    },
+    
+    /**
+     * Baixa todas as tarefas do usuário (arquivo gerado em streaming pelo servidor)
+     * @param {string} format - 'csv' ou 'ndjson'
+     */
+    exportTasks: function(format) {
+        const a = document.createElement('a');
+        a.href = `${this.baseUrl}/export/tasks.${format}?${this.authParams()}`;
+        a.download = `taskflow_tarefas.${format}`;
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+    },
+    
+    /**
+     * URL do calendário iCalendar gerado pelo servidor (pode ser assinada em aplicativos de calendário)
+     * @param {object} range - Intervalo opcional dos lembretes ({start, end} em ISO 8601)
+     * @returns {string} - URL absoluta do arquivo .ics
+     */
+    getCalendarUrl: function(range = {}) {
+        const params = this.authParams();
+        params.append('tz_offset', new Date().getTimezoneOffset());
+        if (range.start) params.append('start', range.start);
+        if (range.end) params.append('end', range.end);
+        return new URL(`${this.baseUrl}/export/calendar.ics?${params}`, window.location.href).href;
     },
     
     /**
-     * Formata data para o formato iCalendar
-     * @param {Date} date - Data a ser formatada
-     * @returns {string} - Data formatada
+     * Exporta as tarefas com lembrete para formato iCalendar
+     * O arquivo é gerado em streaming pelo servidor e baixado diretamente pelo navegador
+     * @param {object} range - Intervalo opcional dos lembretes ({start, end} em ISO 8601)
+     * @returns {Promise} - Promise com o resultado da operação
      */
-    formatDateForICS: function(date) {
-        return date.toISOString().replace(/[-:]/g, '').split('.')[0] + 'Z';
+    exportToICalendar: async function(range = {}) {
+        const a = document.createElement('a');
+        a.href = this.getCalendarUrl(range);
+        a.download = 'taskflow_calendario.ics';
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        
+        return {
+            success: true,
+            message: 'Calendário exportado!'
+        };
     }
 };
 
@@ -4,21 +4,97 @@ class TaskManager {
     constructor() {
         this.currentFilter = 'todas';
         this.currentCategoryFilter = '';
+        this.searchQuery = '';
+        this.searchTimeout = null;
         this.editingTaskId = null;
+        this.nextCursor = null;
+        this.reminderHorizon = null;
         this.notificationCheckInterval = null;
+        this.eventSource = null;
+        this.stats = {};
+        this.categoriesById = {};
+        this.started = false;
+        this.loginPromise = null;
+        this.resolveLogin = null;
         this.initializeApp();
     }
 
     async initializeApp() {
+        // Com AUTH_REQUIRED=1 a API responde 401 até o login: pedir as credenciais antes de carregar os dados
+        this.bindLoginEvents();
+        TaskFlowAPI.onAuthRequired = () => this.requireLogin();
+        
         // Inicializar API
         await TaskFlowAPI.init();
+        if (this.loginPromise) await this.loginPromise;
+        this.updateSessionControls();
         
         this.bindEvents();
+        this.startChangeFeed();
+        await this.updateCategoryFilter();
         await this.renderTasks();
         await this.updateStats();
-        await this.updateCategoryFilter();
         this.requestNotificationPermission();
         this.startNotificationCheck();
+        this.started = true;
+    }
+
+    bindLoginEvents() {
+        document.getElementById('loginBtn').addEventListener('click', () => this.submitLogin());
+        document.getElementById('loginPasswordInput').addEventListener('keypress', (e) => {
+            if (e.key === 'Enter') this.submitLogin();
+        });
+        document.getElementById('logoutBtn').addEventListener('click', () => this.logout());
+    }
+
+    requireLogin() {
+        // Várias requisições podem receber 401 ao mesmo tempo: um único login atende todas
+        if (!this.loginPromise) {
+            this.loginPromise = new Promise(resolve => {
+                this.resolveLogin = resolve;
+                document.getElementById('loginModal').classList.add('active');
+                document.getElementById('loginUsernameInput').focus();
+            }).then(() => this.afterLogin());
+        }
+        return this.loginPromise;
+    }
+
+    async submitLogin() {
+        const username = document.getElementById('loginUsernameInput').value.trim();
+        const password = document.getElementById('loginPasswordInput').value;
+        
+        if (!username || !password) return this.showToast('Informe usuário e senha', 'error');
+        
+        try {
+            await TaskFlowAPI.login(username, password);
+            document.getElementById('loginPasswordInput').value = '';
+            document.getElementById('loginModal').classList.remove('active');
+            this.resolveLogin();
+        } catch (error) {
+            this.showToast(`Erro ao entrar: ${error.message}`, 'error');
+        }
+    }
+
+    async afterLogin() {
+        this.loginPromise = null;
+        this.updateSessionControls();
+        await TaskFlowAPI.init();
+        
+        // Sessão expirada no meio do uso: reabrir o stream com o novo token e recarregar
+        if (!this.started) return;
+        if (this.eventSource) this.eventSource.close();
+        this.startChangeFeed();
+        await this.reloadAll();
+    }
+
+    updateSessionControls() {
+        document.getElementById('logoutBtn').hidden = !TaskFlowAPI.token;
+    }
+
+    logout() {
+        TaskFlowAPI.logout();
+        // Recarregar a página descarta as tarefas do usuário anterior e o stream de eventos
+        window.location.reload();
     }
 
     bindEvents() {
@@ -48,7 +124,10 @@ class TaskManager {
         document.getElementById('themeToggle').addEventListener('click', () => this.toggleTheme());
         document.getElementById('exportBtn').addEventListener('click', () => this.toggleExportMenu());
         document.getElementById('exportICS').addEventListener('click', () => this.exportData('ics'));
+        document.getElementById('exportCSV').addEventListener('click', () => this.exportData('csv'));
+        document.getElementById('exportNDJSON').addEventListener('click', () => this.exportData('ndjson'));
         document.getElementById('categoryFilter').addEventListener('change', (e) => this.setCategoryFilter(e.target.value));
+        document.getElementById('searchInput').addEventListener('input', (e) => this.setSearchQuery(e.target.value));
 
         // Fechar menu de exportação ao clicar fora
         document.addEventListener('click', (e) => {
@@ -71,23 +150,7 @@ class TaskManager {
         // Isso permite que o usuário adicione tarefas com lembretes para qualquer momento
 
         try {
-            // Verificar se a categoria existe ou criar nova
-            let categoryId = null;
-            if (category) {
-                const categories = await TaskFlowAPI.getCategories();
-                const existingCategory = categories.find(c => c.name.toLowerCase() === category.toLowerCase());
-                
-                if (existingCategory) {
-                    categoryId = existingCategory.id;
-                } else {
-                    // Criar nova categoria
-                    const newCategory = await TaskFlowAPI.addCategory({
-                        name: category,
-                        color: this.getRandomColor()
-                    });
-                    categoryId = newCategory.id;
-                }
-            }
+            const categoryId = await this.resolveCategoryId(category);
             
             // Criar tarefa via API
             const taskData = {
@@ -97,7 +160,7 @@ class TaskManager {
                 reminder_datetime: reminder || null
             };
             
-            await TaskFlowAPI.addTask(taskData);
+            const result = await TaskFlowAPI.addTask(taskData);
             
             // Limpar formulário
             input.value = '';
@@ -105,10 +168,9 @@ class TaskManager {
             document.getElementById('categoryInput').value = '';
             document.getElementById('reminderInput').value = '';
             
-            // Atualizar interface
-            await this.renderTasks();
-            await this.updateStats();
-            await this.updateCategoryFilter();
+            // Atualizar interface a partir da resposta
+            this.applyTaskChange(result.task, true);
+            this.applyStatsDelta(result.stats_delta);
             
             this.showToast('Tarefa adicionada com sucesso!');
         } catch (error) {
@@ -118,14 +180,13 @@ class TaskManager {
 
     async toggleTask(id) {
         try {
-            await TaskFlowAPI.toggleTask(id);
+            const result = await TaskFlowAPI.toggleTask(id);
             
-            // Atualizar interface
-            await this.renderTasks();
-            await this.updateStats();
+            // Atualizar interface a partir da resposta
+            this.applyTaskChange(result.task, false);
+            this.applyStatsDelta(result.stats_delta);
             
-            const task = (await TaskFlowAPI.getTasks()).find(t => t.id === id);
-            this.showToast(task.completed ? 'Tarefa concluída!' : 'Tarefa reaberta!');
+            this.showToast(result.task.completed ? 'Tarefa concluída!' : 'Tarefa reaberta!');
         } catch (error) {
             this.showToast(`Erro ao alternar status da tarefa: ${error.message}`, 'error');
         }
@@ -134,12 +195,11 @@ class TaskManager {
     async deleteTask(id) {
         if (confirm('Tem certeza que deseja excluir esta tarefa?')) {
             try {
-                await TaskFlowAPI.deleteTask(id);
+                const result = await TaskFlowAPI.deleteTask(id);
                 
-                // Atualizar interface
-                await this.renderTasks();
-                await this.updateStats();
-                await this.updateCategoryFilter();
+                // Atualizar interface a partir da resposta
+                this.removeTaskElement(id);
+                this.applyStatsDelta(result.stats_delta);
                 
                 this.showToast('Tarefa excluída!');
             } catch (error) {
@@ -150,8 +210,7 @@ class TaskManager {
 
     async editTask(id) {
         try {
-            const tasks = await TaskFlowAPI.getTasks();
-            const task = tasks.find(t => t.id === id);
+            const task = await TaskFlowAPI.getTask(id);
             
             if (task) {
                 this.editingTaskId = id;
@@ -178,23 +237,7 @@ class TaskManager {
         // Isso permite que o usuário adicione tarefas com lembretes para qualquer momento
 
         try {
-            // Verificar se a categoria existe ou criar nova
-            let categoryId = null;
-            if (category) {
-                const categories = await TaskFlowAPI.getCategories();
-                const existingCategory = categories.find(c => c.name.toLowerCase() === category.toLowerCase());
-                
-                if (existingCategory) {
-                    categoryId = existingCategory.id;
-                } else {
-                    // Criar nova categoria
-                    const newCategory = await TaskFlowAPI.addCategory({
-                        name: category,
-                        color: this.getRandomColor()
-                    });
-                    categoryId = newCategory.id;
-                }
-            }
+            const categoryId = await this.resolveCategoryId(category);
             
             // Atualizar tarefa via API
             const taskData = {
@@ -204,13 +247,12 @@ class TaskManager {
                 reminder_datetime: reminder || null
             };
             
-            await TaskFlowAPI.updateTask(this.editingTaskId, taskData);
+            const result = await TaskFlowAPI.updateTask(this.editingTaskId, taskData);
             
-            // Atualizar interface
+            // Atualizar interface a partir da resposta
             this.closeEditModal();
-            await this.renderTasks();
-            await this.updateStats();
-            await this.updateCategoryFilter();
+            this.applyTaskChange(result.task, false);
+            this.applyStatsDelta(result.stats_delta);
             
             this.showToast('Tarefa atualizada!');
         } catch (error) {
@@ -218,6 +260,22 @@ class TaskManager {
         }
     }
 
+    async resolveCategoryId(name) {
+        // Categoria pelo nome (sem diferenciar maiúsculas), criada se ainda não existir
+        if (!name) return null;
+        
+        const existingCategory = Object.values(this.categoriesById)
+            .find(c => c.name.toLowerCase() === name.toLowerCase());
+        if (existingCategory) return existingCategory.id;
+        
+        const newCategory = await TaskFlowAPI.addCategory({
+            name,
+            color: this.getRandomColor()
+        });
+        this.upsertCategory(newCategory);
+        return newCategory.id;
+    }
+
     closeEditModal() {
         document.getElementById('editModal').classList.remove('active');
         this.editingTaskId = null;
@@ -235,49 +293,63 @@ class TaskManager {
         this.renderTasks();
     }
 
-    async getFilteredTasks() {
+    setSearchQuery(query) {
+        // Aguardar uma pausa na digitação antes de consultar o servidor
+        clearTimeout(this.searchTimeout);
+        this.searchTimeout = setTimeout(() => {
+            this.searchQuery = query.trim();
+            this.renderTasks();
+        }, 250);
+    }
+
+    getCurrentFilters() {
+        const filters = {};
+        
+        // Filtro por status
+        switch (this.currentFilter) {
+            case 'pendentes': 
+                filters.completed = false;
+                break;
+            case 'concluidas': 
+                filters.completed = true;
+                break;
+            case 'alta': 
+                filters.priority = 'alta';
+                break;
+        }
+        
+        // Filtro por categoria
+        if (this.currentCategoryFilter) {
+            filters.category_id = parseInt(this.currentCategoryFilter);
+        }
+        
+        return filters;
+    }
+
+    async getFilteredTasks(cursor = null) {
         try {
-            const filters = {};
-            
-            // Filtro por status
-            switch (this.currentFilter) {
-                case 'pendentes': 
-                    filters.completed = false;
-                    break;
-                case 'concluidas': 
-                    filters.completed = true;
-                    break;
-                case 'alta': 
-                    filters.priority = 'alta';
-                    break;
+            const options = { cursor, fields: TaskFlowAPI.listFields };
+            if (this.searchQuery) {
+                return await TaskFlowAPI.searchTasksPage(this.searchQuery, this.getCurrentFilters(), options);
             }
-            
-            // Filtro por categoria
-            if (this.currentCategoryFilter) {
-                filters.category_id = parseInt(this.currentCategoryFilter);
-            }
-            
-            return await TaskFlowAPI.getTasks(filters);
+            return await TaskFlowAPI.getTasksPage(this.getCurrentFilters(), options);
         } catch (error) {
             console.error('Erro ao filtrar tarefas:', error);
-            return [];
+            return { tasks: [], next_cursor: null };
         }
     }
 
     async clearCompleted() {
         if (confirm('Tem certeza que deseja limpar as tarefas concluídas?')) {
             try {
-                const tasks = await TaskFlowAPI.getTasks({ completed: true });
-                
-                // Excluir cada tarefa concluída
-                for (const task of tasks) {
-                    await TaskFlowAPI.deleteTask(task.id);
-                }
+                // Excluir todas as tarefas concluídas numa única transação
+                const result = await TaskFlowAPI.clearCompletedTasks();
                 
-                // Atualizar interface
-                await this.renderTasks();
-                await this.updateStats();
-                await this.updateCategoryFilter();
+                // Atualizar interface: todas as excluídas estavam concluídas
+                document.querySelectorAll('#tasksContainer .task-item.completed').forEach(element => {
+                    this.removeTaskElement(element.dataset.taskId);
+                });
+                this.applyStatsDelta({ total_tasks: -result.deleted, completed_tasks: -result.deleted });
                 
                 this.showToast('Tarefas concluídas removidas!');
             } catch (error) {
@@ -288,37 +360,72 @@ class TaskManager {
 
     async renderTasks() {
         const container = document.getElementById('tasksContainer');
-        const filteredTasks = await this.getFilteredTasks();
+        const page = await this.getFilteredTasks();
         container.innerHTML = '';
 
-        if (filteredTasks.length === 0) {
-            container.innerHTML = `
-                <div class="empty-state">
-                    <i class="fas fa-clipboard-list"></i>
-                    <h3>Nenhuma tarefa encontrada</h3>
-                    <p>Adicione sua primeira tarefa para começar a organizar seu dia!</p>
-                </div>`;
+        if (page.tasks.length === 0) {
+            this.nextCursor = null;
+            this.showEmptyState(container);
             return;
         }
 
-        filteredTasks.forEach(task => {
-            const temp = document.createElement('div');
-            temp.innerHTML = this.createTaskHTML(task);
-            const taskElement = temp.firstElementChild;
-            container.appendChild(taskElement);
+        this.appendTasks(container, page);
+    }
 
-            taskElement.querySelector('.task-checkbox').addEventListener('click', () => {
-                this.toggleTask(task.id);
-            });
+    async loadMoreTasks() {
+        if (!this.nextCursor) return;
+        
+        const container = document.getElementById('tasksContainer');
+        const page = await this.getFilteredTasks(this.nextCursor);
+        this.appendTasks(container, page);
+    }
 
-            taskElement.querySelector('.edit-btn').addEventListener('click', () => {
-                this.editTask(task.id);
-            });
+    appendTasks(container, page) {
+        const loadMoreBtn = container.querySelector('.load-more-btn');
+        if (loadMoreBtn) loadMoreBtn.remove();
 
-            taskElement.querySelector('.delete-btn').addEventListener('click', () => {
-                this.deleteTask(task.id);
-            });
+        page.tasks.forEach(task => {
+            container.appendChild(this.createTaskElement(task));
+        });
+
+        // Paginação: botão para carregar a próxima página
+        this.nextCursor = page.next_cursor;
+        if (this.nextCursor) {
+            const button = document.createElement('button');
+            button.className = 'btn btn-secondary load-more-btn';
+            button.textContent = 'Carregar mais';
+            button.addEventListener('click', () => this.loadMoreTasks());
+            container.appendChild(button);
+        }
+    }
+
+    showEmptyState(container) {
+        container.innerHTML = `
+            <div class="empty-state">
+                <i class="fas fa-clipboard-list"></i>
+                <h3>Nenhuma tarefa encontrada</h3>
+                <p>Adicione sua primeira tarefa para começar a organizar seu dia!</p>
+            </div>`;
+    }
+
+    createTaskElement(task) {
+        const temp = document.createElement('div');
+        temp.innerHTML = this.createTaskHTML(task);
+        const taskElement = temp.firstElementChild;
+
+        taskElement.querySelector('.task-checkbox').addEventListener('click', () => {
+            this.toggleTask(task.id);
+        });
+
+        taskElement.querySelector('.edit-btn').addEventListener('click', () => {
+            this.editTask(task.id);
+        });
+
+        taskElement.querySelector('.delete-btn').addEventListener('click', () => {
+            this.deleteTask(task.id);
         });
+
+        return taskElement;
     }
 
     createTaskHTML(task) {
@@ -374,20 +481,24 @@ class TaskManager {
 
     async updateStats() {
         try {
-            const stats = await TaskFlowAPI.getStats();
-            
-            document.getElementById('totalTasks').textContent = stats.total_tasks || 0;
-            document.getElementById('completedTasks').textContent = stats.completed_tasks || 0;
-            document.getElementById('pendingTasks').textContent = stats.pending_tasks || 0;
+            this.stats = await TaskFlowAPI.getStats();
+            this.renderStats();
         } catch (error) {
             console.error('Erro ao atualizar estatísticas:', error);
         }
     }
 
+    renderStats() {
+        document.getElementById('totalTasks').textContent = this.stats.total_tasks || 0;
+        document.getElementById('completedTasks').textContent = this.stats.completed_tasks || 0;
+        document.getElementById('pendingTasks').textContent = this.stats.pending_tasks || 0;
+    }
+
     async updateCategoryFilter() {
         try {
             const categoryFilter = document.getElementById('categoryFilter');
             const categories = await TaskFlowAPI.getCategories();
+            this.categoriesById = Object.fromEntries(categories.map(category => [category.id, category]));
             
             // Manter a opção "Todas as categorias"
             categoryFilter.innerHTML = '<option value="">Todas as categorias</option>';
@@ -406,6 +517,112 @@ class TaskManager {
         }
     }
 
+    upsertCategory(category) {
+        // Incluir uma categoria recebida (resposta ou feed) sem recarregar a lista
+        const isNew = !this.categoriesById[category.id];
+        this.categoriesById[category.id] = category;
+        if (!isNew) return;
+        
+        const option = document.createElement('option');
+        option.value = category.id;
+        option.textContent = category.name;
+        document.getElementById('categoryFilter').appendChild(option);
+    }
+
+    // Feed de alterações (Server-Sent Events)
+    startChangeFeed() {
+        if (!('EventSource' in window)) return;
+
+        // O EventSource reconecta sozinho enviando o Last-Event-ID
+        this.eventSource = TaskFlowAPI.openEventStream();
+
+        const handlers = {
+            task_created: task => this.applyTaskChange(task, true),
+            task_updated: task => this.applyTaskChange(task, false),
+            task_deleted: data => this.removeTaskElement(data.id),
+            stats_delta: delta => this.applyStatsDelta(delta),
+            category_created: category => this.upsertCategory(category),
+            category_updated: async () => {
+                await this.updateCategoryFilter();
+                await this.renderTasks();
+            },
+            category_deleted: () => this.updateCategoryFilter(),
+            tasks_changed: () => this.reloadAll(),
+            reset: () => this.reloadAll()
+        };
+
+        Object.entries(handlers).forEach(([type, handler]) => {
+            this.eventSource.addEventListener(type, event => {
+                const { origin, ...data } = JSON.parse(event.data);
+                // As próprias escritas já foram aplicadas a partir da resposta
+                if (origin === TaskFlowAPI.clientId) return;
+                handler(data);
+            });
+        });
+    }
+
+    async reloadAll() {
+        await this.renderTasks();
+        await this.updateStats();
+        await this.updateCategoryFilter();
+    }
+
+    matchesFilters(task) {
+        const filters = this.getCurrentFilters();
+        if (filters.completed !== undefined && task.completed !== filters.completed) return false;
+        if (filters.priority && task.priority !== filters.priority) return false;
+        if (filters.category_id && task.category_id !== filters.category_id) return false;
+        return true;
+    }
+
+    applyTaskChange(task, isNew) {
+        task.category = task.category_id ? this.categoriesById[task.category_id] || null : null;
+
+        const container = document.getElementById('tasksContainer');
+        const existing = container.querySelector(`[data-task-id="${task.id}"]`);
+
+        // Com busca ativa, correspondência e ordem (relevância) são decididas pelo servidor
+        if (this.searchQuery) {
+            this.renderTasks();
+            return;
+        }
+
+        if (!this.matchesFilters(task)) {
+            if (existing) this.removeTaskElement(task.id);
+            return;
+        }
+
+        if (existing) {
+            existing.replaceWith(this.createTaskElement(task));
+        } else if (isNew) {
+            const emptyState = container.querySelector('.empty-state');
+            if (emptyState) emptyState.remove();
+            container.prepend(this.createTaskElement(task));
+        } else {
+            // Tarefa passou a corresponder ao filtro: posição depende da ordenação do servidor
+            this.renderTasks();
+        }
+    }
+
+    removeTaskElement(taskId) {
+        const container = document.getElementById('tasksContainer');
+        const element = container.querySelector(`[data-task-id="${taskId}"]`);
+        if (element) element.remove();
+
+        if (!container.querySelector('.task-item') && !this.nextCursor) {
+            this.showEmptyState(container);
+        }
+    }
+
+    applyStatsDelta(delta) {
+        // Único ponto que altera as estatísticas entre recargas completas:
+        // respostas das próprias escritas e stats_delta do feed (de outras abas)
+        Object.entries(delta).forEach(([key, value]) => {
+            this.stats[key] = (this.stats[key] || 0) + value;
+        });
+        this.renderStats();
+    }
+
     showToast(message, type = 'success') {
         const toast = document.getElementById('toast');
         const toastMessage = document.getElementById('toastMessage');
@@ -443,6 +660,9 @@ class TaskManager {
         
         if (format === 'ics') {
             this.exportICS();
+        } else {
+            TaskFlowAPI.exportTasks(format);
+            this.showToast('Tarefas exportadas!');
         }
     }
 
@@ -477,25 +697,15 @@ class TaskManager {
     }
 
     async checkReminders() {
-        const now = new Date();
-        const fiveMinutesFromNow = new Date(now.getTime() + 5 * 60000);
-        
         try {
-            const tasks = await TaskFlowAPI.getTasks({ completed: false });
+            // O servidor retorna apenas os lembretes que vencem nos próximos minutos
+            // e já os marca como notificados
+            const result = await TaskFlowAPI.getDueReminders(this.reminderHorizon);
+            this.reminderHorizon = result.horizon;
             
-            tasks.forEach(task => {
-                if (task.reminder_datetime && !task.completed && !task.notified) {
-                    const reminderDate = new Date(task.reminder_datetime);
-                    
-                    // Notificar se o lembrete está entre agora e 5 minutos
-                    if (reminderDate >= now && reminderDate <= fiveMinutesFromNow) {
-                        this.showNotification(task);
-                        
-                        // Marcar como notificado
-                        TaskFlowAPI.updateTask(task.id, { notified: true });
-                    }
-                }
-            });
+            if ('Notification' in window && Notification.permission === 'granted') {
+                result.reminders.forEach(task => this.showNotification(task));
+            }
         } catch (error) {
             console.error('Erro ao verificar lembretes:', error);
         }
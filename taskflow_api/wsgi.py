@@ -0,0 +1,23 @@
+"""
+Ponto de entrada WSGI da API TaskFlow para servidores de produção
+
+Exemplos (a partir do diretório taskflow_api):
+    WEB_CONCURRENCY=4 gunicorn --threads 4 --preload -b 0.0.0.0:5001 wsgi:app
+    waitress-serve --port=5001 --threads=8 wsgi:app
+
+O feed SSE (/api/events) mantém uma thread ocupada por conexão; com muitas
+abas abertas use um worker assíncrono:
+    WEB_CONCURRENCY=4 gunicorn -k gevent --worker-connections 1000 --preload -b 0.0.0.0:5001 wsgi:app
+
+A configuração pode ser trocada pela variável TASKFLOW_CONFIG
+(production, development, testing).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import create_app
+
+app = create_app(os.environ.get('TASKFLOW_CONFIG', 'production'))